@@ -20,6 +20,8 @@ from backend.api.import_api import import_api
 from backend.api.sidebar_api import sidebar_api
 from backend.api.query_api import query_api  # 新增：引入数据查询蓝图
 from backend.api.analysis_api import analysis_api
+from backend.services.import_jobs import fail_interrupted_jobs
+from backend.services.student_search import ensure_search_index
 
 
 def create_app():
@@ -41,6 +43,10 @@ def create_app():
     with app.app_context():
         try:
             db.create_all()
+            # 学生姓名、学校等文本检索使用的 FTS5 全文索引（SQLite 不支持时查询退回 ILIKE）
+            ensure_search_index(db.engine)
+            # 上次进程退出时未完成的导入任务不会继续执行，置为失败
+            fail_interrupted_jobs()
         except SQLAlchemyError as e:
             app.logger.error(f"数据库初始化错误: {str(e)}")
 
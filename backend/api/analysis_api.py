@@ -47,6 +47,7 @@ from backend.models.student_extension import StudentExtension
 # 本地导入
 from backend.models.student_extension import StudentExtension  # 必须添加
 from backend.models.student import Student
+from backend.services.condition_compiler import NULL_OPERATORS, compile_conditions
 from backend.constants import (
     COMPLETE_FIELDS as complete_fields,
     BOOLEAN_FIELDS,
@@ -267,6 +268,8 @@ def aggregate_query_data(query, query_mode, template, advanced_str):
     grouping_cols = []
     metric_conditions = []
     filter_conditions = []
+    # 筛选条件（role 为 filter 或 and / or 条件组）统一交给条件编译器
+    filter_specs = []
     free_group_field = None
     group_singles = {}
     group_intervals = {}
@@ -298,11 +301,14 @@ def aggregate_query_data(query, query_mode, template, advanced_str):
                 raise ValueError("advanced_conditions 参数格式错误") from e
             # 遍历高级条件，逐条处理（与自定义模式相同）
             for cond in advanced_conditions:
+                if "and" in cond or "or" in cond:
+                    filter_specs.append(cond)
+                    continue
                 field = cond.get("field", "").strip()
                 operator = cond.get("operator", "").strip().lower()
                 value = cond.get("value")
                 role = cond.get("role", "").strip().lower()
-                if not field or not operator or value in [None, "", []]:
+                if not field or not operator or (value in [None, "", []] and operator not in NULL_OPERATORS):
                     raise ValueError("请选择二级选项或填写数值或文本")
                 if role == "group":
                     if field not in grouping_cols:
@@ -324,7 +330,7 @@ def aggregate_query_data(query, query_mode, template, advanced_str):
                             "selected": value if isinstance(value, list) else [value],
                         })
                 elif role == "filter":
-                    filter_conditions.append((field, operator, value))
+                    filter_specs.append(cond)
         # 如果固定模板模式下未提供统计指标子选项，使用数据库中所有不同值（后续查询时统计时不做过滤）
         for m in metric_conditions:
             if not m["selected"]:
@@ -340,12 +346,15 @@ def aggregate_query_data(query, query_mode, template, advanced_str):
             raise ValueError("advanced_conditions 参数格式错误") from e
 
         for cond in advanced_conditions:
+            if "and" in cond or "or" in cond:
+                filter_specs.append(cond)
+                continue
             field = cond.get("field", "").strip()
             operator = cond.get("operator", "").strip().lower()
             value = cond.get("value")
             role = cond.get("role", "").strip().lower()
 
-            if not field or not operator or value in [None, "", []]:
+            if not field or not operator or (value in [None, "", []] and operator not in NULL_OPERATORS):
                 raise ValueError("请选择二级选项或填写数值或文本")
 
 # ===== 干预方式分组处理（动态组合版本） =====
@@ -512,54 +521,11 @@ def aggregate_query_data(query, query_mode, template, advanced_str):
                         "label": METRIC_CONFIG.get(field, {}).get("label", field)
                     })
             elif role == "filter":
-                try:
-                    if isinstance(value, dict) and "min" in value and "max" in value:
-                        try:
-                            filter_conditions.append(
-                                col >= float(value["min"]))
-                            filter_conditions.append(
-                                col <= float(value["max"]))
-                        except ValueError:
-                            pass
-                    elif isinstance(value, list) and len(value) > 0:
-                        filter_conditions.append(col.in_(value))
-                    else:
-                        if operator == "=":
-                            filter_conditions.append(col == value)
-                        elif operator == "!=":
-                            filter_conditions.append(col != value)
-                        elif operator == "like":
-                            filter_conditions.append(col.ilike(f"%{value}%"))
-                        elif operator in (">", "<", ">=", "<="):
-                            if isinstance(value, dict):
-                                min_val = value.get("min", "").strip()
-                                max_val = value.get("max", "").strip()
-                                if min_val and max_val:
-                                    try:
-                                        filter_conditions.append(
-                                            col >= float(min_val))
-                                        filter_conditions.append(
-                                            col <= float(max_val))
-                                    except ValueError:
-                                        raise ValueError(
-                                            f"字段 '{field}' 数值转换错误")
-                                elif min_val or max_val:
-                                    try:
-                                        num_val = float(
-                                            min_val) if min_val else float(max_val)
-                                        filter_conditions.append(
-                                            col == num_val)
-                                    except ValueError:
-                                        raise ValueError(
-                                            f"字段 '{field}' 数值转换错误")
-                            else:
-                                try:
-                                    num_val = float(value)
-                                    filter_conditions.append(col == num_val)
-                                except ValueError:
-                                    raise ValueError(f"字段 '{field}' 数值转换错误")
-                except Exception as exc:
-                    raise ValueError(f"解析高级条件失败: {str(exc)}") from exc
+                filter_specs.append(cond)
+
+    # 筛选条件：由条件编译器按字段注册表校验并编译（与数据查询接口规则一致）
+    if filter_specs:
+        filter_conditions.append(compile_conditions(filter_specs))
 
     # 判断必须存在分组条件与统计指标条件（自定义模式）
     if query_mode == "custom":
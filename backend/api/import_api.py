@@ -5,46 +5,112 @@
 完整存储路径: E:\DEV_CONTEXT\1_Projects\VISION_HEALTH_SYSTEM_VUE\backend\api\import_api.py
 功能说明:
     提供学生数据导入功能。支持上传 Excel (.xlsx) 和 CSV (.csv) 文件，
-    使用 Pandas 解析文件，对每行数据进行必填字段校验与数据格式转换。
+    上传文件按块流式读取（CSV 使用 chunksize，XLSX 使用 openpyxl 只读模式逐行迭代），
+    每块由 backend/services/import_service.py 中的列式引擎按列完成必填字段校验、
+    数据格式转换与计算，批量写入数据库后立即提交，内存占用不随文件大小增长。
+    每块行数可通过应用配置 IMPORT_CHUNK_SIZE 调整；校验与转换阶段的并行进程数可通过 IMPORT_WORKERS 调整。
     合格记录写入数据库：
       - 学生基本信息保存在 Student 表（不随时间变化的字段）；
       - 随时间变化的数据保存在 StudentExtension 表，包含 data_year 字段。
     重复检测基于 education_id 与 data_year 的组合：
       - 若同一 education_id 且 data_year 相同，则执行部分更新（基本信息和扩展信息中空字段补充，不覆盖已有数据）；
       - 若同一 education_id 但 data_year 不同，则在扩展信息表中新增一条记录。
-    数据导入后，会调用统计计算模块，对单条记录进行计算，
+    数据导入时会调用统计计算模块（列式版本），一次性计算全部记录，
     更新扩展记录中存储的计算结果（如左眼裸眼视力变化及其标签）。
+    导入以后台任务方式执行（backend/services/import_jobs.py），上传接口立即返回任务ID，
+    前端轮询任务接口获取进度（已处理行数、失败行数、吞吐量、预计剩余时间）与最终结果。
 使用方法:
     API接口 URL: /api/students/import
     请求方法: POST
     请求内容类型: multipart/form-data
     参数:
       - file: 上传的 .xlsx 或 .csv 文件
-      - data_year: 数据年份（由前端下拉选择，格式为4位字符串，如 "2024"）
+      - data_year: 数据年份（由前端下拉选择，格式为4位字符串，如 "2024"）；
+                   多年份数据可在一个文件中上传：表格带有 "数据年份" 列时按各行的年份导入（该列为空的行使用 data_year），
+                   XLSX 包含多个以年份命名的工作表（如 "2023"、"2024"）时按工作表导入；
+                   文件只解析一次，按年份分组后逐年份写入并提交，任务结果的 data_years 给出各年份的行数
+      - dry_run: 可选，取值 1/true 时只做试运行预览（不写入数据库），同步返回错误率、列覆盖率、
+                 重复教育ID号与取值分布等汇总统计
+      - sample_size: 可选，试运行时的抽样行数（均匀抽样，错误率附带 95% 置信区间半宽）
+      - force: 可选，取值 1/true 时即使同一文件（内容哈希相同）已导入过也重新导入
+      - incremental: 可选，取值 1/true 时增量导入：与该学生该年度上次导入内容相同的行直接跳过，
+                     内容有变化的已有记录只写入变化的字段（表格中的非空值覆盖原值）并重新计算；
+                     非增量导入时已有记录只补充为空的字段，不覆盖原值。任务结果的 update_mode 给出更新方式
+                     （fill_empty / overwrite），导入结果说明中也会注明
+    上传文件的解析结果按内容哈希缓存（backend/services/parsed_cache.py）：试运行预览后正式导入、
+    或强制重新导入同一文件时不再重复解析；试运行时若同名文件的上一版本仍在缓存中，
+    返回的 changes 给出与上一版本相比新增、修改、未变与删除的行数。
+    返回: HTTP 202，{"job_id": 任务ID, "status_url": 进度查询地址, ...}；
+          同一文件已提交过导入时返回 HTTP 200，duplicate 为 true，job_id 为已有任务
+
+    分块（可续传）上传，适用于网络不稳定时上传较大文件（backend/services/upload_sessions.py）：
+      POST /api/students/import/uploads                      创建会话（filename、data_year、total_size、file_hash）
+      PUT  /api/students/import/uploads/<upload_id>?offset=N  追加分块（请求体为原始字节）
+      GET  /api/students/import/uploads/<upload_id>           查询已接收字节数，断点续传
+      POST /api/students/import/uploads/<upload_id>/complete  校验哈希并创建导入任务
+
+    API接口 URL: /api/students/import/jobs/<job_id>
+    请求方法: GET
+    返回: 任务状态（pending / running / succeeded / failed）及进度，成功结束后附带导入结果与失败记录下载链接
+
+    API接口 URL: /api/students/import/jobs/<job_id>/failures
+    请求方法: GET
+    返回: 失败记录表（.xlsx）
+
+    API接口 URL: /api/students/import/metrics
+    请求方法: GET
+    参数: limit（可选，统计的最近导入任务数，默认 50）
+    返回: 导入历史汇总（backend/services/import_metrics.py）：各阶段平均耗时、吞吐量与耗时占比、
+          内存峰值、最近导入记录、各学校导入吞吐量（慢的在前）
 """
-import traceback
 import os
 import time
+import uuid
 from datetime import datetime
 
-import pandas as pd
-from flask import Blueprint, request, jsonify, current_app, url_for
+from flask import Blueprint, request, jsonify, current_app, url_for, send_from_directory
 from werkzeug.utils import secure_filename
-from sqlalchemy.exc import SQLAlchemyError
 
 from backend.infrastructure.database import db
-from backend.models.student import Student
-
-# 导入统计计算模块（单记录内计算函数）
-from backend.services.vision_calculation import calculate_within_year_change
+from backend.models.import_job import ImportJob
+from backend.models.upload_session import UploadSession
+
+# 导入处理引擎（列式校验、转换、计算与批量写入）与后台导入任务
+from backend.services.import_jobs import submit_import_job
+from backend.services.import_metrics import import_history_summary
+from backend.services.import_preview import preview_file
+from backend.services.import_service import IMPORT_CHUNK_SIZE, IMPORT_WORKERS
+from backend.services.parsed_cache import diff_parsed_frames, load_parsed_frame
+from backend.services.upload_sessions import (
+    append_upload_chunk,
+    complete_upload,
+    create_upload_session,
+    discard_upload,
+    file_sha256,
+    find_imported_job,
+    find_previous_job,
+    received_bytes,
+)
 
 ALLOWED_EXTENSIONS = {"xlsx", "csv"}
 
+# 试运行返回的与上一版本相比有修改的行号个数上限
+PREVIEW_CHANGED_ROWS = 100
+
+# 导入结果说明中已有记录更新方式的提示（键为 ImportJob.update_mode）
+UPDATE_MODE_NOTES = {
+    "fill_empty": " 已有记录只补充为空的字段，未覆盖原值。",
+    "overwrite": " 增量导入：已有记录中有变化的字段已按表格中的非空取值覆盖原值。",
+}
+
 # 临时上传文件保存目录（用于保存上传过程中产生的临时文件）
 TEMP_UPLOAD_DIR = os.path.join(os.getcwd(), "temp_uploads")
 if not os.path.exists(TEMP_UPLOAD_DIR):
     os.makedirs(TEMP_UPLOAD_DIR)
 
+# 上传文件解析结果缓存目录（按文件内容哈希保存解析后的数据块）
+PARSED_CACHE_DIR = os.path.join(TEMP_UPLOAD_DIR, "parsed_cache")
+
 # 失败记录文件保存目录（公开可下载）
 FAILURE_UPLOAD_DIR = os.path.join(os.getcwd(), "frontend", "static", "uploads")
 if not os.path.exists(FAILURE_UPLOAD_DIR):
@@ -56,87 +122,56 @@ def allowed_file(filename: str) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def validate_row(row, required_fields, row_index: int):
-    """
-    校验一行数据是否满足必填字段和基本格式要求。
-    返回 (is_valid, errors_list)
-    """
-    errors = []
-    # 必填字段：教育ID号、学校、班级、姓名、性别
-    for field in required_fields:
-        if pd.isna(row.get(field, None)):
-            errors.append(f"第{row_index+2}行: 缺失必填字段 '{field}'")
-    # 校验裸眼视力范围（右眼-裸眼视力与左眼-裸眼视力），如果提供则进行校验
-    for field in ["右眼-裸眼视力", "左眼-裸眼视力"]:
-        if not pd.isna(row.get(field, None)):
-            try:
-                value = float(row.get(field, 0))
-                if value < 0.1 or value > 5.0:
-                    errors.append(
-                        f"第{row_index+2}行: '{field}' 值 {value} 不在合理范围(0.1-5.0)")
-            except ValueError:
-                errors.append(f"第{row_index+2}行: '{field}' 格式错误")
-    return (len(errors) == 0, errors)
-
-
-def partial_update_student(student_obj, ext_obj, row, row_index: int, errors: list) -> bool:
-    """
-    对已有记录进行部分更新：
-      - 对基本信息（Student 表）：仅更新为空的字段，不覆盖已有数据。
-      - 对扩展信息（StudentExtension 表）：仅更新为空的字段，不覆盖已有数据。
-    示例中更新姓名、身份证号码、家长姓名、家长电话、联系电话、联系地址、出生日期等字段。
-    返回 True 表示更新成功，否则返回 False。
-    """
-    # 基本信息更新
-    row_val = row.get("姓名", None)
-    if not pd.isna(row_val):
-        if student_obj.name is None or student_obj.name.strip() == "":
-            student_obj.name = str(row_val).strip()
-    row_val = row.get("身份证号码", None)
-    if not pd.isna(row_val):
-        if student_obj.id_card is None or student_obj.id_card.strip() == "":
-            student_obj.id_card = str(row_val).strip()
-    row_val = row.get("家长姓名", None)
-    if not pd.isna(row_val):
-        if student_obj.parent_name is None or student_obj.parent_name.strip() == "":
-            student_obj.parent_name = str(row_val).strip()
-    row_val = row.get("家长电话", None)
-    if not pd.isna(row_val):
-        if student_obj.parent_phone is None or student_obj.parent_phone.strip() == "":
-            student_obj.parent_phone = str(row_val).strip()
-    row_val = row.get("联系电话", None)
-    if not pd.isna(row_val):
-        if student_obj.phone is None or student_obj.phone.strip() == "":
-            student_obj.phone = str(row_val).strip()
-    row_val = row.get("联系地址", None)
-    if not pd.isna(row_val):
-        if student_obj.contact_address is None or student_obj.contact_address.strip() == "":
-            student_obj.contact_address = str(row_val).strip()
-    if "出生日期" in row and not pd.isna(row["出生日期"]):
-        try:
-            bd = pd.to_datetime(row["出生日期"]).date()
-            if student_obj.birthday is None:
-                student_obj.birthday = bd
-        except Exception as e:
-            errors.append(f"第{row_index+2}行: '出生日期' 格式错误: {str(e)}")
-            return False
-
-    # 扩展信息更新示例（仅处理部分字段，此处可扩展）
-    row_val = row.get("年级", None)
-    if not pd.isna(row_val):
-        if ext_obj.grade is None or ext_obj.grade.strip() == "":
-            ext_obj.grade = str(row_val).strip()
-    row_val = row.get("身高", None)
-    if not pd.isna(row_val):
-        try:
-            h = float(row_val)
-            if ext_obj.height is None:
-                ext_obj.height = h
-        except ValueError:
-            errors.append(f"第{row_index+2}行: '身高' 数据格式错误")
-            return False
-    # ...（其它扩展字段更新逻辑）
-    return True
+def is_truthy(value) -> bool:
+    """表单 / JSON 中的布尔开关：1、true、yes、on（不区分大小写）为真"""
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def submit_upload(filepath, ext, filename, data_year, file_hash, save_seconds=0.0, job_id=None,
+                  incremental=False):
+    """为已保存的上传文件创建后台导入任务（使用应用配置的分块行数与并行进程数）"""
+    return submit_import_job(
+        filepath, ext, filename, data_year, FAILURE_UPLOAD_DIR,
+        current_app.config.get("IMPORT_CHUNK_SIZE", IMPORT_CHUNK_SIZE),
+        current_app.config.get("IMPORT_WORKERS", IMPORT_WORKERS),
+        file_hash, save_seconds, PARSED_CACHE_DIR, job_id, incremental)
+
+
+def job_response(job, message, status_code, duplicate=False):
+    """导入任务的统一响应：任务ID、状态与进度查询地址"""
+    return jsonify({
+        "message": message,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for("import_api.get_import_job", job_id=job.id),
+        "duplicate": duplicate,
+    }), status_code
+
+
+def duplicate_response(job):
+    """同一文件内容与数据年份已提交过导入时的响应（HTTP 200，不重复导入）"""
+    return job_response(job, f"该文件已于 {job.created_at:%Y-%m-%d %H:%M:%S} 提交导入，未重复导入。",
+                        200, duplicate=True)
+
+
+def previous_version_changes(filename, data_year, file_hash):
+    """与同名文件上一版本（解析结果仍在缓存中）逐行比较的行数统计；无可比较的版本时返回 None"""
+    previous_job = find_previous_job(filename, data_year, file_hash)
+    if previous_job is None:
+        return None
+    previous = load_parsed_frame(PARSED_CACHE_DIR, previous_job.file_hash)
+    current = load_parsed_frame(PARSED_CACHE_DIR, file_hash)
+    if previous is None or current is None:
+        return None
+    diff = diff_parsed_frames(previous, current)
+    return {
+        "previous_job_id": previous_job.id,
+        "added": len(diff["added"]),
+        "changed": len(diff["changed"]),
+        "unchanged": len(diff["unchanged"]),
+        "removed": len(diff["removed"]),
+        "changed_rows": [index + 2 for index in diff["changed"][:PREVIEW_CHANGED_ROWS]],
+    }
 
 
 import_api = Blueprint("import_api", __name__)
@@ -144,64 +179,28 @@ import_api = Blueprint("import_api", __name__)
 
 @import_api.route("/api/students/import", methods=["POST"])
 def import_students():
-
-    # ============== 这里开始替换代码 ==============
-    # 基础校验（不在try块内）
-    if 'file' not in request.files:
-        current_app.logger.error("未找到上传文件")
-        return jsonify({"error": "未找到上传文件"}), 400
-
-    file = request.files['file']
-    if file.filename == '':
-        current_app.logger.error("收到空文件名")
-        return jsonify({"error": "未选择文件"}), 400
-
-    # 核心处理逻辑（用完整的try-except包裹）
-    try:
-        current_app.logger.debug("=== 开始处理请求 ===")
-        current_app.logger.debug(f"请求表单数据: {request.form}")
-        current_app.logger.debug(f"请求文件: {request.files}")
-
-        filename = secure_filename(file.filename)
-        current_app.logger.debug(f"DEBUG: 原始文件名: {file.filename}")
-        current_app.logger.debug(f"DEBUG: secure_filename 后: {filename}")
-
-        if '.' not in filename:
-            current_app.logger.error("文件名缺少扩展名")
-            return jsonify({"error": "文件名缺少扩展名"}), 400
-
-        ext = filename.rsplit('.', 1)[1].lower()
-        if ext not in ALLOWED_EXTENSIONS:
-            current_app.logger.error(f"不支持的文件扩展名 .{ext}")
-            return jsonify({"error": f"不支持的文件扩展名 .{ext}"}), 400
-
-        temp_filepath = os.path.join(
-            TEMP_UPLOAD_DIR, f"upload_{int(time.time())}.{ext}")
-        file.save(temp_filepath)
-
-        current_app.logger.debug(f"文件已成功保存到: {temp_filepath}")
-
-    except Exception as e:
-        current_app.logger.error(f"文件处理异常: {str(e)}")
-        if 'temp_filepath' in locals() and os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
-        return jsonify({"error": f"文件处理错误: {str(e)}"}), 500
-    # ============== 这里结束替换代码 ==============
-
     """
-    学生数据导入接口
-    处理上传的 Excel 或 CSV 文件，解析数据，对每行数据进行必填字段校验和格式转换，
+    学生数据导入接口（异步）
+    校验并保存上传文件后创建后台导入任务，立即返回任务ID（HTTP 202）。
+    导入在后台线程中按块执行：解析数据、对每行数据进行必填字段校验和格式转换，
     合格记录写入基本信息表（Student）和扩展信息表（StudentExtension）。
     重复检测基于 education_id 与 data_year 的组合：
       - 若同一 education_id 且 data_year 相同，则执行部分更新（仅补充为空的字段，不覆盖已有数据）；
       - 若同一 education_id 但 data_year 不同，则在扩展信息表中新增一条记录（基本信息表不变）。
-    校验失败的记录生成上传失败记录表（仅包含失败行，错误信息标红），并返回上传结果。
+    校验失败的记录生成上传失败记录表（仅包含失败行，错误信息标红），通过任务接口下载。
+    dry_run 为真时只做试运行：同步执行校验、转换与计算并返回汇总统计（HTTP 200），不写入数据库；
+    可用 sample_size 指定抽样行数。
+    同一文件内容（SHA-256）与数据年份已提交过导入时直接返回已有任务（HTTP 200，duplicate 为 true），
+    force 为真时仍重新导入。
+    incremental 为真时增量导入，内容未变化的行直接跳过。
     """
     if "file" not in request.files:
+        current_app.logger.error("未找到上传文件")
         return jsonify({"error": "未找到上传文件"}), 400
 
     file = request.files["file"]
     if file.filename == "":
+        current_app.logger.error("收到空文件名")
         return jsonify({"error": "未选择文件"}), 400
 
     if not allowed_file(file.filename):
@@ -211,391 +210,245 @@ def import_students():
     if not data_year:
         return jsonify({"error": "未提供数据年份"}), 400
 
-    current_app.logger.debug(f"DEBUG: 原始上传文件名: {file.filename}")
+    # 扩展名取自原始文件名（secure_filename 会去除中文字符，可能连同扩展名前的部分一起去掉）
+    ext = file.filename.rsplit('.', 1)[1].lower()
     filename = secure_filename(file.filename)
-    current_app.logger.debug(f"DEBUG: secure_filename 后的文件名: {filename}")
-    temp_filepath = os.path.join(TEMP_UPLOAD_DIR, filename)
-    file.save(temp_filepath)
+    temp_filepath = os.path.join(
+        TEMP_UPLOAD_DIR, f"upload_{uuid.uuid4().hex}.{ext}")
+    if is_truthy(request.form.get("dry_run")):
+        sample_size = request.form.get("sample_size", "").strip()
+        if sample_size and (not sample_size.isdigit() or int(sample_size) == 0):
+            return jsonify({"error": "sample_size 必须为正整数"}), 400
+        try:
+            file.save(temp_filepath)
+            file_hash = file_sha256(temp_filepath)
+            summary = preview_file(
+                temp_filepath, ext, int(sample_size) if sample_size else None,
+                current_app.config.get("IMPORT_CHUNK_SIZE", IMPORT_CHUNK_SIZE),
+                cache_dir=PARSED_CACHE_DIR, file_hash=file_hash)
+            summary["file_hash"] = file_hash
+            summary["changes"] = previous_version_changes(filename, data_year, file_hash)
+        except Exception as e:
+            current_app.logger.error(f"导入预览异常: {str(e)}")
+            return jsonify({"error": f"文件处理错误: {str(e)}"}), 500
+        finally:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+        return jsonify(summary), 200
 
-    # ============== 这里开始插入/替换代码 ==============
-    # 安全处理文件名和扩展名
-    filename = secure_filename(file.filename)
-    current_app.logger.debug(f"DEBUG: 原始文件名: {file.filename}")
-    current_app.logger.debug(f"DEBUG: secure_filename 后: {filename}")
+    try:
+        started = time.perf_counter()
+        file.save(temp_filepath)
+        file_hash = file_sha256(temp_filepath)
+        save_seconds = time.perf_counter() - started
+        existing_job = None if is_truthy(request.form.get("force")) else find_imported_job(file_hash, data_year)
+        if existing_job is not None:
+            os.remove(temp_filepath)
+            return duplicate_response(existing_job)
+        job = submit_upload(temp_filepath, ext, filename, data_year, file_hash, save_seconds,
+                            incremental=is_truthy(request.form.get("incremental")))
+    except Exception as e:
+        current_app.logger.error(f"文件处理异常: {str(e)}")
+        db.session.rollback()
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+        return jsonify({"error": f"文件处理错误: {str(e)}"}), 500
+
+    current_app.logger.debug(
+        f"DEBUG: 已创建导入任务 {job.id}，文件: {file.filename}，预估行数: {job.total_rows}")
+    return job_response(job, "文件已上传，正在后台导入。", 202)
+
+
+@import_api.route("/api/students/import/uploads", methods=["POST"])
+def create_upload():
+    """
+    创建分块上传会话
+    参数（JSON 或表单）: filename、data_year、total_size（字节数）、file_hash（可选，SHA-256）、force（可选）。
+    提供 file_hash 时：
+      - 同一文件内容与数据年份已提交过导入（且未指定 force），直接返回已有任务（HTTP 200，duplicate 为 true）；
+      - 存在同一文件未完成的上传会话时返回该会话（HTTP 200），客户端从 received_bytes 处续传。
+    否则新建会话（HTTP 201）。
+    """
+    params = request.get_json(silent=True) or request.form
+    filename = params.get("filename") or ""
+    data_year = params.get("data_year")
+    total_size = str(params.get("total_size") or "").strip()
+    file_hash = (params.get("file_hash") or "").strip().lower() or None
+
+    if not allowed_file(filename):
+        return jsonify({"error": "不支持的文件格式，请上传 .xlsx 或 .csv 文件"}), 400
+    if not data_year:
+        return jsonify({"error": "未提供数据年份"}), 400
+    if not total_size.isdigit() or int(total_size) == 0:
+        return jsonify({"error": "total_size 必须为正整数"}), 400
+    if file_hash and (len(file_hash) != 64 or any(c not in "0123456789abcdef" for c in file_hash)):
+        return jsonify({"error": "file_hash 必须为 64 位十六进制 SHA-256 哈希"}), 400
+
+    if file_hash and not is_truthy(params.get("force")):
+        existing_job = find_imported_job(file_hash, data_year)
+        if existing_job is not None:
+            return duplicate_response(existing_job)
 
-    # 增强扩展名提取
-    if '.' not in filename:
-        return jsonify({"error": "文件名缺少扩展名"}), 400
     ext = filename.rsplit('.', 1)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        return jsonify({"error": f"不支持的文件扩展名 .{ext}"}), 400
+    try:
+        session, received = create_upload_session(
+            TEMP_UPLOAD_DIR, secure_filename(filename), ext, data_year, int(total_size), file_hash)
+    except Exception as e:
+        current_app.logger.error(f"创建上传会话异常: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": f"文件处理错误: {str(e)}"}), 500
+    return jsonify(upload_session_dict(session, received)), 200 if received else 201
 
-    temp_filepath = os.path.join(
-        TEMP_UPLOAD_DIR, f"upload_{int(time.time())}.{ext}")
-    # ============== 这里结束插入代码 ==============
+
+def upload_session_dict(session, received):
+    """上传会话状态及后续请求地址"""
+    data = session.to_dict(received)
+    data["chunk_url"] = url_for("import_api.upload_chunk", upload_id=session.id)
+    data["complete_url"] = url_for("import_api.finish_upload", upload_id=session.id)
+    data["status_url"] = (url_for("import_api.get_import_job", job_id=session.job_id)
+                          if session.job_id else None)
+    return data
+
+
+@import_api.route("/api/students/import/uploads/<upload_id>", methods=["GET"])
+def get_upload(upload_id):
+    """查询上传会话状态（已接收字节数），用于断点续传"""
+    session = db.session.get(UploadSession, upload_id)
+    if session is None:
+        return jsonify({"error": "上传会话不存在"}), 404
+    return jsonify(upload_session_dict(session, received_bytes(TEMP_UPLOAD_DIR, session))), 200
+
+
+@import_api.route("/api/students/import/uploads/<upload_id>", methods=["PUT"])
+def upload_chunk(upload_id):
+    """
+    追加一个分块
+    请求体为分块的原始字节，查询参数 offset 为分块在文件中的起始字节偏移量。
+    重复发送已接收的分块返回 HTTP 200 且不重复写入；偏移量与已接收字节数不衔接时返回 HTTP 409，
+    响应中的 received_bytes 为应继续上传的偏移量。
+    """
+    session = db.session.get(UploadSession, upload_id)
+    if session is None:
+        return jsonify({"error": "上传会话不存在"}), 404
+    if session.status != "uploading":
+        return jsonify({"error": "上传已完成"}), 409
+    offset = request.args.get("offset", "").strip()
+    if not offset.isdigit():
+        return jsonify({"error": "offset 必须为非负整数"}), 400
 
     try:
-        ext = filename.rsplit('.', 1)[1].lower()
-        if ext == 'xlsx':
-            df = pd.read_excel(temp_filepath, dtype=str)
-        elif ext == 'csv':
-            df = pd.read_csv(temp_filepath, dtype=str)
-        else:
-            os.remove(temp_filepath)
-            return jsonify({"error": "不支持的文件格式"}), 400
-
-        df.columns = df.columns.str.strip()
-        current_app.logger.debug(f"DEBUG: DataFrame 列名： {list(df.columns)}")
-
-        # ============== 这里开始插入代码 ==============
-        # 增强调试日志
-        current_app.logger.debug("=== 文件解析诊断日志 ===")
-        current_app.logger.debug(f"文件类型: {ext}")
-        current_app.logger.debug(f"原始列名: {df.columns.tolist()}")
-        current_app.logger.debug(f"总行数(解析后): {len(df)}")
-        if len(df) > 0:
-            current_app.logger.debug("首行数据样例:")
-            for col, val in df.iloc[0].items():
-                current_app.logger.debug(f"  {col}: {repr(val)}")
-            current_app.logger.debug("末行数据样例:")
-            for col, val in df.iloc[-1].items():
-                current_app.logger.debug(f"  {col}: {repr(val)}")
-        else:
-            current_app.logger.warning("警告: 解析到空DataFrame")
-# ============== 这里结束插入代码 ==============
-
-        current_app.logger.debug(f"DEBUG: DataFrame 行数： {len(df)}")
-        current_app.logger.debug(
-            f"DEBUG: DataFrame 前5行数据： {df.head().to_string()}")
-
-        required_fields = ["教育ID号", "学校", "班级", "姓名", "性别"]
-        imported_count = 0
-        error_messages = []
-        failed_rows = set()
-
-        from backend.models.student_extension import StudentExtension
-
-        for index, row in df.iterrows():
-            is_valid, errors_req = validate_row(row, required_fields, index)
-            if not is_valid:
-                error_messages.extend(errors_req)
-                failed_rows.add(index)
-                continue
-
-            edu_id = row["教育ID号"].strip()
-            existing_student = Student.query.filter_by(
-                education_id=edu_id).first()
-            existing_extension = None
-            if existing_student:
-                existing_extension = StudentExtension.query.filter_by(
-                    student_id=existing_student.id, data_year=data_year).first()
-
-            if existing_student and existing_extension:
-                local_errors = []
-                success_update = partial_update_student(
-                    existing_student, existing_extension, row, index, local_errors)
-                if not success_update:
-                    error_messages.extend(local_errors)
-                    failed_rows.add(index)
-                else:
-                    # 调用单记录计算函数更新计算字段
-                    from backend.services.vision_calculation import calculate_within_year_change
-                    calc_result = calculate_within_year_change(
-                        existing_extension)
-                    for key, value in calc_result.items():
-                        setattr(existing_extension, key, value)
-                    imported_count += 1
-            else:
-                if not existing_student:
-                    try:
-                        student = Student(
-                            education_id=row["教育ID号"].strip(),
-                            school=row["学校"].strip(),
-                            class_name=row["班级"].strip(),
-                            name=row["姓名"].strip(),
-                            gender=row["性别"].strip(),
-                            id_card=row["身份证号码"].strip() if (
-                                "身份证号码" in row and not pd.isna(row["身份证号码"])) else None,
-                            birthday=pd.to_datetime(row["出生日期"]).date() if (
-                                "出生日期" in row and not pd.isna(row["出生日期"])) else None,
-                            phone=row["联系电话"].strip() if (
-                                "联系电话" in row and not pd.isna(row["联系电话"])) else None,
-                            region=row["区域"].strip() if (
-                                "区域" in row and not pd.isna(row["区域"])) else None,
-                            contact_address=row["联系地址"].strip() if (
-                                "联系地址" in row and not pd.isna(row["联系地址"])) else None,
-                            parent_name=row["家长姓名"].strip() if (
-                                "家长姓名" in row and not pd.isna(row["家长姓名"])) else None,
-                            parent_phone=row["家长电话"].strip() if (
-                                "家长电话" in row and not pd.isna(row["家长电话"])) else None
-                        )
-                        db.session.add(student)
-                        db.session.flush()  # 获取 student.id
-                    except (ValueError, SQLAlchemyError) as e:
-                        error_messages.append(
-                            f"第{index+2}行: 基本信息数据写入错误: {str(e)}")
-                        failed_rows.add(index)
-                        continue
-                else:
-                    student = existing_student
-
-                # 新建扩展信息记录（StudentExtension）
-
-                try:
-                    extension = StudentExtension(
-                        student_id=student.id,
-                        data_year=data_year,
-                        grade=row["年级"].strip() if (
-                            "年级" in row and not pd.isna(row["年级"])) else None,
-                        age=int(row["年龄"]) if (
-                            "年龄" in row and not pd.isna(row["年龄"])) else None,
-                        height=float(row["身高"]) if not pd.isna(
-                            row.get("身高")) else None,
-                        weight=float(row["体重"]) if not pd.isna(
-                            row.get("体重")) else None,
-                        diet_preference=row["饮食偏好"].strip() if (
-                            "饮食偏好" in row and not pd.isna(row["饮食偏好"])) else None,
-                        exercise_preference=row["运动偏好"].strip() if (
-                            "运动偏好" in row and not pd.isna(row["运动偏好"])) else None,
-                        health_education=row["健康教育"].strip() if (
-                            "健康教育" in row and not pd.isna(row["健康教育"])) else None,
-                        past_history=row["既往史"].strip() if (
-                            "既往史" in row and not pd.isna(row["既往史"])) else None,
-                        family_history=row["家族史"].strip() if (
-                            "家族史" in row and not pd.isna(row["家族史"])) else None,
-                        premature=row["是否早产"].strip() if (
-                            "是否早产" in row and not pd.isna(row["是否早产"])) else None,
-                        allergy=row["过敏史"].strip() if (
-                            "过敏史" in row and not pd.isna(row["过敏史"])) else None,
-                        frame_glasses=True if str(
-                            row.get("框架眼镜", "")).strip() == "是" else False,
-                        contact_lenses=True if str(
-                            row.get("隐形眼镜", "")).strip() == "是" else False,
-                        night_orthokeratology=True if str(
-                            row.get("夜戴角膜塑型镜", "")).strip() == "是" else False,
-                        guasha=True if str(
-                            row.get("刮痧", "")).strip() == "是" else False,
-                        aigiu=True if str(
-                            row.get("艾灸", "")).strip() == "是" else False,
-                        zhongyao_xunzheng=True if str(
-                            row.get("中药熏蒸", "")).strip() == "是" else False,
-                        rejiu_training=True if str(
-                            row.get("热灸训练", "")).strip() == "是" else False,
-                        xuewei_tiefu=True if str(
-                            row.get("穴位贴敷", "")).strip() == "是" else False,
-                        reci_pulse=True if str(
-                            row.get("热磁脉冲", "")).strip() == "是" else False,
-                        baoguan=True if str(
-                            row.get("拔罐", "")).strip() == "是" else False,
-                        vision_level=row.get(
-                            "视力等级", None) and float(row["视力等级"]),
-                        right_eye_naked=row.get(
-                            "右眼-裸眼视力", None) and float(row["右眼-裸眼视力"]),
-                        left_eye_naked=row.get(
-                            "左眼-裸眼视力", None) and float(row["左眼-裸眼视力"]),
-                        right_eye_corrected=row.get(
-                            "右眼-矫正视力", None) and float(row["右眼-矫正视力"]),
-                        left_eye_corrected=row.get(
-                            "左眼-矫正视力", None) and float(row["左眼-矫正视力"]),
-                        right_keratometry_K1=row.get(
-                            "右眼-角膜曲率K1", None) and float(row["右眼-角膜曲率K1"]),
-                        left_keratometry_K1=row.get(
-                            "左眼-角膜曲率K1", None) and float(row["左眼-角膜曲率K1"]),
-                        right_keratometry_K2=row.get(
-                            "右眼-角膜曲率K2", None) and float(row["右眼-角膜曲率K2"]),
-                        left_keratometry_K2=row.get(
-                            "左眼-角膜曲率K2", None) and float(row["左眼-角膜曲率K2"]),
-                        right_axial_length=row.get(
-                            "右眼-眼轴", None) and float(row["右眼-眼轴"]),
-                        left_axial_length=row.get(
-                            "左眼-眼轴", None) and float(row["左眼-眼轴"]),
-                        right_sphere=row.get(
-                            "右眼屈光-球镜", None) and float(row["右眼屈光-球镜"]),
-                        right_cylinder=row.get(
-                            "右眼屈光-柱镜", None) and float(row["右眼屈光-柱镜"]),
-                        right_axis=row.get(
-                            "右眼屈光-轴位", None) and float(row["右眼屈光-轴位"]),
-                        left_sphere=row.get(
-                            "左眼屈光-球镜", None) and float(row["左眼屈光-球镜"]),
-                        left_cylinder=row.get(
-                            "左眼屈光-柱镜", None) and float(row["左眼屈光-柱镜"]),
-                        left_axis=row.get(
-                            "左眼屈光-轴位", None) and float(row["左眼屈光-轴位"]),
-                        right_dilated_sphere=row.get(
-                            "右眼散瞳-球镜", None) and float(row["右眼散瞳-球镜"]),
-                        right_dilated_cylinder=row.get(
-                            "右眼散瞳-柱镜", None) and float(row["右眼散瞳-柱镜"]),
-                        right_dilated_axis=row.get(
-                            "右眼散瞳-轴位", None) and float(row["右眼散瞳-轴位"]),
-                        left_dilated_sphere=row.get(
-                            "左眼散瞳-球镜", None) and float(row["左眼散瞳-球镜"]),
-                        left_dilated_cylinder=row.get(
-                            "左眼散瞳-柱镜", None) and float(row["左眼散瞳-柱镜"]),
-                        left_dilated_axis=row.get(
-                            "左眼散瞳-轴位", None) and float(row["左眼散瞳-轴位"]),
-                        right_anterior_depth=row.get(
-                            "右眼-前房深度", None) and float(row["右眼-前房深度"]),
-                        left_anterior_depth=row.get(
-                            "左眼-前房深度", None) and float(row["左眼-前房深度"]),
-                        other_info=str(row["其他情况"]).strip() if (
-                            "其他情况" in row and not pd.isna(row["其他情况"])) else None,
-                        eye_fatigue=str(row["眼疲劳状况"]).strip() if (
-                            "眼疲劳状况" in row and not pd.isna(row["眼疲劳状况"])) else None,
-                        right_eye_naked_interv=row.get(
-                            "右眼-干预-裸眼视力", None) and float(row["右眼-干预-裸眼视力"]),
-                        left_eye_naked_interv=row.get(
-                            "左眼-干预-裸眼视力", None) and float(row["左眼-干预-裸眼视力"]),
-                        right_sphere_interv=row.get(
-                            "右眼屈光-干预-球镜", None) and float(row["右眼屈光-干预-球镜"]),
-                        right_cylinder_interv=row.get(
-                            "右眼屈光-干预-柱镜", None) and float(row["右眼屈光-干预-柱镜"]),
-                        right_axis_interv=row.get(
-                            "右眼屈光-干预-轴位", None) and float(row["右眼屈光-干预-轴位"]),
-                        left_sphere_interv=row.get(
-                            "左眼屈光-干预-球镜", None) and float(row["左眼屈光-干预-球镜"]),
-                        left_cylinder_interv=row.get(
-                            "左眼屈光-干预-柱镜", None) and float(row["左眼屈光-干预-柱镜"]),
-                        left_axis_interv=row.get(
-                            "左眼屈光-干预-轴位", None) and float(row["左眼屈光-干预-轴位"]),
-                        right_dilated_sphere_interv=row.get(
-                            "右眼散瞳-干预-球镜", None) and float(row["右眼散瞳-干预-球镜"]),
-                        right_dilated_cylinder_interv=row.get(
-                            "右眼散瞳-干预-柱镜", None) and float(row["右眼散瞳-干预-柱镜"]),
-                        right_dilated_axis_interv=row.get(
-                            "右眼散瞳-干预-轴位", None) and float(row["右眼散瞳-干预-轴位"]),
-                        left_dilated_sphere_interv=row.get(
-                            "左眼散瞳-干预-球镜", None) and float(row["左眼散瞳-干预-球镜"]),
-                        left_dilated_cylinder_interv=row.get(
-                            "左眼散瞳-干预-柱镜", None) and float(row["左眼散瞳-干预-柱镜"]),
-                        left_dilated_axis_interv=row.get(
-                            "左眼散瞳-干预-轴位", None) and float(row["左眼散瞳-干预-轴位"]),
-                        interv_vision_level=str(row["干预后视力等级"]).strip() if (
-                            "干预后视力等级" in row and not pd.isna(row["干预后视力等级"])) else None,
-                        left_naked_change=row.get(
-                            "左眼裸眼视力变化", None) and float(row["左眼裸眼视力变化"]),
-                        right_naked_change=row.get(
-                            "右眼裸眼视力变化", None) and float(row["右眼裸眼视力变化"]),
-                        left_sphere_change=row.get(
-                            "左眼屈光-球镜变化", None) and float(row["左眼屈光-球镜变化"]),
-                        right_sphere_change=row.get(
-                            "右眼屈光-球镜变化", None) and float(row["右眼屈光-球镜变化"]),
-                        left_cylinder_change=row.get(
-                            "左眼屈光-柱镜变化", None) and float(row["左眼屈光-柱镜变化"]),
-                        right_cylinder_change=row.get(
-                            "右眼屈光-柱镜变化", None) and float(row["右眼屈光-柱镜变化"]),
-                        left_axis_change=row.get(
-                            "左眼屈光-轴位变化", None) and float(row["左眼屈光-轴位变化"]),
-                        right_axis_change=row.get(
-                            "右眼屈光-轴位变化", None) and float(row["右眼屈光-轴位变化"]),
-                        left_interv_effect=str(row["左眼视力干预效果"]).strip() if (
-                            "左眼视力干预效果" in row and not pd.isna(row["左眼视力干预效果"])) else None,
-                        right_interv_effect=str(row["右眼视力干预效果"]).strip() if (
-                            "右眼视力干预效果" in row and not pd.isna(row["右眼视力干预效果"])) else None,
-                        left_sphere_effect=str(row["左眼球镜干预效果"]).strip() if (
-                            "左眼球镜干预效果" in row and not pd.isna(row["左眼球镜干预效果"])) else None,
-                        right_sphere_effect=str(row["右眼球镜干预效果"]).strip() if (
-                            "右眼球镜干预效果" in row and not pd.isna(row["右眼球镜干预效果"])) else None,
-                        left_cylinder_effect=str(row["左眼柱镜干预效果"]).strip() if (
-                            "左眼柱镜干预效果" in row and not pd.isna(row["左眼柱镜干预效果"])) else None,
-                        right_cylinder_effect=str(row["右眼柱镜干预效果"]).strip() if (
-                            "右眼柱镜干预效果" in row and not pd.isna(row["右眼柱镜干预效果"])) else None,
-                        # 干预时间记录
-                        interv1=pd.to_datetime(row["第1次干预"]) if (
-                            "第1次干预" in row and not pd.isna(row["第1次干预"])) else None,
-                        interv2=pd.to_datetime(row["第2次干预"]) if (
-                            "第2次干预" in row and not pd.isna(row["第2次干预"])) else None,
-                        interv3=pd.to_datetime(row["第3次干预"]) if (
-                            "第3次干预" in row and not pd.isna(row["第3次干预"])) else None,
-                        interv4=pd.to_datetime(row["第4次干预"]) if (
-                            "第4次干预" in row and not pd.isna(row["第4次干预"])) else None,
-                        interv5=pd.to_datetime(row["第5次干预"]) if (
-                            "第5次干预" in row and not pd.isna(row["第5次干预"])) else None,
-                        interv6=pd.to_datetime(row["第6次干预"]) if (
-                            "第6次干预" in row and not pd.isna(row["第6次干预"])) else None,
-                        interv7=pd.to_datetime(row["第7次干预"]) if (
-                            "第7次干预" in row and not pd.isna(row["第7次干预"])) else None,
-                        interv8=pd.to_datetime(row["第8次干预"]) if (
-                            "第8次干预" in row and not pd.isna(row["第8次干预"])) else None,
-                        interv9=pd.to_datetime(row["第9次干预"]) if (
-                            "第9次干预" in row and not pd.isna(row["第9次干预"])) else None,
-                        interv10=pd.to_datetime(row["第10次干预"]) if (
-                            "第10次干预" in row and not pd.isna(row["第10次干预"])) else None,
-                        interv11=pd.to_datetime(row["第11次干预"]) if (
-                            "第11次干预" in row and not pd.isna(row["第11次干预"])) else None,
-                        interv12=pd.to_datetime(row["第12次干预"]) if (
-                            "第12次干预" in row and not pd.isna(row["第12次干预"])) else None,
-                        interv13=pd.to_datetime(row["第13次干预"]) if (
-                            "第13次干预" in row and not pd.isna(row["第13次干预"])) else None,
-                        interv14=pd.to_datetime(row["第14次干预"]) if (
-                            "第14次干预" in row and not pd.isna(row["第14次干预"])) else None,
-                        interv15=pd.to_datetime(row["第15次干预"]) if (
-                            "第15次干预" in row and not pd.isna(row["第15次干预"])) else None,
-                        interv16=pd.to_datetime(row["第16次干预"]) if (
-                            "第16次干预" in row and not pd.isna(row["第16次干预"])) else None
-                    )
-                    # 调用单记录内计算函数对新建的扩展记录进行计算，更新计算字段
-                    from backend.services.vision_calculation import calculate_within_year_change
-                    calc_result = calculate_within_year_change(extension)
-                    for key, value in calc_result.items():
-                        setattr(extension, key, value)
-                    db.session.add(extension)
-                    imported_count += 1
-                except (ValueError, SQLAlchemyError) as e:
-                    error_messages.append(f"第{index+2}行: 扩展数据写入错误: {str(e)}")
-                    failed_rows.add(index)
+        result = append_upload_chunk(TEMP_UPLOAD_DIR, session, int(offset), request.get_data())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not result["accepted"]:
+        return jsonify({"error": "分块偏移量与已接收字节数不一致",
+                        "received_bytes": result["received_bytes"]}), 409
+    session.updated_at = datetime.now()
+    db.session.commit()
+    return jsonify({"upload_id": session.id, "received_bytes": result["received_bytes"],
+                    "total_size": session.total_size}), 200
+
+
+@import_api.route("/api/students/import/uploads/<upload_id>/complete", methods=["POST"])
+def finish_upload(upload_id):
+    """
+    完成分块上传
+    校验文件大小与内容哈希后创建后台导入任务（HTTP 202）；同一文件内容与数据年份已提交过导入时
+    直接返回已有任务（HTTP 200，duplicate 为 true）。重复调用返回本会话已创建的任务。
+    哈希校验失败时丢弃已上传内容（HTTP 400），需重新创建会话上传。
+    """
+    session = db.session.get(UploadSession, upload_id)
+    if session is None:
+        return jsonify({"error": "上传会话不存在"}), 404
+    if session.status == "completed":
+        job = db.session.get(ImportJob, session.job_id)
+        return job_response(job, "文件已上传，正在后台导入。", 200)
+
+    received = received_bytes(TEMP_UPLOAD_DIR, session)
+    if received != session.total_size:
+        return jsonify({"error": "文件尚未上传完整", "received_bytes": received,
+                        "total_size": session.total_size}), 409
+    started = time.perf_counter()
+    try:
+        filepath, file_hash = complete_upload(TEMP_UPLOAD_DIR, session)
+    except ValueError as e:
+        discard_upload(TEMP_UPLOAD_DIR, session)
+        return jsonify({"error": str(e)}), 400
 
-        try:
+    params = request.get_json(silent=True) or request.form
+    existing_job = None if is_truthy(params.get("force")) else find_imported_job(file_hash, session.data_year)
+    try:
+        session.status = "completed"
+        session.file_hash = file_hash
+        if existing_job is not None:
+            os.remove(filepath)
+            job = existing_job
+            session.job_id = job.id
             db.session.commit()
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            os.remove(temp_filepath)
-            return jsonify({"error": f"数据库提交错误: {str(e)}"}), 500
-
-        failure_row_count = len(failed_rows)
-        failures_file_url = ""
-        if failure_row_count > 0:
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            failures_filename = f"failures_{timestamp}_{filename}.xlsx"
-            failures_file_path = os.path.join(
-                FAILURE_UPLOAD_DIR, failures_filename)
-            df_failed = df.loc[list(failed_rows)].copy()
-            error_list = ["" for _ in range(len(df_failed))]
-            for i, row_idx in enumerate(df_failed.index):
-                row_tag = f"第{row_idx+2}行"
-                row_errors = [msg for msg in error_messages if row_tag in msg]
-                if row_errors:
-                    error_list[i] = "; ".join(row_errors)
-            df_failed["错误信息"] = error_list
-            writer = pd.ExcelWriter(failures_file_path, engine='xlsxwriter')
-            df_failed.to_excel(writer, index=False, sheet_name='Failures')
-            workbook = writer.book
-            worksheet = writer.sheets['Failures']
-            red_format = workbook.add_format({'font_color': 'red'})
-            error_col = df_failed.columns.get_loc("错误信息")
-            for i in range(len(df_failed)):
-                if df_failed.iloc[i, error_col]:
-                    worksheet.write(
-                        i+1, error_col, df_failed.iloc[i, error_col], red_format)
-            writer.close()
-            failures_file_url = url_for(
-                'static', filename=f'uploads/{failures_filename}', _external=True)
-
-        os.remove(temp_filepath)
-
-        result_message = f"导入成功 {imported_count} 条记录。"
-        if failure_row_count > 0:
-            result_message += f" 失败 {failure_row_count} 条记录。"
-            if failures_file_url:
-                result_message += f" 失败记录文件下载链接: {failures_file_url}"
-        return jsonify({
-            "message": result_message,
-            "imported_count": imported_count,
-            "failures_count": failure_row_count,
-            "failures_file": failures_file_url if failures_file_url else None
-        }), 200
-
+        else:
+            # 会话状态与任务记录在同一事务中提交，之后才启动后台任务
+            session.job_id = uuid.uuid4().hex
+            job = submit_upload(filepath, session.ext, session.filename, session.data_year, file_hash,
+                                time.perf_counter() - started, session.job_id,
+                                is_truthy(params.get("incremental")))
     except Exception as e:
+        current_app.logger.error(f"文件处理异常: {str(e)}")
         db.session.rollback()
-        if os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
+        if os.path.exists(filepath):
+            os.remove(filepath)
         return jsonify({"error": f"文件处理错误: {str(e)}"}), 500
+
+    if existing_job is not None:
+        return duplicate_response(existing_job)
+    return job_response(job, "文件已上传，正在后台导入。", 202)
+
+
+@import_api.route("/api/students/import/jobs/<job_id>", methods=["GET"])
+def get_import_job(job_id):
+    """
+    查询导入任务进度
+    返回任务状态、已处理行数、失败行数、吞吐量（行/秒）与预计剩余时间（秒）；
+    任务成功结束后附带导入结果说明与失败记录文件下载链接。
+    """
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({"error": "导入任务不存在"}), 404
+
+    data = job.to_dict()
+    data["failures_file"] = None
+    if job.failures_file:
+        data["failures_file"] = url_for(
+            "import_api.download_import_failures", job_id=job.id, _external=True)
+    if job.status == "succeeded":
+        message = f"导入成功 {job.imported_count} 条记录。"
+        if job.skipped_rows:
+            message += f" 内容未变化跳过 {job.skipped_rows} 条记录。"
+        if job.failed_rows > 0:
+            message += f" 失败 {job.failed_rows} 条记录。"
+            if data["failures_file"]:
+                message += f" 失败记录文件下载链接: {data['failures_file']}"
+        message += UPDATE_MODE_NOTES.get(job.update_mode, "")
+        data["message"] = message
+    return jsonify(data), 200
+
+
+@import_api.route("/api/students/import/jobs/<job_id>/failures", methods=["GET"])
+def download_import_failures(job_id):
+    """下载导入任务的失败记录表"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None or not job.failures_file:
+        return jsonify({"error": "失败记录文件不存在"}), 404
+    return send_from_directory(FAILURE_UPLOAD_DIR, job.failures_file, as_attachment=True)
+
+
+@import_api.route("/api/students/import/metrics", methods=["GET"])
+def get_import_metrics():
+    """
+    导入历史度量汇总
+    统计最近 limit 个成功的导入任务：各阶段平均耗时、吞吐量（行/秒）与耗时占比、内存峰值、
+    最近导入记录（文件大小、总耗时、吞吐量），以及各学校的导入吞吐量（按吞吐量从低到高排列）。
+    """
+    limit = request.args.get("limit", "").strip()
+    if limit and (not limit.isdigit() or int(limit) == 0):
+        return jsonify({"error": "limit 必须为正整数"}), 400
+    return jsonify(import_history_summary(int(limit) if limit else None)), 200
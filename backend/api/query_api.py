@@ -8,25 +8,49 @@
     查询接口支持通过 GET 参数过滤数据，并返回 JSON 格式的分页结果。
     此外，新增支持组合查询的功能：通过 advanced_conditions 参数传入多个查询条件，
     该参数应为 JSON 字符串，格式为数组，每个元素为一个包含 field、operator、value 的条件对象。
+    分页由数据库完成（LIMIT / OFFSET，或传入 cursor 参数时的游标分页），总记录数由单独的
+    COUNT(*) 查询得到；总记录数与分页结果按规范化的查询条件缓存，学生数据有写入提交时失效，
+    见 backend/services/query_service.py。
 使用说明：
     查询接口 URL: /api/students/query
+    文本条件: name=张三（包含）、name=张*（前缀）、education_id==E0001（精确）；
+              education_id、class_name 的普通输入恰好是已有的完整取值时自动改为精确匹配
+              （class_name=1班 不匹配 11班），判断时按索引多查找一次，规则见 backend/services/student_search.py
+    导出接口 URL: /api/students/export?columns=name,grade&format=csv（format 默认为 xlsx）
+    页码分页: /api/students/query?page=3&per_page=50
+    游标分页: /api/students/query?cursor=&per_page=50 取第一页，之后以返回的 next_cursor 作为 cursor 参数
+    列投影:   /api/students/query?fields=education_id,name,grade,age 只查询并返回这些字段
     示例调用（组合查询示例）:
       /api/students/query?advanced_conditions=[{"field":"age","operator":">=","value":10},{"field":"name","operator":"like","value":"%张%"}]
 """
 
-import io
 import datetime
+import os
+import tempfile
 import traceback
-import json
-import pandas as pd
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, Response, request, jsonify, send_file, current_app, stream_with_context
 from backend.models.student import Student
 from backend.models.student_extension import StudentExtension
 from backend.infrastructure.database import db
+from backend.field_registry import export_label_mapping
+from backend.services.condition_compiler import compile_conditions, normalize_conditions
+from backend.services.count_service import COUNT_MODES, estimate_count, exact_count
+from backend.services.export_service import export_columns, iter_csv, iter_export_rows, write_xlsx
+from backend.services.query_service import (
+    MAX_PER_PAGE, cached_result, paginate_keyset, paginate_offset, project, projection_columns,
+    without_lazy_extensions)
+from backend.services.student_search import text_filter
 from sqlalchemy import and_
 
 query_api = Blueprint("query_api", __name__)
 
+# 导出时数据库字段到中文列名的映射（由字段注册表生成）
+COLUMN_NAME_MAPPING = export_label_mapping()
+
+# 固定查询参数
+FIXED_QUERY_PARAMS = ("education_id", "school", "data_year", "grade",
+                      "class_name", "name", "gender", "id_card")
+
 
 def serialize_value(val):
     """处理日期等序列化问题"""
@@ -61,18 +85,53 @@ def record_to_dict(record):
     return {k: serialize_value(v) for k, v in combined.items()}
 
 
+def projected_row_to_dict(row, names):
+    """将投影查询的结果元组（前两列为学生ID、扩展记录ID）转换为只含所选字段的字典。"""
+    return {name: serialize_value(value) for name, value in zip(names, row[2:])}
+
+
+def query_filter_key():
+    """
+    当前请求查询条件的规范化形式，用作查询结果缓存键：
+    固定查询参数去除首尾空白并忽略空值，按固定顺序排列；advanced_conditions 取条件编译器的
+    规范化 JSON（键排序、去除多余空白），无法解析时以原字符串作为键。
+
+    返回:
+        tuple: (固定条件, 组合条件)，可哈希。
+    """
+    fixed = []
+    for name in FIXED_QUERY_PARAMS:
+        value = request.args.get(name, "").strip()
+        if value:
+            fixed.append((name, value))
+    advanced = request.args.get("advanced_conditions", "").strip()
+    if advanced:
+        try:
+            advanced = normalize_conditions(advanced)
+        except ValueError:
+            pass
+    return tuple(fixed), advanced
+
+
 def build_query():
     """
     根据请求参数构造查询对象。
 
     固定查询参数：
       - education_id, school, class_name, name, gender, id_card, data_year, grade
+      - 文本参数（education_id, school, class_name, name）按输入选择匹配方式："=值" 精确、"值*" 前缀，
+        其余为包含匹配；但 education_id、class_name 的输入是已有的完整取值时改为精确匹配
+        （为此每个参数多执行一次按索引的单条查找）
 
     同时支持组合查询参数 advanced_conditions，
     该参数为 JSON 字符串，格式为数组，每个元素为：
       {"field": "<字段名称>", "operator": "<运算符>", "value": "<比较值>"}
+    也可使用 {"and": [...]} / {"or": [...]} 条件组，格式见 backend/services/condition_compiler.py。
 
     返回构造好的 SQLAlchemy 查询对象。
+
+    异常:
+        ValueError: 组合查询条件不合法（字段不存在、运算符或值错误）。
     """
     # 获取固定查询参数
     education_id = request.args.get("education_id", "").strip()
@@ -89,15 +148,16 @@ def build_query():
         StudentExtension, Student.id == StudentExtension.student_id
     )
 
-    # 固定查询条件
+    # 固定查询条件：文本字段按输入选择精确（"=值"）、前缀（"值*"）或包含匹配，
+    # 包含匹配在全文索引可用时走 FTS5（见 backend/services/student_search.py）
     if education_id:
-        query = query.filter(Student.education_id.ilike(f"%{education_id}%"))
+        query = query.filter(text_filter(Student.education_id, education_id, db.engine))
     if school:
-        query = query.filter(Student.school.ilike(f"%{school}%"))
+        query = query.filter(text_filter(Student.school, school, db.engine))
     if class_name:
-        query = query.filter(Student.class_name.ilike(f"%{class_name}%"))
+        query = query.filter(text_filter(Student.class_name, class_name, db.engine))
     if name:
-        query = query.filter(Student.name.ilike(f"%{name}%"))
+        query = query.filter(text_filter(Student.name, name, db.engine))
     if gender:
         query = query.filter(Student.gender == gender)
     if id_card:
@@ -108,41 +168,10 @@ def build_query():
     if grade:
         filters.append(StudentExtension.grade.ilike(f"%{grade}%"))
 
-    # 新增：处理组合查询的 advanced_conditions 参数
-    advanced_conditions_str = request.args.get(
-        "advanced_conditions", "").strip()
-    if advanced_conditions_str:
-        try:
-            conditions = json.loads(advanced_conditions_str)
-            for cond in conditions:
-                field = cond.get("field")
-                operator = cond.get("operator")
-                value = cond.get("value")
-                if field and operator and value is not None:
-                    # 优先判断 Student 模型中是否有该字段，否则检查 StudentExtension
-                    if hasattr(Student, field):
-                        column = getattr(Student, field)
-                    elif hasattr(StudentExtension, field):
-                        column = getattr(StudentExtension, field)
-                    else:
-                        continue  # 如果字段不匹配则跳过
-                    # 根据运算符构建过滤条件
-                    if operator == "=":
-                        filters.append(column == value)
-                    elif operator == "like":
-                        filters.append(column.ilike(f"%{value}%"))
-                    elif operator == ">":
-                        filters.append(column > value)
-                    elif operator == "<":
-                        filters.append(column < value)
-                    elif operator == ">=":
-                        filters.append(column >= value)
-                    elif operator == "<=":
-                        filters.append(column <= value)
-                    elif operator == "!=":
-                        filters.append(column != value)
-        except Exception as e:
-            current_app.logger.error(f"解析 advanced_conditions 错误: {e}")
+    # 组合查询条件：由条件编译器按字段注册表校验并编译（结果按条件缓存），条件不合法时抛出 ValueError
+    advanced = compile_conditions(request.args.get("advanced_conditions", ""))
+    if advanced is not None:
+        filters.append(advanced)
 
     if filters:
         query = query.filter(and_(*filters))
@@ -156,33 +185,74 @@ def query_students():
     学生数据查询接口
     返回 JSON 格式数据，包括学生记录、总记录数、当前页码和每页记录数。
     支持固定查询条件和组合查询条件（advanced_conditions）。
+
+    分页参数：
+      - page / per_page：页码分页（LIMIT / OFFSET），per_page 不超过 MAX_PER_PAGE；
+      - cursor：传入该参数（第一页为空字符串）时改用游标分页，按 (学生ID, 扩展记录ID) 顺序
+        取游标之后的 per_page 条记录，返回中的 next_cursor 为下一页游标（没有下一页时为 null）。
+
+    列投影参数：
+      - fields：逗号分隔的字段名，只查询并返回这些字段（不构造 ORM 对象）；不传时返回全部字段。
+
+    总记录数参数（见 backend/services/count_service.py）：
+      - count_mode：exact（默认，精确计数并缓存）或 estimate（由行数统计估算），
+        返回中的 is_estimate 表示 total 是否为估算值。
     """
     try:
         try:
-            page = int(request.args.get("page", 1))
+            page = max(int(request.args.get("page", 1)), 1)
         except ValueError:
             page = 1
         try:
-            per_page = int(request.args.get("per_page", 10))
+            per_page = min(max(int(request.args.get("per_page", 10)), 1), MAX_PER_PAGE)
         except ValueError:
             per_page = 10
 
-        query = build_query()
-        records = query.all()
-        current_app.logger.info("查询总记录数: %d", len(records))
-
-        total = len(records)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_records = records[start:end]
-        data = [record_to_dict(rec) for rec in paginated_records]
-
-        return jsonify({
-            "students": data,
-            "total": total,
-            "page": page,
-            "per_page": per_page
-        })
+        filter_key = query_filter_key()
+        fields = request.args.get("fields", "").strip()
+        cursor = request.args.get("cursor")
+        if cursor is not None:
+            cursor = cursor.strip()
+        count_mode = request.args.get("count_mode", "exact").strip().lower()
+        if count_mode not in COUNT_MODES:
+            return jsonify({"error": f"不支持的计数方式: {count_mode}"}), 400
+        try:
+            query = build_query()
+            columns = projection_columns(fields) if fields else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        names = tuple(name for name, _ in columns) if columns else None
+
+        def load_page():
+            page_query = project(query, columns) if columns else without_lazy_extensions(query)
+            if cursor is not None:
+                records, next_cursor = paginate_keyset(page_query, cursor, per_page)
+            else:
+                records, next_cursor = paginate_offset(page_query, page, per_page), None
+            if columns:
+                return [projected_row_to_dict(rec, names) for rec in records], next_cursor
+            return [record_to_dict(rec) for rec in records], next_cursor
+
+        position = ("cursor", cursor) if cursor is not None else ("page", page)
+        try:
+            students, next_cursor = cached_result(
+                ("page", filter_key, names, position, per_page), load_page)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if count_mode == "estimate":
+            total, is_estimate = estimate_count(query, filter_key)
+            if is_estimate and cursor is None:
+                # 估算值不应少于已经取到的记录数
+                total = max(total, (page - 1) * per_page + len(students))
+        else:
+            total, is_estimate = exact_count(query, filter_key), False
+        current_app.logger.info("查询总记录数: %d%s", total, "（估算）" if is_estimate else "")
+        result = {"students": students, "total": total, "is_estimate": is_estimate,
+                  "page": page, "per_page": per_page}
+        if cursor is not None:
+            result["next_cursor"] = next_cursor
+        return jsonify(result)
     except Exception as e:
         error_msg = traceback.format_exc()
         current_app.logger.error(f"查询错误: {error_msg}")
@@ -193,112 +263,44 @@ def query_students():
 def export_students():
     """
     学生数据导出接口
-    根据查询条件生成 Excel 文件，并通过 HTTP 返回供下载。
-    如果传入参数 columns，则只导出该列配置选中的字段。
+    根据查询条件流式导出数据（见 backend/services/export_service.py），内存占用与导出记录数无关。
+    如果传入参数 columns，则只查询并导出该列配置选中的字段。
+    参数 format=csv 时以分块响应发送 CSV，默认生成 Excel 文件。
+    列名按字段注册表转换为中文标签（COLUMN_NAME_MAPPING）。
     """
+    path = None
     try:
-        query = build_query()
-        records = query.all()
-        data = [record_to_dict(rec) for rec in records]
-        if not data:
+        try:
+            columns = export_columns(request.args.get("columns", "").strip())
+            query = build_query()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if exact_count(query, query_filter_key()) == 0:
             return jsonify({"error": "没有符合条件的数据可导出"}), 404
 
-        # 定义数据库字段到中文名称的映射
-        COLUMN_NAME_MAPPING = {
-            "education_id": "教育ID号",
-            "school": "学校",
-            "class_name": "班级",
-            "name": "姓名",
-            "gender": "性别",
-            "age": "年龄",
-            "id_card": "身份证号码",
-            "birthday": "出生日期",
-            "phone": "联系电话",
-            "region": "区域",
-            "contact_address": "联系地址",
-            "parent_name": "家长姓名",
-            "parent_phone": "家长电话",
-            "data_year": "数据年份",
-            "grade": "年级",
-            "height": "身高",
-            "weight": "体重",
-            "diet_preference": "饮食偏好",
-            "exercise_preference": "运动偏好",
-            "health_education": "健康教育",
-            "past_history": "既往史",
-            "family_history": "家族史",
-            "premature": "是否早产",
-            "allergy": "过敏史",
-            "right_eye_naked": "右眼-裸眼视力",
-            "left_eye_naked": "左眼-裸眼视力",
-            "right_eye_corrected": "右眼-矫正视力",
-            "left_eye_corrected": "左眼-矫正视力",
-            "right_keratometry_K1": "右眼-角膜曲率K1",
-            "left_keratometry_K1": "左眼-角膜曲率K1",
-            "right_keratometry_K2": "右眼-角膜曲率K2",
-            "left_keratometry_K2": "左眼-角膜曲率K2",
-            "right_axial_length": "右眼-眼轴",
-            "left_axial_length": "左眼-眼轴",
-            "right_sphere": "右眼屈光-球镜",
-            "right_cylinder": "右眼屈光-柱镜",
-            "right_axis": "右眼屈光-轴位",
-            "left_sphere": "左眼屈光-球镜",
-            "left_cylinder": "左眼屈光-柱镜",
-            "left_axis": "左眼屈光-轴位",
-            "right_dilated_sphere": "右眼散瞳-球镜",
-            "right_dilated_cylinder": "右眼散瞳-柱镜",
-            "right_dilated_axis": "右眼散瞳-轴位",
-            "left_dilated_sphere": "左眼散瞳-球镜",
-            "left_dilated_cylinder": "左眼散瞳-柱镜",
-            "left_dilated_axis": "左眼散瞳-轴位",
-            "vision_level": "视力等级",
-            "right_anterior_depth": "右眼-前房深度",
-            "left_anterior_depth": "左眼-前房深度",
-            "other_info": "其他情况",
-            "eye_fatigue": "眼疲劳状况",
-            "frame_glasses": "框架眼镜",
-            "contact_lenses": "隐形眼镜",
-            "night_orthokeratology": "夜戴角膜塑型镜",
-            "guasha": "刮痧",
-            "aigiu": "艾灸",
-            "zhongyao_xunzheng": "中药熏蒸",
-            "rejiu_training": "热灸训练",
-            "xuewei_tiefu": "穴位贴敷",
-            "reci_pulse": "热磁脉冲",
-            "baoguan": "拔罐",
-            "right_eye_naked_interv": "右眼-干预-裸眼视力",
-            "left_eye_naked_interv": "左眼-干预-裸眼视力",
-            "right_sphere_interv": "右眼屈光-干预-球镜",
-            "right_cylinder_interv": "右眼屈光-干预-柱镜",
-            "right_axis_interv": "右眼屈光-干预-轴位",
-            "left_sphere_interv": "左眼屈光-干预-球镜",
-            "left_cylinder_interv": "左眼屈光-干预-柱镜",
-            "left_axis_interv": "左眼屈光-干预-轴位",
-            "right_dilated_sphere_interv": "右眼散瞳-干预-球镜",
-            "right_dilated_cylinder_interv": "右眼散瞳-干预-柱镜",
-            "right_dilated_axis_interv": "右眼散瞳-干预-轴位",
-            "left_dilated_sphere_interv": "左眼散瞳-干预-球镜",
-            "left_dilated_cylinder_interv": "左眼散瞳-干预-柱镜",
-            "left_dilated_axis_interv": "左眼散瞳-干预-轴位",
-        }
-
-        df = pd.DataFrame(data)
-        selected_columns = request.args.get("columns", None)
-        if selected_columns:
-            selected_columns = selected_columns.split(",")
-            df = df[selected_columns]
-        df.rename(columns=COLUMN_NAME_MAPPING, inplace=True)
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, index=False, sheet_name="Students")
-        output.seek(0)
+        headers = [COLUMN_NAME_MAPPING.get(name, name) for name, _ in columns]
+        rows = iter_export_rows(query, columns)
         now_str = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"students_export_{now_str}.xlsx"
-        return send_file(
-            output,
-            download_name=filename,
+        if request.args.get("format", "xlsx").strip().lower() == "csv":
+            response = Response(stream_with_context(iter_csv(rows, headers)),
+                                mimetype="text/csv; charset=utf-8")
+            response.headers["Content-Disposition"] = (
+                f"attachment; filename=students_export_{now_str}.csv")
+            return response
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        write_xlsx(rows, headers, path)
+        response = send_file(
+            path,
+            download_name=f"students_export_{now_str}.xlsx",
             as_attachment=True,
             mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
+        # 临时文件在响应发送完毕后删除
+        response.call_on_close(lambda: os.path.exists(path) and os.remove(path))
+        return response
     except Exception as e:
+        if path and os.path.exists(path):
+            os.remove(path)
         return jsonify({"error": f"导出错误: {str(e)}"}), 500
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: field_registry.py
+完整存储路径: backend/field_registry.py
+功能说明:
+    学生数据字段注册表：电子表格列名（中文标签）与数据库字段的唯一映射来源。
+    每个字段声明一次：字段名、中文标签、转换类型（对应导入转换函数）、所属模型、
+    校验规则（必填、取值范围）、是否参与导入/导出，以及在统计分析中的指标配置。
+    以下配置均由本注册表编译生成，不再分别手写：
+      - 导入：import_columns("student" / "extension") 生成列式转换计划，
+        required_labels() / range_rules() 生成校验规则，calculated_fields() 确定部分更新时不从表格补充的字段
+        （backend/services/import_service.py）；
+      - 导出：export_label_mapping() 生成数据库字段到中文列名的映射（backend/api/query_api.py）；
+      - 统计：metric_config()、boolean_fields()、complete_fields()、field_label_mapping()
+        生成 backend/constants.py 中的 METRIC_CONFIG 等常量；
+      - 字段映射表：scripts/export_mapping_table.py 由注册表输出 Markdown 表格。
+使用说明:
+    新增或修改字段时只需修改 FIELDS 列表。StudentExtension 字段的顺序即导入时的转换顺序
+    （同一行存在多个格式错误时报告第一个），调整顺序会改变报告的错误信息。
+"""
+
+# 统计分析中可选的枚举取值
+SCHOOL_OPTIONS = ["华兴小学", "苏宁红军小学", "师大附小清华小学"]
+GRADE_OPTIONS = ["一年级", "二年级", "三年级", "四年级", "五年级",
+                 "六年级", "七年级", "八年级", "九年级"]
+VISION_LEVEL_OPTIONS = ["临床前期近视", "轻度近视", "中度近视", "假性近视", "正常"]
+EFFECT_OPTIONS = ["上升", "维持", "下降"]
+
+NUMBER_RANGE = {"type": "number_range"}
+TEXT = {"type": "text"}
+
+
+def multi_select(options):
+    return {"type": "multi-select", "options": options}
+
+
+def dropdown(options):
+    return {"type": "dropdown", "options": options}
+
+
+def field(name, label, kind, model, required=False, value_range=None,
+          importable=True, exportable=True, calculated=False, metric=None):
+    """
+    声明一个字段。
+
+    参数:
+        name (str): 数据库字段名。
+        label (str): 中文标签，即上传/导出表格的列名。
+        kind (str): 转换类型（text / int / float / bool / date / datetime）。
+        model (str): 所属模型（"student" 或 "extension"）。
+        required (bool): 导入时是否为必填字段。
+        value_range (tuple): 导入时的取值范围校验 (最小值, 最大值)。
+        importable (bool): 是否从上传表格导入。
+        exportable (bool): 导出时是否使用中文标签作为列名。
+        calculated (bool): 是否为导入时计算生成的字段。
+        metric (dict): 统计分析中的指标配置（type / options），None 表示不作为指标。
+    """
+    return {
+        "name": name,
+        "label": label,
+        "type": kind,
+        "model": model,
+        "required": required,
+        "range": value_range,
+        "import": importable,
+        "export": exportable,
+        "calculated": calculated,
+        "metric": metric,
+    }
+
+
+FIELDS = [
+    # ---------- Student：基本信息（不随时间变化） ----------
+    field("education_id", "教育ID号", "text", "student", required=True, metric=TEXT),
+    field("school", "学校", "text", "student", required=True,
+          metric=multi_select(SCHOOL_OPTIONS)),
+    field("class_name", "班级", "text", "student", required=True,
+          metric=dropdown([f"{i}班" for i in range(1, 16)])),
+    field("name", "姓名", "text", "student", required=True, metric=TEXT),
+    field("gender", "性别", "text", "student", required=True,
+          metric=multi_select(["男", "女"])),
+    field("id_card", "身份证号码", "text", "student"),
+    field("birthday", "出生日期", "date", "student"),
+    field("phone", "联系电话", "text", "student"),
+    field("region", "区域", "text", "student"),
+    field("contact_address", "联系地址", "text", "student"),
+    field("parent_name", "家长姓名", "text", "student"),
+    field("parent_phone", "家长电话", "text", "student"),
+
+    # ---------- StudentExtension：随数据年份变化的信息 ----------
+    field("grade", "年级", "text", "extension", metric=multi_select(GRADE_OPTIONS)),
+    # 数据年份由上传时选择，不从表格读取
+    field("data_year", "数据年份", "text", "extension", importable=False,
+          metric=dropdown(["2023", "2024", "2025", "2026", "2027", "2028"])),
+    field("age", "年龄", "int", "extension", metric=NUMBER_RANGE),
+    field("height", "身高", "float", "extension"),
+    field("weight", "体重", "float", "extension"),
+    field("diet_preference", "饮食偏好", "text", "extension"),
+    field("exercise_preference", "运动偏好", "text", "extension"),
+    field("health_education", "健康教育", "text", "extension"),
+    field("past_history", "既往史", "text", "extension"),
+    field("family_history", "家族史", "text", "extension"),
+    field("premature", "是否早产", "text", "extension"),
+    field("allergy", "过敏史", "text", "extension"),
+    field("frame_glasses", "框架眼镜", "bool", "extension"),
+    field("contact_lenses", "隐形眼镜", "bool", "extension"),
+    field("night_orthokeratology", "夜戴角膜塑型镜", "bool", "extension"),
+    field("guasha", "刮痧", "bool", "extension"),
+    field("aigiu", "艾灸", "bool", "extension"),
+    field("zhongyao_xunzheng", "中药熏蒸", "bool", "extension"),
+    field("rejiu_training", "热灸训练", "bool", "extension"),
+    field("xuewei_tiefu", "穴位贴敷", "bool", "extension"),
+    field("reci_pulse", "热磁脉冲", "bool", "extension"),
+    field("baoguan", "拔罐", "bool", "extension"),
+    # 沿用原导入逻辑：视力等级列按数值解析（随后会被计算结果覆盖）
+    field("vision_level", "视力等级", "float", "extension", calculated=True,
+          metric=multi_select(VISION_LEVEL_OPTIONS)),
+    field("right_eye_naked", "右眼-裸眼视力", "float", "extension",
+          value_range=(0.1, 5.0), metric=NUMBER_RANGE),
+    field("left_eye_naked", "左眼-裸眼视力", "float", "extension",
+          value_range=(0.1, 5.0), metric=NUMBER_RANGE),
+    field("right_eye_corrected", "右眼-矫正视力", "float", "extension", metric=NUMBER_RANGE),
+    field("left_eye_corrected", "左眼-矫正视力", "float", "extension", metric=NUMBER_RANGE),
+    field("right_keratometry_K1", "右眼-角膜曲率K1", "float", "extension", metric=NUMBER_RANGE),
+    field("left_keratometry_K1", "左眼-角膜曲率K1", "float", "extension", metric=NUMBER_RANGE),
+    field("right_keratometry_K2", "右眼-角膜曲率K2", "float", "extension", metric=NUMBER_RANGE),
+    field("left_keratometry_K2", "左眼-角膜曲率K2", "float", "extension", metric=NUMBER_RANGE),
+    field("right_axial_length", "右眼-眼轴", "float", "extension", metric=NUMBER_RANGE),
+    field("left_axial_length", "左眼-眼轴", "float", "extension", metric=NUMBER_RANGE),
+    field("right_sphere", "右眼屈光-球镜", "float", "extension"),
+    field("right_cylinder", "右眼屈光-柱镜", "float", "extension"),
+    field("right_axis", "右眼屈光-轴位", "float", "extension"),
+    field("left_sphere", "左眼屈光-球镜", "float", "extension"),
+    field("left_cylinder", "左眼屈光-柱镜", "float", "extension"),
+    field("left_axis", "左眼屈光-轴位", "float", "extension"),
+    field("right_dilated_sphere", "右眼散瞳-球镜", "float", "extension"),
+    field("right_dilated_cylinder", "右眼散瞳-柱镜", "float", "extension"),
+    field("right_dilated_axis", "右眼散瞳-轴位", "float", "extension"),
+    field("left_dilated_sphere", "左眼散瞳-球镜", "float", "extension"),
+    field("left_dilated_cylinder", "左眼散瞳-柱镜", "float", "extension"),
+    field("left_dilated_axis", "左眼散瞳-轴位", "float", "extension"),
+    field("right_anterior_depth", "右眼-前房深度", "float", "extension"),
+    field("left_anterior_depth", "左眼-前房深度", "float", "extension"),
+    field("other_info", "其他情况", "text", "extension"),
+    field("eye_fatigue", "眼疲劳状况", "text", "extension"),
+    field("right_eye_naked_interv", "右眼-干预-裸眼视力", "float", "extension", metric=NUMBER_RANGE),
+    field("left_eye_naked_interv", "左眼-干预-裸眼视力", "float", "extension", metric=NUMBER_RANGE),
+    field("right_sphere_interv", "右眼屈光-干预-球镜", "float", "extension"),
+    field("right_cylinder_interv", "右眼屈光-干预-柱镜", "float", "extension"),
+    field("right_axis_interv", "右眼屈光-干预-轴位", "float", "extension"),
+    field("left_sphere_interv", "左眼屈光-干预-球镜", "float", "extension"),
+    field("left_cylinder_interv", "左眼屈光-干预-柱镜", "float", "extension"),
+    field("left_axis_interv", "左眼屈光-干预-轴位", "float", "extension"),
+    field("right_dilated_sphere_interv", "右眼散瞳-干预-球镜", "float", "extension"),
+    field("right_dilated_cylinder_interv", "右眼散瞳-干预-柱镜", "float", "extension"),
+    field("right_dilated_axis_interv", "右眼散瞳-干预-轴位", "float", "extension"),
+    field("left_dilated_sphere_interv", "左眼散瞳-干预-球镜", "float", "extension"),
+    field("left_dilated_cylinder_interv", "左眼散瞳-干预-柱镜", "float", "extension"),
+    field("left_dilated_axis_interv", "左眼散瞳-干预-轴位", "float", "extension"),
+    field("interv_vision_level", "干预后视力等级", "text", "extension", calculated=True,
+          metric=multi_select(VISION_LEVEL_OPTIONS)),
+    field("left_naked_change", "左眼裸眼视力变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("right_naked_change", "右眼裸眼视力变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("left_sphere_change", "左眼屈光-球镜变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("right_sphere_change", "右眼屈光-球镜变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("left_cylinder_change", "左眼屈光-柱镜变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("right_cylinder_change", "右眼屈光-柱镜变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("left_axis_change", "左眼屈光-轴位变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("right_axis_change", "右眼屈光-轴位变化", "float", "extension", calculated=True,
+          metric=NUMBER_RANGE),
+    field("left_interv_effect", "左眼视力干预效果", "text", "extension", calculated=True,
+          metric=multi_select(EFFECT_OPTIONS)),
+    field("right_interv_effect", "右眼视力干预效果", "text", "extension", calculated=True,
+          metric=multi_select(EFFECT_OPTIONS)),
+    field("left_sphere_effect", "左眼球镜干预效果", "text", "extension", calculated=True,
+          metric=multi_select(EFFECT_OPTIONS)),
+    field("right_sphere_effect", "右眼球镜干预效果", "text", "extension", calculated=True,
+          metric=multi_select(EFFECT_OPTIONS)),
+    field("left_cylinder_effect", "左眼柱镜干预效果", "text", "extension", calculated=True,
+          metric=multi_select(EFFECT_OPTIONS)),
+    field("right_cylinder_effect", "右眼柱镜干预效果", "text", "extension", calculated=True,
+          metric=multi_select(EFFECT_OPTIONS)),
+    # 轴位干预效果暂未由导入计算，仅供统计分析选择
+    field("left_axis_effect", "左眼轴位干预效果", "text", "extension", importable=False,
+          calculated=True, metric=multi_select(EFFECT_OPTIONS)),
+    field("right_axis_effect", "右眼轴位干预效果", "text", "extension", importable=False,
+          calculated=True, metric=multi_select(EFFECT_OPTIONS)),
+] + [field(f"interv{i}", f"第{i}次干预", "datetime", "extension") for i in range(1, 17)]
+
+# 统计分组中使用、但不对应数据库字段的标签
+EXTRA_LABELS = {"intervention_methods": "分组"}
+
+FIELDS_BY_NAME = {spec["name"]: spec for spec in FIELDS}
+
+
+def import_columns(model):
+    """导入转换计划：[(数据库字段, 表格列名, 转换类型), ...]，按注册顺序。"""
+    return [(spec["name"], spec["label"], spec["type"]) for spec in FIELDS
+            if spec["model"] == model and spec["import"]]
+
+
+def calculated_fields(model):
+    """导入时计算生成的字段（部分更新后重新计算，不从表格补充）。"""
+    return [spec["name"] for spec in FIELDS if spec["model"] == model and spec["calculated"]]
+
+
+def required_labels():
+    """导入时的必填列（表格列名）。"""
+    return [spec["label"] for spec in FIELDS if spec["required"]]
+
+
+def range_rules():
+    """导入时的取值范围校验：[(表格列名, 最小值, 最大值), ...]。"""
+    return [(spec["label"],) + spec["range"] for spec in FIELDS if spec["range"]]
+
+
+def export_label_mapping():
+    """导出时数据库字段到中文列名的映射。"""
+    return {spec["name"]: spec["label"] for spec in FIELDS if spec["export"]}
+
+
+def boolean_fields():
+    """布尔型（干预方式）字段列表。"""
+    return [spec["name"] for spec in FIELDS if spec["type"] == "bool"]
+
+
+def metric_config():
+    """统计分析指标配置：{字段名: {"label": 中文标签, "type": ..., ["options": [...]]}}。"""
+    return {spec["name"]: {"label": spec["label"], **spec["metric"]}
+            for spec in FIELDS if spec["metric"]}
+
+
+def complete_fields():
+    """允许组合查询的字段：全部统计指标字段与布尔型字段。"""
+    return set(metric_config()) | set(boolean_fields())
+
+
+def field_label_mapping():
+    """布尔型字段及分组标签的中文名称映射。"""
+    mapping = {name: FIELDS_BY_NAME[name]["label"] for name in boolean_fields()}
+    mapping.update(EXTRA_LABELS)
+    return mapping
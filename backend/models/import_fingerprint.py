@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: import_fingerprint.py
+完整存储路径: backend/models/import_fingerprint.py
+功能说明:
+    定义 ImportFingerprint 模型，记录每个学生（教育ID号）在每个数据年份最近一次增量导入成功写入的行指纹
+    （该行各导入列规范化取值的哈希），用于增量导入时识别内容未变化的行并直接跳过。
+    通过复合唯一约束，确保每个 education_id 与 data_year 的组合只存在一条记录。
+使用说明:
+    由 backend/services/import_service.py 在增量导入的每块导入后批量写入（INSERT ... ON CONFLICT DO UPDATE），
+    非增量导入部分更新（仅补充空字段）的行删除其指纹；
+    增量导入时按教育ID号批量预取；只在对应的扩展记录仍然存在时才据此跳过。
+"""
+
+from datetime import datetime
+
+from sqlalchemy import UniqueConstraint
+
+from backend.infrastructure.database import db
+
+
+class ImportFingerprint(db.Model):
+    __tablename__ = "import_fingerprints"
+    __table_args__ = (
+        UniqueConstraint("education_id", "data_year", name="uq_fingerprint_student_year"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    education_id = db.Column(db.String(20), nullable=False, comment="教育ID号")
+    data_year = db.Column(db.String(4), nullable=False, comment="数据年份")
+    fingerprint = db.Column(db.String(16), nullable=False, comment="行指纹（64 位哈希的十六进制）")
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.now, comment="最近导入时间")
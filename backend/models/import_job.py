@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: import_job.py
+完整存储路径: backend/models/import_job.py
+功能说明:
+    定义 ImportJob 模型，用于记录后台数据导入任务的状态与进度。
+    主要字段包括：任务状态（pending / running / succeeded / failed）、上传文件名、数据年份、
+    预估总行数、已处理行数、失败行数、成功导入条数、增量导入跳过的行数、已有记录的更新方式、失败记录文件名、错误信息、各阶段耗时、
+    上传文件内容哈希（SHA-256，用于识别重复提交的同一文件）及各时间点。
+    任务记录同时作为导入历史：记录文件大小、各阶段度量（耗时、行数、吞吐量）、内存峰值、各学校数据行数与各数据年份行数。
+使用说明:
+    由 backend/services/import_jobs.py 创建并在导入过程中逐块更新；
+    进度查询接口通过 to_dict() 返回任务状态，并附带吞吐量（行/秒）与预计剩余时间；
+    导入历史汇总见 backend/services/import_metrics.py。
+"""
+
+import json
+from datetime import datetime
+
+from backend.infrastructure.database import db
+
+
+class ImportJob(db.Model):
+    __tablename__ = "import_jobs"
+
+    id = db.Column(db.String(32), primary_key=True, comment="任务ID")
+    status = db.Column(db.String(10), nullable=False,
+                       default="pending", comment="任务状态")
+    filename = db.Column(db.String(255), nullable=True, comment="上传文件名")
+    file_hash = db.Column(db.String(64), nullable=True,
+                          index=True, comment="上传文件内容哈希（SHA-256）")
+    data_year = db.Column(db.String(4), nullable=False, comment="数据年份")
+    total_rows = db.Column(db.Integer, nullable=True, comment="总行数（导入完成前为预估值）")
+    processed_rows = db.Column(db.Integer, nullable=False,
+                               default=0, comment="已处理行数")
+    failed_rows = db.Column(db.Integer, nullable=False,
+                            default=0, comment="失败行数")
+    imported_count = db.Column(
+        db.Integer, nullable=False, default=0, comment="成功导入条数")
+    skipped_rows = db.Column(db.Integer, nullable=True, comment="增量导入时内容未变化而跳过的行数")
+    update_mode = db.Column(db.String(16), nullable=True,
+                            comment="已有记录的更新方式：fill_empty 仅补充空字段 / overwrite 覆盖有变化的字段")
+    failures_file = db.Column(db.String(255), nullable=True, comment="失败记录文件名")
+    error = db.Column(db.Text, nullable=True, comment="任务异常信息")
+    stage_timings = db.Column(
+        db.Text, nullable=True, comment="各阶段耗时（JSON，单位：秒）")
+    stage_metrics = db.Column(
+        db.Text, nullable=True, comment="各阶段度量（JSON：耗时、行数、吞吐量）")
+    file_size = db.Column(db.Integer, nullable=True, comment="上传文件字节数")
+    peak_memory_mb = db.Column(db.Float, nullable=True, comment="导入过程内存峰值（MB）")
+    schools = db.Column(db.Text, nullable=True, comment="各学校数据行数（JSON）")
+    data_years = db.Column(db.Text, nullable=True, comment="各数据年份行数（JSON，多年份数据按行或按工作表区分年份）")
+    created_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.now, comment="创建时间")
+    started_at = db.Column(db.DateTime, nullable=True, comment="开始时间")
+    finished_at = db.Column(db.DateTime, nullable=True, comment="结束时间")
+
+    def to_dict(self, now=None):
+        """
+        将任务状态转换为字典格式，便于 JSON 序列化。
+        throughput 为已处理行数 / 已用时间（行/秒）；eta_seconds 依据预估总行数与当前吞吐量估算，
+        总行数未知或任务已结束时为 None。
+        """
+        now = now or datetime.now()
+        elapsed = None
+        throughput = None
+        eta_seconds = None
+        if self.started_at:
+            elapsed = ((self.finished_at or now) - self.started_at).total_seconds()
+            if elapsed > 0 and self.processed_rows:
+                throughput = round(self.processed_rows / elapsed, 1)
+        if (self.status == "running" and throughput and self.total_rows
+                and self.total_rows > self.processed_rows):
+            eta_seconds = round(
+                (self.total_rows - self.processed_rows) / throughput, 1)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "file_hash": self.file_hash,
+            "data_year": self.data_year,
+            "total_rows": self.total_rows,
+            "processed_rows": self.processed_rows,
+            "failed_rows": self.failed_rows,
+            "imported_count": self.imported_count,
+            "skipped_rows": self.skipped_rows,
+            "update_mode": self.update_mode,
+            "data_years": json.loads(self.data_years) if self.data_years else None,
+            "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+            "throughput": throughput,
+            "eta_seconds": eta_seconds,
+            "error": self.error,
+            "stage_timings": json.loads(self.stage_timings) if self.stage_timings else None,
+            "stage_metrics": json.loads(self.stage_metrics) if self.stage_metrics else None,
+            "file_size": self.file_size,
+            "peak_memory_mb": self.peak_memory_mb,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -8,8 +8,11 @@
     主要字段包括：education_id（教育ID号，作为唯一标识，不允许为空且唯一）、school、class_name、name、gender、birthday、phone、id_card、region、contact_address、parent_name、parent_phone。
 使用说明:
     通过 SQLAlchemy ORM 对学生数据进行 CRUD 操作。数据导入模块依据 education_id 判断记录存在性。
+    各年份的扩展记录通过 student.extensions（按 data_year 为键的字典）访问。
 """
 
+from sqlalchemy.orm import attribute_keyed_dict
+
 from backend.infrastructure.database import db
 from backend.models.student_extension import StudentExtension
 
@@ -21,10 +24,10 @@ class Student(db.Model):
     # 教育ID号，设置为不允许为空且唯一
     education_id = db.Column(db.String(20), unique=True,
                              nullable=False, comment="教育ID号")
-    school = db.Column(db.String(50), nullable=True, comment="学校名称")
-    class_name = db.Column(db.String(10), nullable=True, comment="学生所在班级")
-    name = db.Column(db.String(50), nullable=True, comment="学生姓名")
-    gender = db.Column(db.String(10), nullable=True, comment="学生性别")
+    school = db.Column(db.String(50), nullable=True, index=True, comment="学校名称")
+    class_name = db.Column(db.String(10), nullable=True, index=True, comment="学生所在班级")
+    name = db.Column(db.String(50), nullable=True, index=True, comment="学生姓名")
+    gender = db.Column(db.String(10), nullable=True, index=True, comment="学生性别")
     birthday = db.Column(db.Date, nullable=True, comment="出生日期")
     phone = db.Column(db.String(15), nullable=True, comment="联系电话")
     id_card = db.Column(db.String(18), nullable=True, comment="身份证号码")
@@ -34,9 +37,11 @@ class Student(db.Model):
     parent_name = db.Column(db.String(50), nullable=True, comment="家长姓名")
     parent_phone = db.Column(db.String(15), nullable=True, comment="家长电话")
 
-    # 与扩展信息表的关系，一个学生对应一条扩展记录
-    extension = db.relationship(
-        "StudentExtension", backref="student", uselist=False)
+    # 与扩展信息表的关系：一个学生每个数据年份一条扩展记录，集合按 data_year 为键（student.extensions["2024"]）。
+    # 默认按需加载；列表场景需先用 query_service.with_extensions() 预加载（selectinload），避免逐个学生查询
+    extensions = db.relationship(
+        "StudentExtension", backref="student",
+        collection_class=attribute_keyed_dict("data_year"))
 
     def to_dict(self):
         """
@@ -18,13 +18,29 @@
 
 from datetime import datetime
 from backend.infrastructure.database import db
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
+
+# 干预方式分组使用的布尔字段（与字段注册表中的 boolean 字段一致）
+INTERVENTION_COLUMNS = (
+    "frame_glasses", "contact_lenses", "night_orthokeratology", "guasha", "aigiu",
+    "zhongyao_xunzheng", "rejiu_training", "xuewei_tiefu", "reci_pulse", "baoguan",
+)
 
 
 class StudentExtension(db.Model):
     __tablename__ = "student_extensions"
+    # 查询与统计报表的常用过滤、分组字段索引（均以 data_year 开头，报表总是按统计年份过滤）；
+    # 由迁移 b8e2f5a1c7d4 创建，修改时需同步新增迁移，并用 scripts/check_query_plans.py 检查执行计划
     __table_args__ = (
         UniqueConstraint('student_id', 'data_year', name='uq_student_year'),
+        # 按年龄段 / 性别分组统计视力等级：覆盖索引（含连接用的 student_id），统计时不回表
+        Index('ix_student_extensions_year_vision_age',
+              'data_year', 'vision_level', 'age', 'student_id'),
+        Index('ix_student_extensions_year_grade', 'data_year', 'grade'),
+        Index('ix_student_extensions_year_interv_vision', 'data_year', 'interv_vision_level'),
+        # 按干预方式组合分组统计视力等级：覆盖索引
+        Index('ix_student_extensions_year_interventions',
+              'data_year', *INTERVENTION_COLUMNS, 'vision_level', 'student_id'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: upload_session.py
+完整存储路径: backend/models/upload_session.py
+功能说明:
+    定义 UploadSession 模型，用于记录分块（可续传）上传会话。
+    主要字段包括：上传文件名、扩展名、数据年份、文件总字节数、客户端声明的文件哈希（SHA-256）、
+    会话状态（uploading / completed）及上传完成后创建的导入任务ID。
+    已接收字节数以临时分块文件的实际大小为准，不在表中单独记录，避免中断后两者不一致。
+使用说明:
+    由 backend/services/upload_sessions.py 创建与更新；上传接口通过 to_dict() 返回会话状态。
+"""
+
+from datetime import datetime
+
+from backend.infrastructure.database import db
+
+
+class UploadSession(db.Model):
+    __tablename__ = "upload_sessions"
+
+    id = db.Column(db.String(32), primary_key=True, comment="上传会话ID")
+    filename = db.Column(db.String(255), nullable=True, comment="上传文件名")
+    ext = db.Column(db.String(10), nullable=False, comment="文件扩展名")
+    data_year = db.Column(db.String(4), nullable=False, comment="数据年份")
+    total_size = db.Column(db.Integer, nullable=False, comment="文件总字节数")
+    file_hash = db.Column(db.String(64), nullable=True,
+                          index=True, comment="文件内容哈希（SHA-256）")
+    status = db.Column(db.String(10), nullable=False,
+                       default="uploading", comment="会话状态")
+    job_id = db.Column(db.String(32), nullable=True, comment="导入任务ID")
+    created_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.now, comment="创建时间")
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now,
+                           onupdate=datetime.now, comment="更新时间")
+
+    def to_dict(self, received_bytes=0):
+        """将上传会话转换为字典格式，received_bytes 为已接收字节数。"""
+        return {
+            "upload_id": self.id,
+            "filename": self.filename,
+            "data_year": self.data_year,
+            "total_size": self.total_size,
+            "received_bytes": received_bytes,
+            "file_hash": self.file_hash,
+            "status": self.status,
+            "job_id": self.job_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: condition_compiler.py
+完整存储路径: backend/services/condition_compiler.py
+功能说明:
+    组合查询条件（advanced_conditions）编译器，供数据查询接口（query_api.build_query）与统计分析
+    （analysis_api.aggregate_query_data 的筛选条件）共用。条件按字段注册表校验一次后编译为
+    SQLAlchemy 过滤表达式，编译结果按规范化的条件 JSON 缓存，相同条件再次查询时不重复解析。
+
+    条件格式：
+      - 单个条件：{"field": 字段名, "operator": 运算符, "value": 值}
+          运算符：= != > < >= <= like in not_in between is_null not_null
+          值为数组时按 IN 处理（运算符为 != 或 not_in 时为 NOT IN）；
+          值为 {"min": .., "max": ..} 时按区间处理（只填一端时以运算符与该端比较，运算符为 = 时为相等）；
+          between 的值为 [最小值, 最大值] 或 {"min": .., "max": ..}；is_null / not_null 不需要值。
+      - 条件组：{"and": [条件, ...]} 或 {"or": [条件, ...]}，可嵌套；
+      - 顶层为数组时各条件之间为“与”关系。
+    字段必须在字段注册表中（backend/field_registry.py），值按数据库列类型转换（数值、布尔、日期）；
+    字段、运算符或值不合法时抛出 ValueError，不再静默忽略。
+使用说明:
+    from backend.services.condition_compiler import compile_conditions
+    expression = compile_conditions(request.args.get("advanced_conditions", ""))
+    if expression is not None:
+        query = query.filter(expression)
+"""
+
+import datetime
+import json
+from functools import lru_cache
+
+from sqlalchemy import and_, or_, true
+
+from backend.field_registry import FIELDS_BY_NAME
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+
+# 支持的运算符
+COMPARISON_OPERATORS = {"=": "__eq__", "!=": "__ne__", ">": "__gt__", "<": "__lt__",
+                        ">=": "__ge__", "<=": "__le__"}
+OPERATORS = set(COMPARISON_OPERATORS) | {"like", "in", "not_in", "between", "is_null", "not_null"}
+NULL_OPERATORS = ("is_null", "not_null")
+
+# 编译结果缓存的条件组合个数
+COMPILE_CACHE_SIZE = 256
+
+_MODELS = {"student": Student, "extension": StudentExtension}
+_TRUE_TEXT = ("true", "1", "是", "yes")
+_FALSE_TEXT = ("false", "0", "否", "no")
+
+
+def parse_conditions(conditions):
+    """
+    解析条件参数：JSON 字符串解析为列表/字典，空字符串返回 None。
+
+    异常:
+        ValueError: JSON 格式错误。
+    """
+    if isinstance(conditions, str):
+        conditions = conditions.strip()
+        if not conditions:
+            return None
+        try:
+            conditions = json.loads(conditions)
+        except ValueError as e:
+            raise ValueError("advanced_conditions 参数格式错误") from e
+    return conditions
+
+
+def _canonical(node):
+    """规范化条件节点：与 / 或 条件组的成员按其 JSON 文本排序（成员顺序不影响结果）。"""
+    if isinstance(node, list):
+        return sorted((_canonical(child) for child in node), key=_dumps)
+    if isinstance(node, dict):
+        return {key: _canonical(value) if key in ("and", "or") else value for key, value in node.items()}
+    return node
+
+
+def _dumps(node):
+    return json.dumps(node, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def normalize_conditions(conditions):
+    """条件的规范化 JSON 文本（键排序、条件组成员排序、无多余空白），用作编译缓存与查询结果缓存的键。"""
+    return _dumps(_canonical(parse_conditions(conditions)))
+
+
+def compile_conditions(conditions):
+    """
+    编译组合查询条件。
+
+    参数:
+        conditions: JSON 字符串、条件列表或条件组字典。
+
+    返回:
+        SQLAlchemy 过滤表达式；没有条件时返回 None。
+
+    异常:
+        ValueError: 条件格式、字段、运算符或值不合法。
+    """
+    conditions = parse_conditions(conditions)
+    if conditions in (None, [], {}):
+        return None
+    return _compile_normalized(normalize_conditions(conditions))
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_normalized(normalized):
+    """按规范化 JSON 缓存的编译结果（编译失败抛出异常时不缓存）。"""
+    return compile_node(json.loads(normalized))
+
+
+def compile_node(node):
+    """编译条件节点：数组（与）、条件组（and / or）或单个条件。"""
+    if isinstance(node, list):
+        return and_(*[compile_node(child) for child in node]) if node else true()
+    if not isinstance(node, dict):
+        raise ValueError(f"无法解析的查询条件: {node}")
+    for key, combine in (("and", and_), ("or", or_)):
+        if key in node:
+            children = node[key]
+            if not isinstance(children, list) or not children:
+                raise ValueError(f"条件组 '{key}' 必须包含至少一个条件")
+            return combine(*[compile_node(child) for child in children])
+    return compile_condition(node)
+
+
+def condition_column(field):
+    """按字段注册表解析字段对应的数据库列；字段不存在时抛出 ValueError。"""
+    spec = FIELDS_BY_NAME.get(field)
+    if spec is None:
+        raise ValueError(f"字段 '{field}' 不存在")
+    return getattr(_MODELS[spec["model"]], field)
+
+
+def coerce_value(column, field, value):
+    """将条件值转换为数据库列的类型（数值、布尔、日期、文本）。"""
+    python_type = column.type.python_type
+    if isinstance(value, str):
+        value = value.strip()
+    if python_type is bool:
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() in _TRUE_TEXT:
+            return True
+        if str(value).lower() in _FALSE_TEXT:
+            return False
+        raise ValueError(f"字段 '{field}' 布尔值格式错误")
+    if python_type in (int, float):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"字段 '{field}' 数值转换错误")
+    if python_type in (datetime.date, datetime.datetime):
+        try:
+            parsed = datetime.datetime.fromisoformat(str(value))
+        except ValueError:
+            raise ValueError(f"字段 '{field}' 日期格式错误")
+        return parsed if python_type is datetime.datetime else parsed.date()
+    return str(value)
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def compile_condition(cond):
+    """
+    编译单个条件（规则见模块说明）。
+
+    参数:
+        cond (dict): {"field", "operator", "value"}。
+
+    返回:
+        SQLAlchemy 过滤表达式。
+    """
+    field = str(cond.get("field") or "").strip()
+    operator = str(cond.get("operator") or "=").strip().lower()
+    value = cond.get("value")
+    column = condition_column(field)
+    if operator not in OPERATORS:
+        raise ValueError(f"字段 '{field}' 不支持的运算符: {operator}")
+
+    if operator == "is_null":
+        return column.is_(None)
+    if operator == "not_null":
+        return column.isnot(None)
+
+    if isinstance(value, dict) or operator == "between":
+        if isinstance(value, dict):
+            low, high = value.get("min"), value.get("max")
+        elif isinstance(value, list) and len(value) == 2:
+            low, high = value
+        else:
+            raise ValueError(f"字段 '{field}' 区间条件必须包含最小值和最大值")
+        if operator == "between" and (_is_blank(low) or _is_blank(high)):
+            raise ValueError(f"字段 '{field}' 区间条件必须包含最小值和最大值")
+        if not _is_blank(low) and not _is_blank(high):
+            return column.between(coerce_value(column, field, low), coerce_value(column, field, high))
+        if _is_blank(low) and _is_blank(high):
+            raise ValueError(f"字段 '{field}' 必须输入具体数值或选择选项")
+        bound = coerce_value(column, field, high if _is_blank(low) else low)
+        if operator in COMPARISON_OPERATORS:
+            return getattr(column, COMPARISON_OPERATORS[operator])(bound)
+        return column == bound
+
+    if isinstance(value, list) or operator in ("in", "not_in"):
+        values = value if isinstance(value, list) else str(value or "").split(",")
+        values = [coerce_value(column, field, v) for v in values if not _is_blank(v)]
+        if not values:
+            raise ValueError(f"字段 '{field}' 未选择任何选项")
+        return column.notin_(values) if operator in ("not_in", "!=") else column.in_(values)
+
+    if _is_blank(value):
+        raise ValueError(f"字段 '{field}' 未填写查询值")
+    if operator == "like":
+        return column.ilike(f"%{str(value).strip()}%")
+    return getattr(column, COMPARISON_OPERATORS[operator])(coerce_value(column, field, value))
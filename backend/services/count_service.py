@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: count_service.py
+完整存储路径: backend/services/count_service.py
+功能说明:
+    查询接口总记录数的计算。对大范围筛选结果的外连接执行精确 COUNT(*) 是每次查询中最耗时的部分，
+    这里提供两种方式：
+      - 精确计数（exact_count）：COUNT(*)，按规范化的查询条件缓存，学生数据版本变化（提交了
+        students / student_extensions 的写入）时失效，见 backend/services/query_service.py；
+      - 估算计数（estimate_count）：由按 (数据年份, 学校) 分组的行数统计推算。统计信息与学校条件匹配的
+        学校名称均按数据版本缓存，学校名称由 SQL 以与查询相同的 text_filter 条件得到，
+        因此数据年份 / 学校范围内的行数与查询所用的行集合一致：
+          * 当前条件已有精确计数缓存时直接返回精确值；
+          * 只有数据年份、学校条件时，范围行数即为精确值；
+          * 范围内的记录数不超过 ESTIMATE_SAMPLE_SIZE 时直接精确计数（代价很小）；
+          * 还有其他条件时，在整个学生ID区间上均匀取 ESTIMATE_WINDOWS 个学生ID窗口作为样本
+            （合计约 ESTIMATE_SAMPLE_SIZE 条记录，按主键范围读取），以样本中满足全部条件的比例
+            乘以范围行数，结果标记为估算值。
+        估算结果带 is_estimate 标记，由调用方返回给前端。
+使用说明:
+    from backend.services.count_service import exact_count, estimate_count
+    total = exact_count(query, filter_key)
+    total, is_estimate = estimate_count(query, filter_key)
+    其中 filter_key 为 query_api.query_filter_key() 返回的规范化查询条件。
+"""
+
+import math
+
+from sqlalchemy import func, or_
+
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services.query_service import cached_result, cached_value, count_rows
+from backend.services.student_search import text_filter
+
+# 计数与行数统计的缓存有效期（秒）：数据变化时按数据版本失效，可以比分页结果缓存得更久
+COUNT_CACHE_SECONDS = 300
+
+# 估算计数的样本记录数与样本窗口个数；范围内记录数不超过样本记录数时直接精确计数
+ESTIMATE_SAMPLE_SIZE = 2000
+ESTIMATE_WINDOWS = 8
+
+# 可由行数统计直接得出的查询参数
+SCOPE_PARAMS = ("data_year", "school")
+
+COUNT_MODES = ("exact", "estimate")
+
+
+def exact_count(query, filter_key):
+    """
+    精确总记录数（按查询条件缓存，数据版本变化时失效）。
+
+    参数:
+        query: build_query() 构造的查询。
+        filter_key (tuple): 规范化的查询条件（query_filter_key()）。
+
+    返回:
+        int: 总记录数。
+    """
+    return cached_result(("count", filter_key), lambda: count_rows(query), COUNT_CACHE_SECONDS)
+
+
+def row_count_stats():
+    """
+    查询接口外连接的行数统计：((数据年份, 学校, 行数), ...)，没有扩展记录的学生数据年份为 None。
+    按数据版本缓存。
+    """
+    def compute():
+        rows = db.session.query(StudentExtension.data_year, Student.school, func.count()).select_from(
+            Student).outerjoin(StudentExtension, Student.id == StudentExtension.student_id).group_by(
+            StudentExtension.data_year, Student.school).all()
+        return tuple((data_year, school, count) for data_year, school, count in rows)
+
+    return cached_result(("row_stats",), compute, COUNT_CACHE_SECONDS)
+
+
+def matching_schools(school):
+    """满足学校查询条件的学校名称（SQL 中使用与 build_query 相同的 text_filter），按数据版本缓存。"""
+    def compute():
+        query = db.session.query(Student.school).filter(
+            text_filter(Student.school, school, db.engine)).distinct()
+        return frozenset(name for name, in query)
+
+    return cached_result(("schools", school), compute, COUNT_CACHE_SECONDS)
+
+
+def scope_row_count(data_year="", school=""):
+    """由行数统计得出数据年份 / 学校范围内的记录数（参数为空表示不限）。"""
+    schools = matching_schools(school) if school else None
+    return sum(count for year, name, count in row_count_stats()
+               if (not data_year or year == data_year) and (schools is None or name in schools))
+
+
+def scope_query(data_year="", school=""):
+    """只带数据年份 / 学校条件的查询（与 build_query 的连接方式和条件一致），用于抽样。"""
+    query = db.session.query(Student, StudentExtension).outerjoin(
+        StudentExtension, Student.id == StudentExtension.student_id)
+    if school:
+        query = query.filter(text_filter(Student.school, school, db.engine))
+    if data_year:
+        query = query.filter(StudentExtension.data_year == data_year)
+    return query
+
+
+def sample_windows(scope_total):
+    """
+    在学生ID区间上均匀分布的 ESTIMATE_WINDOWS 个ID窗口（合计约 ESTIMATE_SAMPLE_SIZE 条范围内记录）。
+
+    返回:
+        过滤条件；窗口覆盖整个ID区间（样本即全体）时返回 None。
+    """
+    low, high = db.session.query(func.min(Student.id), func.max(Student.id)).one()
+    if low is None:
+        return None
+    span = high - low + 1
+    width = math.ceil(span * ESTIMATE_SAMPLE_SIZE / scope_total / ESTIMATE_WINDOWS)
+    if width * ESTIMATE_WINDOWS >= span:
+        return None
+    step = span / ESTIMATE_WINDOWS
+    return or_(*(Student.id.between(low + int(i * step), low + int(i * step) + width - 1)
+                 for i in range(ESTIMATE_WINDOWS)))
+
+
+def estimate_count(query, filter_key):
+    """
+    估算总记录数（规则见模块说明）。
+
+    参数:
+        query: build_query() 构造的查询。
+        filter_key (tuple): 规范化的查询条件（query_filter_key()）。
+
+    返回:
+        (int, bool): (总记录数, 是否为估算值)。
+    """
+    exact = cached_value(("count", filter_key))
+    if exact is not None:
+        return exact, False
+
+    fixed, advanced = dict(filter_key[0]), filter_key[1]
+    data_year, school = fixed.get("data_year", ""), fixed.get("school", "")
+    scope_total = scope_row_count(data_year, school)
+    if set(fixed) <= set(SCOPE_PARAMS) and not advanced:
+        return scope_total, False
+    if scope_total <= ESTIMATE_SAMPLE_SIZE:
+        return exact_count(query, filter_key), False
+
+    window = sample_windows(scope_total)
+    sampled = count_rows(scope_query(data_year, school).filter(window)) if window is not None else 0
+    if not sampled:
+        # 范围内的记录集中在少数学生ID上，窗口未取到样本
+        return exact_count(query, filter_key), False
+    matched = count_rows(query.filter(window))
+    return round(scope_total * matched / sampled), True
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: export_service.py
+完整存储路径: backend/services/export_service.py
+功能说明:
+    学生数据的流式导出。导出接口（backend/api/query_api.py）不再整体取出查询结果、构造 DataFrame
+    并在内存中写出整个工作簿，而是：
+      - 导出列下推到 SQL：只查询所选字段（query_service.project），不构造 ORM 对象；
+      - 结果按 EXPORT_BATCH_SIZE 条一批从数据库游标读取（yield_per）；
+      - CSV：逐批生成文本块，作为分块响应直接发送；
+      - XLSX：xlsxwriter constant_memory 模式逐行写入临时文件，写完后发送该文件。
+    内存占用只与批大小有关，与导出的记录数无关。
+使用说明:
+    from backend.services.export_service import export_columns, iter_export_rows, iter_csv, write_xlsx
+    columns = export_columns("name,grade")               # 空字符串表示全部字段
+    rows = iter_export_rows(query, columns)
+    for chunk in iter_csv(rows, headers): ...
+    write_xlsx(rows, headers, "students.xlsx")
+"""
+
+import csv
+import datetime
+import io
+
+import xlsxwriter
+
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services.query_service import ordered, project, projection_columns
+
+# 每批从数据库读取并写出的记录数
+EXPORT_BATCH_SIZE = 2000
+
+
+def export_columns(fields):
+    """
+    导出列：fields 为逗号分隔的字段名；为空时导出学生与扩展记录的全部字段
+    （同名字段 id 只导出一次，为学生ID）。
+
+    返回:
+        list: [(字段名, 列), ...]。
+
+    异常:
+        ValueError: 字段不存在。
+    """
+    if fields:
+        return projection_columns(fields)
+    names = [column.key for column in Student.__table__.columns]
+    names += [column.key for column in StudentExtension.__table__.columns if column.key not in names]
+    return projection_columns(",".join(names))
+
+
+def export_value(value):
+    """导出单元格的值：日期转为 ISO 格式字符串，空值转为空字符串。"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value if value is not None else ""
+
+
+def iter_export_rows(query, columns, batch_size=EXPORT_BATCH_SIZE):
+    """
+    按 (学生ID, 扩展记录ID) 顺序逐行产出导出数据，数据库结果按 batch_size 条一批读取。
+
+    参数:
+        query: (Student, StudentExtension) 查询。
+        columns (list): export_columns 的返回值。
+        batch_size (int): 每批读取的记录数。
+
+    返回:
+        生成器，每项为一行导出值的列表（与 columns 顺序一致）。
+    """
+    for row in ordered(project(query, columns)).yield_per(batch_size):
+        yield [export_value(value) for value in row[2:]]
+
+
+def iter_csv(rows, headers, batch_size=EXPORT_BATCH_SIZE):
+    """
+    生成 CSV 文本块：首块为 UTF-8 BOM（便于 Excel 识别编码）与表头，之后每 batch_size 行一块。
+
+    参数:
+        rows: iter_export_rows 的返回值。
+        headers (list): 表头（中文列名）。
+        batch_size (int): 每块的行数。
+
+    返回:
+        生成器，每项为一段 CSV 文本。
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_xlsx(rows, headers, path, sheet_name="Students"):
+    """
+    以 constant_memory 模式逐行写出 XLSX 文件（已写出的行立即刷到临时文件，不保留在内存中）。
+
+    参数:
+        rows: iter_export_rows 的返回值。
+        headers (list): 表头（中文列名）。
+        path (str): 输出文件路径。
+        sheet_name (str): 工作表名称。
+
+    返回:
+        int: 写出的数据行数。
+    """
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+        worksheet.write_row(0, 0, headers, header_format)
+        row_num = 0
+        for row_num, row in enumerate(rows, start=1):
+            worksheet.write_row(row_num, 0, row)
+    finally:
+        workbook.close()
+    return row_num
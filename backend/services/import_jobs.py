@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: import_jobs.py
+完整存储路径: backend/services/import_jobs.py
+功能说明:
+    后台数据导入任务。上传接口保存文件后创建 ImportJob 记录并立即返回任务ID，
+    实际的分块导入（import_service.import_file）在本地线程池中执行：
+      - 每块提交后更新任务的已处理行数与失败行数，供进度查询接口计算吞吐量与预计剩余时间；
+      - 导入结束后生成失败记录表，记录其文件名、各阶段度量（保存文件、解析、校验、转换、计算、预取、
+        写入、提交、生成失败记录表的耗时、行数与吞吐量）、内存峰值、各学校与各数据年份的数据行数（见 import_metrics.py），
+        并删除临时上传文件；
+      - 提供解析结果缓存目录时，同一文件内容（SHA-256）再次导入直接读取缓存的解析结果（见 parsed_cache.py）；
+      - 导入过程中的异常记录在任务的 error 字段，任务状态置为 failed；
+      - 应用启动时（fail_interrupted_jobs）将上次进程退出时仍处于 pending / running 的任务置为 failed，
+        前端不会一直轮询已中断的任务。
+    线程池默认只有 1 个工作线程，多个导入任务按提交顺序依次执行，避免 SQLite 写锁竞争，
+    也避免并发导入同一批学生时相互覆盖；可通过应用配置 IMPORT_JOB_WORKERS 调整。
+使用说明:
+    from backend.services.import_jobs import submit_import_job
+    job = submit_import_job(filepath, "xlsx", "学生数据.xlsx", "2024", failures_dir)
+    job.id 即任务ID；测试或脚本中可调用 wait_import_job(job.id) 等待任务结束。
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.infrastructure.database import db
+from backend.models.import_job import ImportJob
+from backend.services.import_metrics import (
+    new_stage_metrics, record_stage, summarize_stage_metrics, track_peak)
+from backend.services.import_service import import_file, write_failures_workbook
+from backend.services.upload_reader import estimate_row_count
+
+# 导入任务线程池的默认工作线程数
+IMPORT_JOB_WORKERS = 1
+
+_executor = None
+_executor_lock = threading.Lock()
+# 已提交且尚未结束的任务的 Future，键为任务ID，供 wait_import_job 使用；任务结束时自动移除
+_futures = {}
+
+# 已有记录的更新方式（按是否增量导入）：非增量导入只补充为空的字段，
+# 增量导入以表格中的非空取值覆盖有变化的字段（见 import_service.apply_changed_field_updates）
+UPDATE_MODES = {False: "fill_empty", True: "overwrite"}
+
+# 服务重启时中断的任务的错误信息
+INTERRUPTED_ERROR = "服务重启，任务中断"
+
+
+def _get_executor(app):
+    """按应用配置惰性创建导入任务线程池（进程内共享）。"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("IMPORT_JOB_WORKERS", IMPORT_JOB_WORKERS),
+                thread_name_prefix="import-job")
+        return _executor
+
+
+def submit_import_job(filepath, ext, filename, data_year, failures_dir,
+                      chunk_size=None, workers=None, file_hash=None, save_seconds=0.0,
+                      cache_dir=None, job_id=None, incremental=False):
+    """
+    创建导入任务并提交到后台线程池。
+
+    参数:
+        filepath (str): 已保存的临时上传文件路径，任务结束后删除。
+        ext (str): 文件扩展名（"xlsx" 或 "csv"）。
+        filename (str): 上传文件名，用于展示与失败记录文件命名。
+        data_year (str): 数据年份。
+        failures_dir (str): 失败记录文件保存目录。
+        chunk_size (int): 每块行数，默认 import_service.IMPORT_CHUNK_SIZE。
+        workers (int): 校验与转换阶段的并行进程数，默认 import_service.IMPORT_WORKERS。
+        file_hash (str): 上传文件内容哈希（SHA-256），用于识别重复提交。
+        save_seconds (float): 上传接口保存文件（含计算哈希）的耗时，计入 save 阶段。
+        cache_dir (str): 解析结果缓存目录（见 parsed_cache.py），为空时不使用缓存。
+        job_id (str): 任务ID，默认随机生成；调用方需要在创建任务的同一事务中记录任务ID时预先生成。
+                      会话中尚未提交的其他修改与任务记录一同提交，随后才启动后台任务。
+        incremental (bool): 增量导入，内容未变化的行直接跳过（见 import_service.import_dataframe）。
+
+    返回:
+        ImportJob: 新建的任务记录（状态为 pending）。
+    """
+    app = current_app._get_current_object()
+    job = ImportJob(
+        id=job_id or uuid.uuid4().hex,
+        status="pending",
+        filename=filename,
+        file_hash=file_hash,
+        data_year=data_year,
+        total_rows=estimate_row_count(filepath, ext),
+        file_size=os.path.getsize(filepath),
+        processed_rows=0,
+        failed_rows=0,
+        imported_count=0,
+        update_mode=UPDATE_MODES[bool(incremental)],
+        created_at=datetime.now(),
+    )
+    db.session.add(job)
+    db.session.commit()
+    future = _get_executor(app).submit(
+        run_import_job, app, job.id, filepath, ext, failures_dir, chunk_size, workers,
+        save_seconds, cache_dir, incremental)
+    _futures[job.id] = future
+    # 任务结束即移除（已结束时立即调用），不在进程内长期保留 Future 及其结果
+    future.add_done_callback(lambda f, job_id=job.id: _futures.pop(job_id, None))
+    return job
+
+
+def wait_import_job(job_id, timeout=None):
+    """等待指定任务执行结束（仅对本进程提交的任务有效；任务已结束时立即返回）。"""
+    future = _futures.get(job_id)
+    if future is not None:
+        future.result(timeout)
+        # 完成回调可能在唤醒等待者之后才执行，此处同样移除
+        _futures.pop(job_id, None)
+
+
+def fail_interrupted_jobs():
+    """
+    将处于 pending / running 状态的任务置为 failed（应用启动时调用：任务只在提交它的进程内执行，
+    进程退出后不会继续）。
+
+    返回:
+        int: 置为失败的任务个数。
+    """
+    jobs = ImportJob.query.filter(ImportJob.status.in_(("pending", "running"))).all()
+    for job in jobs:
+        job.status = "failed"
+        job.error = INTERRUPTED_ERROR
+        job.finished_at = datetime.now()
+    db.session.commit()
+    return len(jobs)
+
+
+def run_import_job(app, job_id, filepath, ext, failures_dir, chunk_size=None, workers=None,
+                   save_seconds=0.0, cache_dir=None, incremental=False):
+    """
+    在后台线程中执行导入任务。
+
+    参数:
+        app (Flask): 应用对象，用于在工作线程中建立应用上下文。
+        job_id (str): 任务ID。
+        其余参数同 submit_import_job。
+    """
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        job.status = "running"
+        job.started_at = datetime.now()
+        data_year = job.data_year
+        filename = job.filename
+        file_hash = job.file_hash
+        db.session.commit()
+
+        def on_chunk(processed_rows, failed_rows):
+            # 每块提交后会话已清空，需重新获取任务记录
+            running_job = db.session.get(ImportJob, job_id)
+            running_job.processed_rows = processed_rows
+            running_job.failed_rows = failed_rows
+            db.session.commit()
+
+        fields = {}
+        try:
+            result = import_file(filepath, ext, data_year, chunk_size, on_chunk, workers,
+                                 cache_dir, file_hash, incremental)
+            for number, batch in enumerate(result["batches"], start=1):
+                app.logger.debug(
+                    f"DEBUG: 导入任务 {job_id} 第{number}批: {batch['rows']} 行，"
+                    f"成功 {batch['imported']}，跳过 {batch['skipped']}，失败 {batch['failed']}，"
+                    f"耗时 {batch['seconds']} 秒，{batch['rows_per_second']} 行/秒")
+            metrics = new_stage_metrics()
+            record_stage(metrics, "save", save_seconds, result["total_rows"])
+            for stage, seconds in result["timings"].items():
+                record_stage(metrics, stage, seconds, result["stage_rows"][stage])
+            fields["imported_count"] = result["imported_count"]
+            fields["skipped_rows"] = result["skipped_count"]
+            fields["processed_rows"] = result["total_rows"]
+            # 以实际读取的行数替换提交时的预估值（XLSX 可能没有维度信息，CSV 引号内换行会使预估偏大）
+            fields["total_rows"] = result["total_rows"]
+            fields["failed_rows"] = len(result["failed_rows"])
+            if result["failed_rows"]:
+                started = time.perf_counter()
+                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+                failures_filename = f"failures_{timestamp}_{filename}.xlsx"
+                write_failures_workbook(
+                    result["failed_df"], result["row_errors"],
+                    os.path.join(failures_dir, failures_filename))
+                record_stage(metrics, "report", time.perf_counter() - started,
+                             len(result["failed_rows"]))
+                fields["failures_file"] = failures_filename
+            summary = summarize_stage_metrics(metrics)
+            fields["stage_timings"] = json.dumps(
+                {stage: values["seconds"] for stage, values in summary.items()})
+            fields["stage_metrics"] = json.dumps(summary)
+            fields["peak_memory_mb"] = track_peak(result["peak_memory_mb"])
+            fields["schools"] = json.dumps(result["schools"], ensure_ascii=False)
+            fields["data_years"] = json.dumps(result["years"])
+            fields["status"] = "succeeded"
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"导入任务 {job_id} 数据库提交错误: {str(e)}")
+            fields["status"] = "failed"
+            fields["error"] = f"数据库提交错误: {str(e)}"
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"导入任务 {job_id} 文件处理错误: {str(e)}")
+            fields["status"] = "failed"
+            fields["error"] = f"文件处理错误: {str(e)}"
+        finally:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+        job = db.session.get(ImportJob, job_id)
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.finished_at = datetime.now()
+        db.session.commit()
+        db.session.remove()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: import_metrics.py
+完整存储路径: backend/services/import_metrics.py
+功能说明:
+    导入流水线的结构化度量：
+      - 各阶段（保存文件、解析、校验、转换、计算、预取、部分更新、写入、提交、生成失败记录表）的
+        耗时、处理行数与吞吐量（行/秒）；
+      - 导入过程中的内存峰值（按阶段边界采样进程常驻内存，Linux 读取 /proc，其他类 Unix 系统
+        使用 resource 模块；均不可用时为 None）；
+      - 导入历史汇总：以导入任务表（import_jobs）为历史记录，统计各阶段平均耗时与吞吐量、
+        各学校的导入吞吐量（用于发现性能回退与导入缓慢的学校）。
+使用说明:
+    import_service.import_file 返回各阶段耗时、行数与内存峰值，import_jobs.run_import_job 补充保存文件与
+    生成失败记录表两个阶段后写入导入任务记录；GET /api/students/import/metrics 返回历史汇总。
+    metrics = new_stage_metrics()
+    record_stage(metrics, "parse", seconds, rows)
+    summary = summarize_stage_metrics(metrics)
+    report = import_history_summary(limit=50)
+"""
+
+import json
+import os
+import sys
+
+from backend.models.import_job import ImportJob
+
+# 分块导入（import_service.import_file）各阶段：解析、校验、类型转换、单记录内计算、预取已有记录、
+# 逐行路径选择、批量写入（新增与部分更新）、提交
+STAGE_NAMES = ["parse", "validate", "convert", "calculate", "lookup", "apply", "flush", "commit"]
+
+# 导入任务的全部阶段：保存上传文件、分块导入各阶段、生成失败记录表
+IMPORT_STAGES = ["save"] + STAGE_NAMES + ["report"]
+
+# 汇总导入历史时默认统计的最近任务数
+HISTORY_LIMIT = 50
+
+
+def new_stage_metrics():
+    """创建空的阶段度量：{阶段: {"seconds": 0.0, "rows": 0}}。"""
+    return {stage: {"seconds": 0.0, "rows": 0} for stage in IMPORT_STAGES}
+
+
+def record_stage(metrics, stage, seconds, rows=0):
+    """累加某一阶段的耗时（秒）与处理行数。"""
+    metrics[stage]["seconds"] += seconds
+    metrics[stage]["rows"] += rows
+
+
+def summarize_stage_metrics(metrics):
+    """
+    生成可序列化的阶段度量：耗时保留 3 位小数，并计算吞吐量（行/秒，耗时为 0 时为 None）。
+
+    返回:
+        dict: {阶段: {"seconds", "rows", "rows_per_second"}}
+    """
+    summary = {}
+    for stage, values in metrics.items():
+        seconds = values["seconds"]
+        summary[stage] = {
+            "seconds": round(seconds, 3),
+            "rows": values["rows"],
+            "rows_per_second": round(values["rows"] / seconds, 1) if seconds > 0 else None,
+        }
+    return summary
+
+
+def current_rss_mb():
+    """当前进程常驻内存（MB）；无法获取时返回 None。"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # 非 Linux 时只能取得进程启动以来的峰值常驻内存（macOS 单位为字节，其余为 KB）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def track_peak(peak, sample=None):
+    """以新的采样值（默认采样当前常驻内存）更新峰值。"""
+    sample = current_rss_mb() if sample is None else sample
+    if sample is None:
+        return peak
+    return sample if peak is None else max(peak, sample)
+
+
+def import_history_summary(limit=None):
+    """
+    汇总最近已结束（成功）的导入任务的度量。
+
+    参数:
+        limit (int): 统计的最近任务数，默认 HISTORY_LIMIT。
+
+    返回:
+        dict: {
+            "imports": 参与统计的任务数,
+            "stages": {阶段: {"avg_seconds": 平均耗时, "rows_per_second": 总行数 / 总耗时, "share": 耗时占比}},
+            "peak_memory_mb": 各任务内存峰值的最大值,
+            "recent": 最近任务列表（耗时、吞吐量、内存峰值等），
+            "schools": 各学校的导入吞吐量（按吞吐量从低到高排列，导入慢的学校在前）
+        }
+    """
+    jobs = (ImportJob.query
+            .filter(ImportJob.status == "succeeded", ImportJob.stage_metrics.isnot(None))
+            .order_by(ImportJob.created_at.desc())
+            .limit(limit or HISTORY_LIMIT)
+            .all())
+
+    stage_seconds = dict.fromkeys(IMPORT_STAGES, 0.0)
+    stage_rows = dict.fromkeys(IMPORT_STAGES, 0)
+    schools = {}
+    recent = []
+    peak_memory = None
+    for job in jobs:
+        metrics = json.loads(job.stage_metrics)
+        job_seconds = 0.0
+        for stage in IMPORT_STAGES:
+            values = metrics.get(stage) or {}
+            stage_seconds[stage] += values.get("seconds", 0.0)
+            stage_rows[stage] += values.get("rows", 0)
+            job_seconds += values.get("seconds", 0.0)
+        total_rows = job.total_rows or 0
+        # 一个文件可能包含多个学校：按各学校行数占比分摊导入耗时
+        for school, rows in (json.loads(job.schools) if job.schools else {}).items():
+            entry = schools.setdefault(school, {"school": school, "imports": 0, "rows": 0, "seconds": 0.0})
+            entry["imports"] += 1
+            entry["rows"] += rows
+            if total_rows:
+                entry["seconds"] += job_seconds * rows / total_rows
+        peak_memory = track_peak(peak_memory, job.peak_memory_mb)
+        recent.append({
+            "job_id": job.id,
+            "filename": job.filename,
+            "data_year": job.data_year,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "total_rows": total_rows,
+            "failed_rows": job.failed_rows,
+            "file_size": job.file_size,
+            "seconds": round(job_seconds, 3),
+            "rows_per_second": round(total_rows / job_seconds, 1) if job_seconds > 0 else None,
+            "peak_memory_mb": job.peak_memory_mb,
+        })
+
+    total_seconds = sum(stage_seconds.values())
+    stages = {
+        stage: {
+            "avg_seconds": round(stage_seconds[stage] / len(jobs), 3) if jobs else None,
+            "rows_per_second": (round(stage_rows[stage] / stage_seconds[stage], 1)
+                                if stage_seconds[stage] > 0 else None),
+            "share": round(stage_seconds[stage] / total_seconds, 4) if total_seconds > 0 else None,
+        }
+        for stage in IMPORT_STAGES
+    }
+    school_list = []
+    for entry in schools.values():
+        seconds = entry.pop("seconds")
+        entry["rows_per_second"] = round(entry["rows"] / seconds, 1) if seconds > 0 else None
+        school_list.append(entry)
+    school_list.sort(key=lambda entry: (entry["rows_per_second"] is None, entry["rows_per_second"] or 0))
+
+    return {
+        "imports": len(jobs),
+        "stages": stages,
+        "peak_memory_mb": peak_memory,
+        "recent": recent,
+        "schools": school_list,
+    }
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: import_preview.py
+完整存储路径: backend/services/import_preview.py
+功能说明:
+    导入预览（试运行，dry_run）。对上传文件执行与正式导入相同的校验、类型转换与单记录内计算
+    （import_service.prepare_frames），但不访问数据库会话、不写入任何数据，只返回汇总统计：
+      - 预计失败行数、错误率及按错误类型的计数与示例；
+      - 列覆盖率（各列非空比例）、未识别的列、缺失的必填列；
+      - 文件内重复的教育ID号；
+      - 数值列的取值范围与均值、分类列（学校、性别、年级、视力等级等）的取值分布。
+    指定 sample_size 时，仅对从全文件中均匀抽取的 sample_size 行执行校验与转换，
+    错误率附带 95% 置信区间半宽；列覆盖率与重复ID仍基于全文件统计（只需读取，开销很小）。
+使用说明:
+    from backend.services.import_preview import preview_file
+    summary = preview_file(filepath, "xlsx", sample_size=2000)
+    说明: 是否与数据库中已有记录重复（部分更新）需访问数据库，预览不做判断；
+          基本信息转换失败的行按新增学生计入预计失败（已有学生在正式导入时不会因此失败）。
+"""
+
+import math
+import re
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from backend.field_registry import FIELDS
+from backend.services.import_service import (
+    IMPORT_CHUNK_SIZE,
+    REQUIRED_FIELDS,
+    prepare_frames,
+)
+from backend.services.parsed_cache import iter_cached_chunks
+
+# 分布统计中每个分类列保留的取值个数
+PREVIEW_TOP_VALUES = 10
+
+# 返回的错误示例条数
+PREVIEW_ERROR_EXAMPLES = 20
+
+# 参与分类分布统计的字段（均为导入后的字段值）
+CATEGORICAL_FIELDS = ["school", "gender", "grade", "class_name",
+                      "vision_level", "interv_vision_level"]
+
+# 错误信息归类：去掉行号前缀与具体取值，得到错误类型
+_ROW_PREFIX = re.compile(r"^第\d+行: ")
+_RANGE_VALUE = re.compile(r"值 \S+ 不在")
+
+
+def preview_file(filepath, ext, sample_size=None, chunk_size=None, seed=None,
+                 cache_dir=None, file_hash=None):
+    """
+    对上传文件进行试运行导入并返回汇总统计，不写入数据库。
+
+    参数:
+        filepath (str): 上传文件路径。
+        ext (str): 文件扩展名（"xlsx" 或 "csv"）。
+        sample_size (int): 抽样行数；为空或不小于文件行数时对全部行执行校验与转换。
+        chunk_size (int): 流式读取的每块行数，默认 IMPORT_CHUNK_SIZE。
+        seed (int): 抽样随机数种子，便于复现。
+        cache_dir (str): 解析结果缓存目录；与 file_hash 同时提供时读取或写入解析结果缓存，
+                         预览后正式导入同一文件时不再重复解析。
+        file_hash (str): 上传文件内容哈希（SHA-256）。
+
+    返回:
+        dict: 汇总统计，字段说明见模块说明。
+    """
+    started = time.perf_counter()
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    rng = np.random.default_rng(seed)
+
+    total_rows = 0
+    columns = []
+    non_null = Counter()
+    id_counts = Counter()
+    accumulator = _new_accumulator()
+    sample = None
+
+    for chunk in iter_cached_chunks(filepath, ext, chunk_size, cache_dir, file_hash):
+        if not columns:
+            columns = list(chunk.columns)
+        total_rows += len(chunk)
+        for column, count in chunk.notna().sum().items():
+            non_null[column] += int(count)
+        if "教育ID号" in chunk.columns:
+            id_counts.update(chunk["教育ID号"].dropna().str.strip())
+
+        if sample_size:
+            # 对每行赋予均匀随机键，保留键最小的 sample_size 行，即全文件的等概率无放回抽样
+            keyed = chunk.assign(_sample_key=rng.random(len(chunk)))
+            sample = keyed if sample is None else pd.concat([sample, keyed])
+            if len(sample) > sample_size:
+                sample = sample.nsmallest(sample_size, "_sample_key")
+        else:
+            _analyze(chunk, accumulator)
+
+    if sample is not None:
+        _analyze(sample.drop(columns="_sample_key").sort_index(), accumulator)
+
+    analyzed = accumulator["rows"]
+    failed = accumulator["failed_rows"]
+    sampled = analyzed < total_rows
+    error_rate = failed / analyzed if analyzed else 0.0
+    duplicates = {edu_id: count for edu_id, count in id_counts.items() if count > 1}
+    importable_labels = {spec["label"] for spec in FIELDS if spec["import"]}
+
+    return {
+        "dry_run": True,
+        "total_rows": total_rows,
+        "analyzed_rows": analyzed,
+        "sampled": sampled,
+        "estimated_failed_rows": round(error_rate * total_rows) if sampled else failed,
+        "error_rate": round(error_rate, 4),
+        "error_rate_margin": round(_margin_of_error(error_rate, analyzed, total_rows), 4),
+        "error_counts": dict(accumulator["error_counts"].most_common()),
+        "conversion_error_counts": dict(accumulator["conversion_error_counts"]),
+        "error_examples": accumulator["error_examples"],
+        "columns": {
+            "coverage": {column: round(non_null[column] / total_rows, 4) if total_rows else 0.0
+                         for column in columns},
+            "unknown": [column for column in columns if column not in importable_labels],
+            "missing_required": [label for label in REQUIRED_FIELDS if label not in columns],
+        },
+        "duplicates": {
+            "education_ids": len(duplicates),
+            "rows": sum(count - 1 for count in duplicates.values()),
+            "examples": dict(Counter(duplicates).most_common(PREVIEW_TOP_VALUES)),
+        },
+        "distributions": _distributions(accumulator),
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _new_accumulator():
+    return {
+        "rows": 0,
+        "failed_rows": 0,
+        "error_counts": Counter(),
+        "conversion_error_counts": {},
+        "error_examples": [],
+        "numeric": {},
+        "categorical": {},
+    }
+
+
+def _analyze(df, acc):
+    """对一段数据执行校验、转换与计算，并将统计结果累加到 acc。"""
+    frames = prepare_frames(df, acc["conversion_error_counts"])
+    validation_errors = frames["validation_errors"]
+    student_errors = frames["student_errors"]
+    extension_errors = frames["extension_errors"]
+
+    examples = acc["error_examples"]
+    for pos, index in enumerate(df.index):
+        if index in validation_errors:
+            messages = validation_errors[index]
+        elif student_errors[pos] is not None:
+            messages = [f"第{index+2}行: 基本信息数据写入错误: {student_errors[pos]}"]
+        elif extension_errors[pos] is not None:
+            messages = [f"第{index+2}行: 扩展数据写入错误: {extension_errors[pos]}"]
+        else:
+            continue
+        acc["failed_rows"] += 1
+        for message in messages:
+            acc["error_counts"][_error_type(message)] += 1
+            if len(examples) < PREVIEW_ERROR_EXAMPLES:
+                examples.append(message)
+    acc["rows"] += len(df)
+
+    values = pd.concat([frames["student_frame"], frames["extension_frame"]], axis=1)
+    for spec in FIELDS:
+        name = spec["name"]
+        # 只统计文件中提供的列与导入时计算生成的列
+        if name not in values.columns or not (spec["label"] in df.columns or spec["calculated"]):
+            continue
+        if name in CATEGORICAL_FIELDS:
+            counts = acc["categorical"].setdefault(spec["label"], Counter())
+            counts.update(values[name].dropna())
+        elif spec["type"] in ("int", "float"):
+            numbers = pd.to_numeric(values[name], errors="coerce").dropna()
+            if numbers.empty:
+                continue
+            stats = acc["numeric"].setdefault(
+                spec["label"], {"count": 0, "sum": 0.0, "min": math.inf, "max": -math.inf})
+            stats["count"] += int(numbers.size)
+            stats["sum"] += float(numbers.sum())
+            stats["min"] = min(stats["min"], float(numbers.min()))
+            stats["max"] = max(stats["max"], float(numbers.max()))
+
+
+def _error_type(message):
+    """
+    错误类型：去掉 "第N行: " 前缀及超出范围的具体取值；
+    转换错误只保留 "基本信息数据写入错误" / "扩展数据写入错误"（按列的明细见 conversion_error_counts）。
+    """
+    text = _ROW_PREFIX.sub("", message)
+    if "数据写入错误: " in text:
+        return text.split(": ", 1)[0]
+    return _RANGE_VALUE.sub("不在", text)
+
+
+def _distributions(acc):
+    numeric = {
+        label: {"count": stats["count"], "min": stats["min"], "max": stats["max"],
+                "mean": round(stats["sum"] / stats["count"], 4)}
+        for label, stats in acc["numeric"].items()
+    }
+    categorical = {
+        label: dict(counts.most_common(PREVIEW_TOP_VALUES))
+        for label, counts in acc["categorical"].items()
+    }
+    return {"numeric": numeric, "categorical": categorical}
+
+
+def _margin_of_error(rate, sample_rows, total_rows):
+    """抽样错误率的 95% 置信区间半宽（含有限总体校正）；未抽样时为 0。"""
+    if sample_rows == 0 or sample_rows >= total_rows:
+        return 0.0
+    correction = (total_rows - sample_rows) / (total_rows - 1)
+    return 1.96 * math.sqrt(rate * (1 - rate) / sample_rows * correction)
@@ -0,0 +1,1398 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: import_service.py
+完整存储路径: backend/services/import_service.py
+功能说明:
+    学生数据导入的列式处理引擎。对上传文件解析得到的 DataFrame（全部列为字符串）：
+      1. 以列为单位完成必填字段校验与裸眼视力范围校验；
+      2. 以列为单位完成类型转换（每列只对去重后的取值调用一次转换函数，再按编码映射回所有行），
+         转换计划与校验规则由字段注册表 backend/field_registry.py 生成；
+      3. 调用 calculate_within_year_change_frame 对整表一次性完成单记录内计算；
+         （1-3 为不访问数据库的纯计算阶段 prepare_frame，可按行切分后在进程池中并行执行）
+      4. 以分块 IN 查询一次性预取已有学生及其该年度扩展记录，存于内存字典；
+      5. 逐行仅做字典查找与路径选择（新增 / 部分更新），新增的 Student 与 StudentExtension
+         通过批量 INSERT 写入数据库。
+    增量导入（incremental）时按行指纹（各导入列规范化取值的哈希，按教育ID号与数据年份记录）跳过内容未变化的行，
+    内容有变化的已有记录只写入变化的字段并重新计算。
+    import_file 在此基础上按块流式读取上传文件（见 upload_reader.py），逐块导入并提交
+    （多年份数据按行的数据年份分组，逐年份导入并提交），
+    内存占用只与块大小有关，并按阶段（见 import_metrics.STAGE_NAMES）统计耗时、处理行数与内存峰值。
+    导入结果（成功条数、错误信息、失败行）与原逐行导入逻辑保持一致，错误信息仍以 "第N行" 标注。
+使用说明:
+    from backend.services.import_service import import_dataframe
+    result = import_dataframe(df, data_year)
+    db.session.commit()
+    import_dataframe 不提交事务，由调用方统一提交或回滚；
+    import_file 每导入一块即提交一次：
+    result = import_file(filepath, "xlsx", data_year)
+"""
+
+import multiprocessing
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+from sqlalchemy import (Integer, String, UniqueConstraint, and_, bindparam, case, delete, func, insert, or_,
+                        select, update)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from backend.field_registry import calculated_fields, import_columns, range_rules, required_labels
+from backend.infrastructure.database import db
+from backend.models.import_fingerprint import ImportFingerprint
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services.import_metrics import STAGE_NAMES, track_peak
+from backend.services.parsed_cache import iter_cached_chunks
+from backend.services.upload_reader import YEAR_COLUMN, YEAR_PATTERN
+from backend.services.vision_calculation import calculate_within_year_change_frame
+
+# 必填字段：教育ID号、学校、班级、姓名、性别
+REQUIRED_FIELDS = required_labels()
+
+# 预取已有记录时每条 IN 查询携带的参数个数（低于 SQLite 默认的 999 个绑定参数上限）
+LOOKUP_CHUNK_SIZE = 500
+
+# 流式导入时每块的行数（每块导入后提交一次）
+IMPORT_CHUNK_SIZE = 5000
+
+# 校验与转换阶段的默认并行进程数（1 表示在当前进程中执行）
+IMPORT_WORKERS = 1
+
+# 块行数达到该值时才分发到进程池（行数较少时进程间传输数据的开销高于并行收益）
+PARALLEL_MIN_ROWS = 2000
+
+# 取值范围校验规则：(表格列名, 最小值, 最大值)，即右眼/左眼裸眼视力 0.1-5.0
+RANGE_RULES = range_rules()
+
+# 需要进行范围校验的裸眼视力字段
+NAKED_VISION_FIELDS = [label for label, _, _ in RANGE_RULES]
+
+# 字段映射由字段注册表（backend/field_registry.py）生成：(数据库字段, 表格列名, 转换类型)
+STUDENT_COLUMNS = import_columns("student")
+
+# StudentExtension 字段映射，顺序与原逐行构造 StudentExtension 时的参数顺序一致，
+# 以保证同一行存在多个格式错误时报告的是同一个错误。
+EXTENSION_COLUMNS = import_columns("extension")
+
+
+def fill_empty_columns(model, columns):
+    """
+    部分更新（仅补充为空的字段）涉及的字段，由模型的列元数据生成：模型的全部列按定义顺序，
+    排除主键、外键、唯一键与唯一约束中的列（记录标识，不可更新）及计算字段（更新后重新计算），
+    且只保留可从上传表格导入的列。
+
+    参数:
+        model: Student 或 StudentExtension。
+        columns (list): 该模型的导入字段映射 [(数据库字段, 表格列名, 转换类型), ...]。
+
+    返回:
+        list: [(数据库字段, 表格列名, 转换类型), ...]，按模型列顺序。
+    """
+    table = model.__table__
+    excluded = set(calculated_fields("student" if model is Student else "extension"))
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            excluded.update(column.name for column in constraint.columns)
+    excluded.update(column.name for column in table.columns
+                    if column.primary_key or column.foreign_keys or column.unique)
+    mapping = {spec[0]: spec for spec in columns}
+    return [mapping[column.name] for column in table.columns
+            if column.name in mapping and column.name not in excluded]
+
+
+# 部分更新（仅补充为空的字段）的字段映射，学生字段在前、扩展字段在后，
+# 该顺序也是部分更新时逐字段转换、遇到第一个格式错误即停止的顺序（见 partial_update_student）
+FILL_EMPTY_STUDENT_COLUMNS = fill_empty_columns(Student, STUDENT_COLUMNS)
+FILL_EMPTY_EXTENSION_COLUMNS = fill_empty_columns(StudentExtension, EXTENSION_COLUMNS)
+FILL_EMPTY_COLUMNS = FILL_EMPTY_STUDENT_COLUMNS + FILL_EMPTY_EXTENSION_COLUMNS
+FILL_EMPTY_STUDENT_FIELDS = [field for field, _, _ in FILL_EMPTY_STUDENT_COLUMNS]
+FILL_EMPTY_EXTENSION_FIELDS = [field for field, _, _ in FILL_EMPTY_EXTENSION_COLUMNS]
+
+# 参与行指纹计算的表格列（字段注册表中的全部导入列，顺序固定，与上传表格中的列顺序无关）
+FINGERPRINT_LABELS = [label for _, label, _ in STUDENT_COLUMNS + EXTENSION_COLUMNS]
+
+
+def _to_date(value):
+    return pd.to_datetime(value).date()
+
+
+def _to_datetime(value):
+    ts = pd.to_datetime(value)
+    return None if pd.isna(ts) else ts.to_pydatetime()
+
+
+# 各转换类型对单个（非空）字符串取值的转换函数
+CONVERTERS = {
+    "text": lambda value: str(value).strip(),
+    "int": int,
+    "float": float,
+    "bool": lambda value: str(value).strip() == "是",
+    "date": _to_date,
+    "datetime": _to_datetime,
+}
+
+# 各转换类型在单元格为空或整列缺失时的取值
+MISSING_VALUES = {"bool": False}
+
+# 标准格式日期（如 Excel 日期单元格按字符串读出的 "2015-03-01 00:00:00"），可整批解析
+ISO_DATETIME_PATTERN = re.compile(
+    r"^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?$")
+
+
+def _parse_iso_datetimes(uniques, kind):
+    """
+    对标准格式的日期取值整批解析，返回 {下标: 转换结果}。
+    非标准格式或解析失败的取值不在结果中，由逐个转换兜底（以保持原有解析规则与错误信息）。
+    """
+    positions = [i for i, raw in enumerate(uniques)
+                 if isinstance(raw, str) and ISO_DATETIME_PATTERN.match(raw)]
+    if not positions:
+        return {}
+    parsed = pd.to_datetime(pd.Index([uniques[i] for i in positions]),
+                            format="ISO8601", errors="coerce")
+    results = {}
+    for i, ts in zip(positions, parsed):
+        if pd.isna(ts):
+            continue
+        results[i] = ts.date() if kind == "date" else ts.to_pydatetime()
+    return results
+
+
+def convert_series(series, kind):
+    """
+    对一列原始字符串数据进行类型转换。
+    先对列做因子化（去重编码），每个不同取值只调用一次转换函数，再按编码映射回所有行。
+
+    参数:
+        series (pd.Series): 原始列数据（字符串或空值）。
+        kind (str): 转换类型，取值见 CONVERTERS。
+
+    返回:
+        (values, errors): 两个与 series 等长的 object 数组；
+            values 为转换结果（空值为 None 或该类型的缺省值），
+            errors 为转换失败时的异常信息（成功为 None）。
+    """
+    converter = CONVERTERS[kind]
+    missing = MISSING_VALUES.get(kind)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # 末尾追加一个元素，供空值编码 -1 取用
+    converted = np.empty(len(uniques) + 1, dtype=object)
+    failures = np.full(len(uniques) + 1, None, dtype=object)
+    parsed = _parse_iso_datetimes(uniques, kind) if kind in ("date", "datetime") else {}
+    for i, raw in enumerate(uniques):
+        if i in parsed:
+            converted[i] = parsed[i]
+            continue
+        try:
+            converted[i] = converter(raw)
+        except ValueError as e:
+            converted[i] = None
+            failures[i] = str(e)
+    converted[-1] = missing
+    return converted[codes], failures[codes]
+
+
+def convert_frame(df, columns, error_counts=None):
+    """
+    按字段映射对整张表进行列式转换。
+
+    参数:
+        df (pd.DataFrame): 原始数据表（表格列名）。
+        columns (list): 字段映射列表，元素为 (数据库字段, 表格列名, 转换类型)。
+        error_counts (dict): 可选，传入时按表格列名累加该列转换失败的行数。
+
+    返回:
+        (values_df, first_errors):
+            values_df 为以数据库字段为列名的 DataFrame（object 类型，空值为 None）；
+            first_errors 为每行按字段顺序遇到的第一个转换错误信息（无错误为 None）。
+    """
+    data = {}
+    first_errors = np.full(len(df), None, dtype=object)
+    for field, header, kind in columns:
+        if header in df.columns:
+            values, errors = convert_series(df[header], kind)
+            failed = errors != None  # noqa: E711
+            pending = (first_errors == None) & failed  # noqa: E711
+            first_errors[pending] = errors[pending]
+            if error_counts is not None and failed.any():
+                error_counts[header] = error_counts.get(header, 0) + int(failed.sum())
+        else:
+            values = np.full(len(df), MISSING_VALUES.get(kind), dtype=object)
+        data[field] = values
+    return pd.DataFrame(data, index=df.index, dtype=object), first_errors
+
+
+def validate_frame(df, required_fields):
+    """
+    validate_row 的列式版本：对整张表进行必填字段与取值范围（RANGE_RULES）校验。
+
+    返回:
+        dict: {行索引: [错误信息, ...]}，仅包含校验失败的行；
+              同一行内错误顺序与 validate_row 一致。
+    """
+    row_labels = df.index.to_numpy()
+    row_errors = {}
+
+    def collect(mask, messages):
+        for pos in np.flatnonzero(mask):
+            row_errors.setdefault(row_labels[pos], []).append(messages[pos])
+
+    for field in required_fields:
+        if field in df.columns:
+            mask = df[field].isna().to_numpy()
+        else:
+            mask = np.ones(len(df), dtype=bool)
+        collect(mask, [f"第{label+2}行: 缺失必填字段 '{field}'" if flag else None
+                       for label, flag in zip(row_labels, mask)])
+
+    for field, low, high in RANGE_RULES:
+        if field not in df.columns:
+            continue
+        values, errors = convert_series(df[field], "float")
+        numbers = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+        bad_format = errors != None  # noqa: E711
+        out_of_range = ~bad_format & ((numbers < low) | (numbers > high))
+        messages = [None] * len(df)
+        for pos in np.flatnonzero(bad_format | out_of_range):
+            if bad_format[pos]:
+                messages[pos] = f"第{row_labels[pos]+2}行: '{field}' 格式错误"
+            else:
+                messages[pos] = (f"第{row_labels[pos]+2}行: '{field}' 值 {values[pos]} "
+                                 f"不在合理范围({low}-{high})")
+        collect(bad_format | out_of_range, messages)
+
+    if YEAR_COLUMN in df.columns:
+        years = _year_text(df[YEAR_COLUMN])
+        invalid = ((years != "") & ~years.str.fullmatch(YEAR_PATTERN.pattern)).to_numpy()
+        collect(invalid, [f"第{label+2}行: '{YEAR_COLUMN}' 格式错误" if flag else None
+                          for label, flag in zip(row_labels, invalid)])
+
+    return row_errors
+
+
+def _year_text(series):
+    """数据年份列的文本取值：去除首尾空白，空单元格为空字符串。"""
+    return series.where(series.isna(), series.astype(str)).fillna("").astype(str).str.strip()
+
+
+def row_data_years(df, default_year):
+    """
+    每行的数据年份：数据年份列（YEAR_COLUMN，或按年份命名的工作表）中的 4 位年份；
+    不含该列、单元格为空或格式错误（校验时已计入失败）时为 default_year。
+
+    返回:
+        np.ndarray: 与 df 等长的年份字符串数组。
+    """
+    if YEAR_COLUMN not in df.columns:
+        return np.full(len(df), default_year, dtype=object)
+    years = _year_text(df[YEAR_COLUMN])
+    valid = years.str.fullmatch(YEAR_PATTERN.pattern)
+    return years.where(valid, default_year).to_numpy(dtype=object)
+
+
+def validate_row(row, required_fields, row_index: int):
+    """
+    校验一行数据是否满足必填字段和基本格式要求。
+    返回 (is_valid, errors_list)
+    """
+    errors = []
+    # 必填字段：教育ID号、学校、班级、姓名、性别
+    for field in required_fields:
+        if pd.isna(row.get(field, None)):
+            errors.append(f"第{row_index+2}行: 缺失必填字段 '{field}'")
+    # 校验裸眼视力范围（右眼-裸眼视力与左眼-裸眼视力），如果提供则进行校验
+    for field in NAKED_VISION_FIELDS:
+        if not pd.isna(row.get(field, None)):
+            try:
+                value = float(row.get(field, 0))
+                if value < 0.1 or value > 5.0:
+                    errors.append(
+                        f"第{row_index+2}行: '{field}' 值 {value} 不在合理范围(0.1-5.0)")
+            except ValueError:
+                errors.append(f"第{row_index+2}行: '{field}' 格式错误")
+    # 多年份数据：数据年份列非空时须为 4 位年份
+    year = row.get(YEAR_COLUMN, None)
+    if not pd.isna(year) and str(year).strip() and not YEAR_PATTERN.match(str(year).strip()):
+        errors.append(f"第{row_index+2}行: '{YEAR_COLUMN}' 格式错误")
+    return (len(errors) == 0, errors)
+
+
+def conversion_error_message(label, kind, error):
+    """部分更新时单元格转换失败的错误信息（日期类字段附带异常信息），不含 "第N行" 前缀。"""
+    if kind in ("date", "datetime"):
+        return f"'{label}' 格式错误: {error}"
+    return f"'{label}' 数据格式错误"
+
+
+def partial_update_student(student_obj, ext_obj, row, row_index: int, errors: list) -> bool:
+    """
+    对已有记录进行部分更新：按 FILL_EMPTY_COLUMNS 的顺序（先 Student 表、后 StudentExtension 表）逐字段处理，
+    表格中非空的单元格转换后写入数据库中为空的字段（文本字段去除空格后为空也视为空），不覆盖已有数据。
+    遇到第一个转换失败的单元格时记录错误并停止，此前的字段保持已更新。
+    返回 True 表示更新成功，否则返回 False。
+    """
+    targets = [student_obj] * len(FILL_EMPTY_STUDENT_COLUMNS) + [ext_obj] * len(FILL_EMPTY_EXTENSION_COLUMNS)
+    for target, (field, label, kind) in zip(targets, FILL_EMPTY_COLUMNS):
+        row_val = row.get(label, None)
+        if pd.isna(row_val):
+            continue
+        try:
+            value = CONVERTERS[kind](row_val)
+        except ValueError as e:
+            errors.append(f"第{row_index+2}行: {conversion_error_message(label, kind, e)}")
+            return False
+        current = getattr(target, field)
+        if current is None or (isinstance(current, str) and current.strip() == ""):
+            setattr(target, field, value)
+    return True
+
+
+def prepare_frame(df, timings=None):
+    """
+    导入的纯计算阶段：列式校验、类型转换与单记录内计算，不访问数据库。
+    各行结果互不依赖，可按行拆分后在多个进程中并行执行（见 prepare_frame_parallel）。
+
+    参数:
+        df (pd.DataFrame): 解析后的上传数据（可以是其中的一段连续行）。
+        timings (dict): 可选，传入时累加 validate、convert、calculate 三个阶段的耗时（秒）。
+
+    返回:
+        dict: {
+            "validation_errors": {行索引: [错误信息, ...]},
+            "student_records": Student 字段取值字典列表（与 df 行顺序一致）,
+            "student_errors": 每行基本信息的第一个转换错误（无错误为 None）,
+            "extension_records": StudentExtension 字段取值字典列表（含计算字段）,
+            "extension_errors": 每行扩展信息的第一个转换错误（无错误为 None）
+        }
+    """
+    frames = prepare_frames(df, timings=timings)
+    started = time.perf_counter()
+    prepared = {
+        "validation_errors": frames["validation_errors"],
+        "student_records": _frame_records(frames["student_frame"]),
+        "student_errors": list(frames["student_errors"]),
+        "extension_records": _frame_records(frames["extension_frame"]),
+        "extension_errors": list(frames["extension_errors"]),
+    }
+    if timings is not None:
+        timings["convert"] = timings.get("convert", 0.0) + time.perf_counter() - started
+    return prepared
+
+
+def prepare_frames(df, conversion_error_counts=None, timings=None):
+    """
+    prepare_frame 的表格形式结果：校验错误、转换后的 Student / StudentExtension 字段表（后者含计算字段）
+    及每行第一个转换错误，供导入预览（import_preview.py）直接做列统计。
+
+    参数:
+        df (pd.DataFrame): 解析后的上传数据。
+        conversion_error_counts (dict): 可选，传入时按表格列名累加各列转换失败的行数。
+        timings (dict): 可选，传入时累加 validate、convert、calculate 三个阶段的耗时（秒）。
+
+    返回:
+        dict: {"validation_errors", "student_frame", "student_errors",
+               "extension_frame", "extension_errors"}
+    """
+    started = time.perf_counter()
+    validation_errors = validate_frame(df, REQUIRED_FIELDS)
+    validated = time.perf_counter()
+    student_frame, student_errors = convert_frame(
+        df, STUDENT_COLUMNS, conversion_error_counts)
+    extension_frame, extension_errors = convert_frame(
+        df, EXTENSION_COLUMNS, conversion_error_counts)
+    converted = time.perf_counter()
+    calc_frame = calculate_within_year_change_frame(extension_frame)
+    extension_frame[calc_frame.columns] = calc_frame
+    if timings is not None:
+        for stage, seconds in (("validate", validated - started),
+                               ("convert", converted - validated),
+                               ("calculate", time.perf_counter() - converted)):
+            timings[stage] = timings.get(stage, 0.0) + seconds
+    return {
+        "validation_errors": validation_errors,
+        "student_frame": student_frame,
+        "student_errors": student_errors,
+        "extension_frame": extension_frame,
+        "extension_errors": extension_errors,
+    }
+
+
+def _frame_records(frame):
+    """按行生成字段取值字典（结果与 frame.to_dict("records") 相同，但开销小得多）。"""
+    columns = list(frame.columns)
+    arrays = [frame[column].to_numpy() for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*arrays)]
+
+
+def _timed_prepare_frame(df):
+    """在工作进程中执行 prepare_frame，并返回各阶段耗时。"""
+    timings = {}
+    return prepare_frame(df, timings), timings
+
+
+def prepare_frame_parallel(df, executor, partitions, timings=None):
+    """
+    将 df 按行切分为 partitions 段，在进程池中并行执行 prepare_frame，再按行顺序合并结果。
+    错误信息中的 "第N行" 取自行索引，切分后保持不变。
+
+    参数:
+        df (pd.DataFrame): 解析后的上传数据。
+        executor (concurrent.futures.Executor): 进程池。
+        partitions (int): 切分段数。
+        timings (dict): 可选，传入时累加 validate、convert、calculate 三个阶段的耗时（秒）。
+                        各工作进程的阶段耗时之和按比例折算为本次调用的实际耗时（含进程间传输）。
+
+    返回:
+        dict: 与 prepare_frame 相同。
+    """
+    started = time.perf_counter()
+    bounds = np.linspace(0, len(df), partitions + 1).astype(int)
+    futures = [executor.submit(_timed_prepare_frame, df.iloc[start:stop])
+               for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    merged = {
+        "validation_errors": {},
+        "student_records": [],
+        "student_errors": [],
+        "extension_records": [],
+        "extension_errors": [],
+    }
+    part_timings = {}
+    for future in futures:
+        part, part_timing = future.result()
+        merged["validation_errors"].update(part["validation_errors"])
+        for key in ("student_records", "student_errors",
+                    "extension_records", "extension_errors"):
+            merged[key].extend(part[key])
+        for stage, seconds in part_timing.items():
+            part_timings[stage] = part_timings.get(stage, 0.0) + seconds
+    if timings is not None:
+        total = sum(part_timings.values())
+        scale = (time.perf_counter() - started) / total if total > 0 else 0.0
+        for stage, seconds in part_timings.items():
+            timings[stage] = timings.get(stage, 0.0) + seconds * scale
+    return merged
+
+
+def import_dataframe(df, data_year, lookup_chunk_size=None, executor=None, partitions=1,
+                     incremental=False, existing=None, prepared=None):
+    """
+    列式导入：校验、转换、计算均按列完成，新增与部分更新均以批量 SQL 写入。
+
+    参数:
+        df (pd.DataFrame): 解析后的上传数据（列名已去除首尾空白，取值为字符串或空值），
+                           行索引为原始数据行号（从 0 开始），用于生成 "第N行" 错误标注。
+        data_year (str): 数据年份。
+        lookup_chunk_size (int): 预取已有记录时每条 IN 查询的参数个数，默认 LOOKUP_CHUNK_SIZE。
+        executor (concurrent.futures.Executor): 可选的进程池；提供且 partitions > 1 时，
+                           校验与转换阶段按行切分后并行执行，数据库读写仍在当前进程中进行。
+        partitions (int): 并行切分段数。
+        incremental (bool): 增量导入：行指纹与该学生该年度最近一次导入时相同的行直接跳过（不校验、不写入）；
+                           内容有变化的已有记录只写入取值有变化的字段（见 apply_changed_field_updates）。
+        existing (tuple): 可选，已预取的 (students, extensions)（见 prefetch_year_records），提供时不再预取；
+                           students 中会登记本次新建的学生。
+        prepared (dict): 可选，已对 df 执行的 prepare_frame 结果（如在进程池中预先计算），提供时跳过纯计算阶段。
+
+    返回:
+        dict: {
+            "imported_count": 成功导入（新增或部分更新）的记录数,
+            "skipped_count": 增量导入时内容未变化而跳过的行数,
+            "row_errors": 按行顺序排列的失败行错误索引 {行索引: [错误信息, ...]},
+            "error_messages": 按行顺序排列的错误信息列表（由 row_errors 展开）,
+            "failed_rows": 失败行索引集合,
+            "timings": 各阶段耗时（秒）：validate（校验）、convert（类型转换）、calculate（单记录内计算）、
+                       lookup（预取已有记录）、apply（逐行路径选择）、flush（批量新增与部分更新）,
+            "stage_rows": 各阶段处理的行数（lookup 为预取的教育ID号个数，flush 为写入的行数）
+        }
+
+    说明:
+        - 同一 education_id 与 data_year 已存在时执行部分更新（仅补充空字段，见 apply_fill_empty_updates），
+          否则新增扩展记录；
+        - 同一文件中重复出现的 education_id 与原逻辑一致，后出现的行对先前新增的记录执行部分更新；
+        - 新增记录在保存点内批量写入，违反约束（如并发导入造成教育ID号重复）时只回滚相应行的保存点，
+          该行计入失败，其余行照常写入（见 insert_records）；
+        - 增量导入时内容有变化的已有记录以表格中的非空取值覆盖原值（见 apply_changed_field_updates），
+          覆盖前整行须转换成功，否则该行计入失败；
+        - 增量导入时成功导入的行记录行指纹（见 store_fingerprints），供之后的增量导入判断是否变化；
+          非增量导入不记录指纹，并删除部分更新行已记录的指纹（仅补充空字段时表格取值不一定写入）；
+        - 其他数据库写入异常（SQLAlchemyError）直接抛出，由调用方回滚。
+    """
+    imported_count = 0
+    row_errors = {}
+    timings = {}
+
+    # 行指纹：增量导入时先于校验与转换预取已记录的指纹，内容未变化的行不再进入后续阶段
+    started = time.perf_counter()
+    keys = _education_ids(df)
+    fingerprints = row_fingerprints(df)
+    duplicated = keys.duplicated(keep=False).to_numpy() & keys.notna().to_numpy()
+    skipped_count = 0
+    if incremental:
+        stored = prefetch_fingerprints(
+            keys[~duplicated].dropna().unique(), data_year, lookup_chunk_size)
+        unchanged = ~duplicated & (keys.map(stored).to_numpy() == fingerprints)
+        skipped_count = int(unchanged.sum())
+        if skipped_count:
+            df = df[~unchanged]
+            keys = keys[~unchanged]
+            fingerprints = fingerprints[~unchanged]
+            duplicated = duplicated[~unchanged]
+            if prepared is not None:
+                prepared = _select_prepared(prepared, ~unchanged, df.index)
+    timings["lookup"] = time.perf_counter() - started
+
+    if prepared is None and executor is not None and partitions > 1:
+        prepared = prepare_frame_parallel(df, executor, partitions, timings)
+    elif prepared is None:
+        prepared = prepare_frame(df, timings)
+    validation_errors = prepared["validation_errors"]
+    student_records = prepared["student_records"]
+    student_errors = prepared["student_errors"]
+    extension_records = prepared["extension_records"]
+    extension_errors = prepared["extension_errors"]
+
+    # 预取阶段：一次性批量查出本次上传涉及的已有学生及其该年度是否已有扩展记录。
+    # students / extensions 以 education_id 为键，导入过程中新建的记录也登记在内，
+    # 以便文件内重复出现的 education_id 命中先前新建的记录。
+    started = time.perf_counter()
+    valid_ids = dict.fromkeys(
+        record["education_id"] for index, record in zip(df.index, student_records)
+        if index not in validation_errors)
+    if existing is None:
+        students, extensions = prefetch_existing_records(
+            list(valid_ids), data_year, lookup_chunk_size)
+    else:
+        students, extensions = existing
+    timings["lookup"] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    # 部分更新在第一个格式错误的字段处失败（与 partial_update_student 一致）
+    fill_failures = fill_empty_failures(df, student_errors, extension_errors)
+    # 本次导入中新建（尚未写库）的学生，键为 education_id
+    pending_students = {}
+    # 待写入的新增扩展记录：(所属学生, 扩展记录)，new_rows 为对应的行索引
+    new_extensions = []
+    new_rows = []
+    # 部分更新的行：(行索引, 行位置, 所属学生, 第一个格式错误字段在 FILL_EMPTY_COLUMNS 中的位置或 None)
+    fill_rows = []
+    # 增量导入中内容有变化的已有记录：(行位置, 所属学生, 扩展记录ID)
+    changed_rows = []
+    # 文件内重复出现的 education_id：{新增该扩展记录的行索引: [其后对其部分更新的行索引, ...]}
+    merged_rows = {}
+    created_by = {}
+
+    for pos, index in enumerate(df.index):
+        if index in validation_errors:
+            row_errors[index] = validation_errors[index]
+            continue
+
+        edu_id = student_records[pos]["education_id"]
+        student = students.get(edu_id)
+
+        if student is not None and edu_id in extensions:
+            if pos in fill_failures:
+                failed_at, message = fill_failures[pos]
+                row_errors[index] = [f"第{index+2}行: {message}"]
+                fill_rows.append((index, pos, student, failed_at))
+                continue
+            if incremental and not duplicated[pos]:
+                # 覆盖写入前要求整行转换成功（含计算字段列），否则计入失败，不以转换失败的空值覆盖原值
+                if student_errors[pos] is not None:
+                    row_errors[index] = [
+                        f"第{index+2}行: 基本信息数据写入错误: {student_errors[pos]}"]
+                    continue
+                if extension_errors[pos] is not None:
+                    row_errors[index] = [
+                        f"第{index+2}行: 扩展数据写入错误: {extension_errors[pos]}"]
+                    continue
+                changed_rows.append((pos, student, extensions[edu_id]))
+                imported_count += 1
+                continue
+            fill_rows.append((index, pos, student, None))
+            if edu_id in created_by:
+                merged_rows.setdefault(created_by[edu_id], []).append(index)
+            imported_count += 1
+            continue
+
+        if student is None:
+            if student_errors[pos] is not None:
+                row_errors[index] = [
+                    f"第{index+2}行: 基本信息数据写入错误: {student_errors[pos]}"]
+                continue
+            student = SimpleNamespace(**student_records[pos])
+            students[edu_id] = student
+            pending_students[edu_id] = student
+
+        if extension_errors[pos] is not None:
+            row_errors[index] = [
+                f"第{index+2}行: 扩展数据写入错误: {extension_errors[pos]}"]
+            continue
+        extensions[edu_id] = True
+        new_extensions.append((student, SimpleNamespace(**extension_records[pos])))
+        new_rows.append(index)
+        created_by[edu_id] = index
+        imported_count += 1
+    timings["apply"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    insert_errors = insert_records(pending_students, new_extensions, new_rows, data_year)
+    for index in list(insert_errors):
+        for merged in merged_rows.get(index, []):
+            insert_errors[merged] = f"第{merged+2}行: 数据写入错误: 同一教育ID号的第{index+2}行写入失败"
+    if insert_errors:
+        imported_count -= len(insert_errors)
+        row_errors.update((index, [message]) for index, message in insert_errors.items())
+        row_errors = dict(sorted(row_errors.items()))
+
+    fill_updates = [(pos, student, failed) for index, pos, student, failed in fill_rows
+                    if index not in insert_errors and hasattr(student, "id")]
+    apply_fill_empty_updates(
+        fill_updates, df, student_records, extension_records, data_year, lookup_chunk_size)
+    apply_changed_field_updates(
+        changed_rows, df, student_records, extension_records, data_year, lookup_chunk_size)
+    if incremental:
+        store_fingerprints(keys, fingerprints, duplicated, row_errors, data_year, lookup_chunk_size)
+    else:
+        # 仅补充空字段的部分更新不覆盖已有取值，表格内容可能并未写入，删除这些行已记录的指纹
+        forget_fingerprints(
+            set(keys[duplicated]) | {keys[index] for index, _, _, _ in fill_rows},
+            data_year, lookup_chunk_size)
+    timings["flush"] = time.perf_counter() - started
+
+    return {
+        "imported_count": imported_count,
+        "skipped_count": skipped_count,
+        "row_errors": row_errors,
+        "error_messages": [message for messages in row_errors.values() for message in messages],
+        "failed_rows": set(row_errors),
+        "timings": timings,
+        "stage_rows": {
+            "validate": len(df),
+            "convert": len(df),
+            "calculate": len(df),
+            "lookup": len(valid_ids) + skipped_count,
+            "apply": len(df) - len(validation_errors),
+            "flush": (sum(index not in insert_errors for index in new_rows)
+                      + len(fill_updates) + len(changed_rows)),
+        },
+    }
+
+
+def _select_prepared(prepared, keep, index):
+    """按行掩码选取 prepare_frame 结果中的部分行（index 为选取后的行索引）。"""
+    kept = set(index)
+    selected = {"validation_errors": {row: errors for row, errors in prepared["validation_errors"].items()
+                                      if row in kept}}
+    for key in ("student_records", "student_errors", "extension_records", "extension_errors"):
+        selected[key] = [value for value, flag in zip(prepared[key], keep) if flag]
+    return selected
+
+
+def fill_empty_failures(df, student_errors, extension_errors):
+    """
+    部分更新的格式错误：按 FILL_EMPTY_COLUMNS 的顺序找出每行第一个转换失败的单元格。
+    只检查列式转换时已出现错误的行（其余行的全部字段均已转换成功），逐个单元格转换，与 partial_update_student 一致。
+
+    返回:
+        dict: {行位置: (该字段在 FILL_EMPTY_COLUMNS 中的位置, 错误信息（不含 "第N行" 前缀）)}，
+              错误只出现在不参与部分更新的字段（如计算字段）的行不在其中。
+    """
+    failures = {}
+    columns = [(position, df.columns.get_loc(label), label, kind)
+               for position, (_, label, kind) in enumerate(FILL_EMPTY_COLUMNS) if label in df.columns]
+    for pos, (student_error, extension_error) in enumerate(zip(student_errors, extension_errors)):
+        if student_error is None and extension_error is None:
+            continue
+        for position, column, label, kind in columns:
+            value = df.iat[pos, column]
+            if pd.isna(value):
+                continue
+            try:
+                CONVERTERS[kind](value)
+            except ValueError as e:
+                failures[pos] = (position, conversion_error_message(label, kind, e))
+                break
+    return failures
+
+
+def _education_ids(df):
+    """各行的教育ID号（去除首尾空白，与转换后写入数据库的取值一致；列不存在或为空时为 None）。"""
+    if "教育ID号" not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    return df["教育ID号"].str.strip().replace("", None)
+
+
+def row_fingerprints(df):
+    """
+    行指纹：各导入列（FINGERPRINT_LABELS）取值去除首尾空白、空值记为空字符串后，
+    按行计算的 64 位哈希（pd.util.hash_pandas_object），以 16 位十六进制字符串表示。
+    表格中没有的列按空值计算，因此只增减无关列或调整列顺序不影响指纹。
+
+    返回:
+        np.ndarray: 与 df 行顺序一致的指纹数组（object 类型）。
+    """
+    frame = df.loc[:, ~df.columns.duplicated()].reindex(columns=FINGERPRINT_LABELS)
+    frame = frame.fillna("").astype(str).apply(lambda column: column.str.strip())
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return np.array([f"{value:016x}" for value in hashes], dtype=object)
+
+
+def import_file(filepath, ext, data_year, chunk_size=None, on_chunk=None, workers=None,
+                cache_dir=None, file_hash=None, incremental=False):
+    """
+    流式导入上传文件：按块读取，逐块调用 import_dataframe 并提交，提交后清空会话中的 ORM 对象，
+    使内存占用不随文件行数增长。每块即一个提交批次，批次大小由 chunk_size（应用配置 IMPORT_CHUNK_SIZE）控制。
+    多年份数据（带数据年份列，或 XLSX 以年份命名的多个工作表，见 upload_reader.py）只解析一次：
+    每块按行的数据年份分组，各年份共用一次已有记录预取（prefetch_year_records），按年份依次导入并各自提交；
+    启用进程池时各年份的纯计算阶段同时在进程池中执行（数据库写入仍在当前线程中依次进行）。
+
+    参数:
+        filepath (str): 上传文件路径。
+        ext (str): 文件扩展名（"xlsx" 或 "csv"）。
+        data_year (str): 数据年份；表格带有数据年份列时为该列为空的行的缺省年份。
+        chunk_size (int): 每块行数，默认 IMPORT_CHUNK_SIZE。
+        on_chunk (callable): 每块提交后的回调，参数为 (已处理行数, 已失败行数)。
+        workers (int): 校验与转换阶段的并行进程数，默认 IMPORT_WORKERS（1 表示不启用进程池）；
+                       行数不足 PARALLEL_MIN_ROWS 的块仍在当前进程中处理。
+        cache_dir (str): 解析结果缓存目录（见 parsed_cache.py）；与 file_hash 同时提供时，
+                         同一文件内容再次导入直接读取缓存，跳过解析。
+        file_hash (str): 上传文件内容哈希（SHA-256）。
+        incremental (bool): 增量导入，内容未变化的行直接跳过（见 import_dataframe）。
+
+    返回:
+        dict: {
+            "imported_count": 成功导入的记录数,
+            "skipped_count": 增量导入时内容未变化而跳过的行数,
+            "row_errors": 按行顺序排列的失败行错误索引 {行索引: [错误信息, ...]},
+            "error_messages": 按行顺序排列的错误信息列表,
+            "failed_rows": 失败行索引集合,
+            "failed_df": 失败行的原始数据（用于生成失败记录表）,
+            "total_rows": 文件数据行数,
+            "timings": 各阶段累计耗时（秒），阶段见 import_metrics.STAGE_NAMES,
+            "stage_rows": 各阶段累计处理行数,
+            "peak_memory_mb": 导入过程中（每块解析后与提交后采样）的进程常驻内存峰值（MB），无法获取时为 None,
+            "schools": 各学校的数据行数 {学校: 行数},
+            "years": 各数据年份的行数 {数据年份: 行数},
+            "batches": 各提交批次（每块的每个年份）的统计
+                       [{"data_year", "rows", "imported", "skipped", "failed", "seconds", "rows_per_second"}, ...]
+        }
+
+    说明:
+        - 块内个别行写入时违反约束只回滚该行的保存点，不影响同一批次的其他行（见 insert_records）；
+        - 文件内跨块重复的 education_id 在后续块中命中已提交的记录，执行部分更新，与整表导入一致；
+        - 某一批次写入数据库失败时回滚该批次并抛出异常，之前的批次已提交（重新上传同一文件即可补全）。
+    """
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    workers = workers or IMPORT_WORKERS
+    imported_count = 0
+    skipped_count = 0
+    row_errors = {}
+    failed_frames = []
+    total_rows = 0
+    columns = None
+    timings = dict.fromkeys(STAGE_NAMES, 0.0)
+    stage_rows = dict.fromkeys(STAGE_NAMES, 0)
+    peak_memory = track_peak(None)
+    schools = {}
+    year_rows = {}
+    batches = []
+
+    # 导入通常在后台任务线程中执行，使用 spawn 方式启动子进程，避免在多线程进程中 fork
+    executor = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                if workers > 1 else None)
+    try:
+        chunks = iter_cached_chunks(filepath, ext, chunk_size, cache_dir, file_hash)
+        while True:
+            batch_started = started = time.perf_counter()
+            chunk = next(chunks, None)
+            timings["parse"] += time.perf_counter() - started
+            if chunk is None:
+                break
+            stage_rows["parse"] += len(chunk)
+            peak_memory = track_peak(peak_memory)
+
+            columns = chunk.columns
+            parallel = executor is not None and len(chunk) >= PARALLEL_MIN_ROWS
+            # 按数据年份分组（不含数据年份列时全部为 data_year），各年份共用一次预取，逐年份导入并提交
+            years = row_data_years(chunk, data_year)
+            groups = [(year, chunk[years == year]) for year in sorted(set(years))]
+            started = time.perf_counter()
+            students, extensions = prefetch_year_records(
+                _education_ids(chunk).dropna().unique(), [year for year, _ in groups])
+            timings["lookup"] += time.perf_counter() - started
+            # 多个年份时各年份的纯计算阶段同时提交到进程池，与此前年份的数据库写入重叠执行
+            pending = {}
+            if parallel and len(groups) > 1:
+                pending = {year: executor.submit(_timed_prepare_frame, frame) for year, frame in groups}
+
+            for year, frame in groups:
+                prepared = None
+                if year in pending:
+                    prepared, part_timings = pending[year].result()
+                    for stage, seconds in part_timings.items():
+                        timings[stage] += seconds
+                # 此前年份新建的学生已写入数据库，后续年份直接使用；写入失败的学生（无主键）不传递
+                known = {edu_id: student for edu_id, student in students.items() if hasattr(student, "id")}
+                try:
+                    result = import_dataframe(
+                        frame, year,
+                        executor=executor if parallel and not pending else None,
+                        partitions=workers if parallel and not pending else 1,
+                        incremental=incremental,
+                        existing=(known, extensions[year]),
+                        prepared=prepared)
+                    started = time.perf_counter()
+                    db.session.commit()
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    raise
+                db.session.expunge_all()
+                students.update(known)
+                finished = time.perf_counter()
+                timings["commit"] += finished - started
+                stage_rows["commit"] += len(frame)
+                for stage, seconds in result["timings"].items():
+                    timings[stage] += seconds
+                    stage_rows[stage] += result["stage_rows"][stage]
+
+                imported_count += result["imported_count"]
+                skipped_count += result["skipped_count"]
+                row_errors.update(result["row_errors"])
+                if result["row_errors"]:
+                    failed_frames.append(frame.loc[list(result["row_errors"])])
+                year_rows[year] = year_rows.get(year, 0) + len(frame)
+                seconds = finished - batch_started
+                batches.append({
+                    "data_year": year,
+                    "rows": len(frame),
+                    "imported": result["imported_count"],
+                    "skipped": result["skipped_count"],
+                    "failed": len(result["row_errors"]),
+                    "seconds": round(seconds, 3),
+                    "rows_per_second": round(len(frame) / seconds, 1) if seconds > 0 else None,
+                })
+                batch_started = finished
+
+            peak_memory = track_peak(peak_memory)
+            if "学校" in chunk.columns:
+                for school, rows in chunk["学校"].str.strip().value_counts().items():
+                    if school:
+                        schools[school] = schools.get(school, 0) + int(rows)
+            total_rows += len(chunk)
+            if on_chunk is not None:
+                on_chunk(total_rows, len(row_errors))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if failed_frames:
+        failed_df = pd.concat(failed_frames).sort_index()
+    else:
+        failed_df = pd.DataFrame(columns=columns)
+    # 同一块中的多个年份分别导入，错误按行顺序重新排列
+    row_errors = dict(sorted(row_errors.items()))
+    return {
+        "imported_count": imported_count,
+        "skipped_count": skipped_count,
+        "row_errors": row_errors,
+        "error_messages": [message for messages in row_errors.values() for message in messages],
+        "failed_rows": set(row_errors),
+        "failed_df": failed_df,
+        "total_rows": total_rows,
+        "timings": timings,
+        "stage_rows": stage_rows,
+        "peak_memory_mb": peak_memory,
+        "schools": schools,
+        "years": year_rows,
+        "batches": batches,
+    }
+
+
+def prefetch_existing_records(education_ids, data_year, chunk_size=None):
+    """
+    批量查询已有记录，替代逐行的 Student / StudentExtension 存在性查询。
+    只查询主键与关联键（Core 查询，不构造 ORM 对象）；部分更新由 apply_fill_empty_updates 以 SQL 完成。
+
+    参数:
+        education_ids (array-like): 本次上传中需要判断存在性的教育ID号（已去重）。
+        data_year (str): 数据年份。
+        chunk_size (int): 每条 IN 查询携带的参数个数上限，默认 LOOKUP_CHUNK_SIZE。
+
+    返回:
+        (students, extensions):
+            students 为 {education_id: 学生（含 id 与 education_id 属性）}；
+            extensions 为 {education_id: 该学生在 data_year 的扩展记录ID}。
+    """
+    students, extensions = prefetch_year_records(education_ids, [data_year], chunk_size)
+    return students, extensions[data_year]
+
+
+def prefetch_year_records(education_ids, data_years, chunk_size=None):
+    """
+    prefetch_existing_records 的多年份版本：学生只查询一次，扩展记录以 data_year IN (...) 一并查出，
+    供多年份数据按年份分组导入时共用。
+
+    返回:
+        (students, extensions):
+            students 为 {education_id: 学生（含 id 与 education_id 属性）}；
+            extensions 为 {数据年份: {education_id: 该学生在该年份的扩展记录ID}}。
+    """
+    chunk_size = chunk_size or LOOKUP_CHUNK_SIZE
+    education_ids = list(education_ids)
+    data_years = list(data_years)
+    students = {}
+    for start in range(0, len(education_ids), chunk_size):
+        chunk = education_ids[start:start + chunk_size]
+        query = select(Student.id, Student.education_id).where(Student.education_id.in_(chunk))
+        for student_id, edu_id in db.session.execute(query):
+            students[edu_id] = SimpleNamespace(id=student_id, education_id=edu_id)
+
+    education_id_by_student = {
+        student.id: edu_id for edu_id, student in students.items()}
+    student_ids = list(education_id_by_student)
+    extensions = {year: {} for year in data_years}
+    if len(data_years) == 1:
+        year_filter = StudentExtension.data_year == data_years[0]
+        step = chunk_size
+    else:
+        # 多个年份也作为 IN 参数，每条查询的学生个数相应减少，参数总数不超过 chunk_size
+        year_filter = StudentExtension.data_year.in_(data_years)
+        step = max(chunk_size - len(data_years), 1)
+    for start in range(0, len(student_ids), step):
+        chunk = student_ids[start:start + step]
+        query = select(StudentExtension.id, StudentExtension.student_id, StudentExtension.data_year).where(
+            StudentExtension.student_id.in_(chunk), year_filter)
+        for extension_id, student_id, year in db.session.execute(query):
+            extensions[year][education_id_by_student[student_id]] = extension_id
+    return students, extensions
+
+
+def execute_many(statement, records):
+    """
+    以驱动原生的 executemany 批量执行语句：语句只编译一次，参数按列经 SQLAlchemy 类型处理
+    （日期转为 SQLite 存储格式、布尔转为整数等）后以元组直接交给驱动，跳过 ORM 批量写入逐行构造参数的开销。
+
+    参数:
+        statement: Core 语句，绑定参数名与 records 的键对应（缺少的键按空值处理）。
+        records (list): 参数字典列表。
+    """
+    if not records:
+        return
+    execute_columns(statement, {name: [record.get(name) for record in records] for name in records[0]})
+
+
+def execute_columns(statement, columns):
+    """
+    execute_many 的按列形式：参数以 {参数名: 取值序列} 给出（各序列等长），省去逐行构造参数字典，
+    适合参数由数组运算按列生成的批量语句（如 apply_fill_empty_updates）。
+    """
+    count = len(next(iter(columns.values()), []))
+    if not count:
+        return
+    connection = db.session.connection()
+    dialect = connection.dialect
+    compiled = statement.compile(dialect=dialect, column_keys=list(columns))
+    names = compiled.positiontup
+    processed = {}
+    for name in dict.fromkeys(names):
+        values = columns[name] if name in columns else [None] * count
+        processor = compiled.binds[name].type.bind_processor(dialect)
+        processed[name] = [processor(value) for value in values] if processor else values
+    connection.exec_driver_sql(compiled.string, list(zip(*(processed[name] for name in names))))
+
+
+def fill_empty(column, value):
+    """
+    "仅补充为空的字段" 的 SQL 表达式：数值、日期等字段为 COALESCE(原值, 新值)；
+    文本字段的空字符串（去除空格后）也视为空，且新值为空时保持原值。
+    """
+    if isinstance(column.type, String):
+        return case((and_(value.is_not(None), or_(column.is_(None), func.trim(column) == "")), value),
+                    else_=column)
+    return func.coalesce(column, value)
+
+
+def extension_upsert(fields=None):
+    """
+    新增扩展记录的 INSERT ... ON CONFLICT(student_id, data_year) DO UPDATE 语句（对应 uq_student_year 约束）：
+    记录已存在（文件内重复或并发导入）时仅补充为空的字段。
+
+    参数:
+        fields (list): 冲突时补充的字段，默认 FILL_EMPTY_EXTENSION_FIELDS。
+    """
+    table = StudentExtension.__table__
+    statement = sqlite_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.student_id, table.c.data_year],
+        set_={name: fill_empty(table.c[name], statement.excluded[name])
+              for name in (fields or FILL_EMPTY_EXTENSION_FIELDS)},
+    )
+
+
+def bulk_insert_records(pending_students, new_extensions, data_year):
+    """
+    批量写入新增的学生与扩展记录（execute_many）。
+    学生写入后按 education_id 批量取回主键（写回各学生对象的 id），再以 extension_upsert 写入扩展记录。
+    """
+    if pending_students:
+        execute_many(insert(Student.__table__), [vars(student) for student in pending_students.values()])
+        education_ids = list(pending_students)
+        for start in range(0, len(education_ids), LOOKUP_CHUNK_SIZE):
+            chunk = education_ids[start:start + LOOKUP_CHUNK_SIZE]
+            query = select(Student.education_id, Student.id).where(Student.education_id.in_(chunk))
+            for edu_id, student_id in db.session.execute(query):
+                pending_students[edu_id].id = student_id
+
+    if new_extensions:
+        rows = []
+        for student, extension in new_extensions:
+            row = vars(extension).copy()
+            row["student_id"] = student.id
+            row["data_year"] = data_year
+            rows.append(row)
+        execute_many(extension_upsert(), rows)
+
+
+def apply_fill_empty_updates(fill_rows, df, student_records, extension_records, data_year, chunk_size=None):
+    """
+    对已有记录执行部分更新（仅补充为空的字段，不覆盖已有数据），覆盖由模型列元数据生成的全部字段
+    （FILL_EMPTY_COLUMNS），语义与 partial_update_student 一致：
+      - 每个字段的新值按列一次生成：表格中为空的单元格，以及该行第一个格式错误字段及其后的字段均取空值（不更新）；
+      - 学生字段以一条 UPDATE（各字段为 fill_empty 表达式）批量执行，扩展字段以 extension_upsert 批量执行，
+        格式错误出现在学生字段的行不更新扩展记录；
+      - 没有格式错误的行，其扩展记录重新读取后按列重新计算计算字段（calculate_within_year_change_frame）并批量写回。
+    参数按行顺序执行，文件内重复出现的同一学生依次补充，与逐行更新结果一致。
+
+    参数:
+        fill_rows (list): [(行位置, 所属学生, 第一个格式错误字段在 FILL_EMPTY_COLUMNS 中的位置或 None), ...]。
+        df (pd.DataFrame): 本块上传数据，用于判断单元格是否为空。
+        student_records (list): 各行 Student 字段取值。
+        extension_records (list): 各行 StudentExtension 字段取值。
+        data_year (str): 数据年份。
+        chunk_size (int): 重新读取扩展记录时每条 IN 查询的参数个数，默认 LOOKUP_CHUNK_SIZE。
+    """
+    if not fill_rows:
+        return
+    positions = np.array([pos for pos, _, _ in fill_rows], dtype=int)
+    student_ids = _object_array([student.id for _, student, _ in fill_rows])
+    limits = np.array([len(FILL_EMPTY_COLUMNS) if failed is None else failed
+                       for _, _, failed in fill_rows], dtype=int)
+
+    def new_values(position, field, label, records, rows):
+        if label not in df.columns:
+            return np.full(len(rows), None, dtype=object)
+        values = _object_array([records[pos][field] for pos in positions[rows]])
+        keep = df[label].notna().to_numpy()[positions[rows]] & (position < limits[rows])
+        return np.where(keep, values, None)
+
+    # 本批中没有任何新值的字段不出现在语句中（上传表格通常只包含部分列）
+    every_row = np.arange(len(fill_rows))
+    student_values = {}
+    for position, (field, label, _) in enumerate(FILL_EMPTY_STUDENT_COLUMNS):
+        values = new_values(position, field, label, student_records, every_row)
+        if (values != None).any():  # noqa: E711
+            student_values[field] = values
+    table = Student.__table__
+    if student_values:
+        execute_columns(
+            update(table).where(table.c.id == bindparam("student_id", type_=Integer)).values({
+                field: fill_empty(table.c[field], bindparam(f"new_{field}", type_=table.c[field].type))
+                for field in student_values}),
+            dict({"student_id": student_ids}, **{f"new_{field}": values
+                                                 for field, values in student_values.items()}))
+
+    offset = len(FILL_EMPTY_STUDENT_COLUMNS)
+    extension_rows = np.flatnonzero(limits > offset)
+    extension_values = {}
+    for position, (field, label, _) in enumerate(FILL_EMPTY_EXTENSION_COLUMNS, start=offset):
+        values = new_values(position, field, label, extension_records, extension_rows)
+        if (values != None).any():  # noqa: E711
+            extension_values[field] = values
+    if extension_values:
+        execute_columns(
+            extension_upsert(list(extension_values)),
+            dict({"student_id": student_ids[extension_rows], "data_year": [data_year] * len(extension_rows)},
+                 **extension_values))
+
+    updated = student_ids[limits == len(FILL_EMPTY_COLUMNS)]
+    recalculate_extensions(list(dict.fromkeys(updated)), data_year, chunk_size)
+
+
+def recalculate_extensions(student_ids, data_year, chunk_size=None):
+    """重新读取指定学生在 data_year 的扩展记录（按块 IN 查询），按列一次性重新计算计算字段并批量写回。"""
+    chunk_size = chunk_size or LOOKUP_CHUNK_SIZE
+    table = StudentExtension.__table__
+    frames = []
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        result = db.session.execute(select(table).where(
+            table.c.student_id.in_(chunk), table.c.data_year == data_year))
+        frames.append(pd.DataFrame(result.all(), columns=list(result.keys()), dtype=object))
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if frame.empty:
+        return
+    calc_frame = calculate_within_year_change_frame(frame)
+    records = [{f"new_{name}": value for name, value in record.items()}
+               for record in _frame_records(calc_frame)]
+    for record, extension_id in zip(records, frame["id"]):
+        record["extension_id"] = extension_id
+    execute_many(
+        update(table).where(table.c.id == bindparam("extension_id", type_=Integer)).values({
+            name: bindparam(f"new_{name}", type_=table.c[name].type) for name in calc_frame.columns}),
+        records)
+
+
+def apply_changed_field_updates(changed_rows, df, student_records, extension_records, data_year,
+                                chunk_size=None):
+    """
+    增量导入中内容有变化的已有记录：只写入取值有变化的字段，即表格中非空、转换结果非空且与数据库现值不同的
+    可更新字段（FILL_EMPTY_COLUMNS，空单元格不清除已有数据）。与部分更新不同，这里以表格取值覆盖原值；
+    调用方只传入整行转换成功的记录。各行的变化字段组合相同的记录以一条 UPDATE 批量执行；
+    计算字段不从表格写入，扩展字段有变化的记录按列重新计算（recalculate_extensions）。
+
+    参数:
+        changed_rows (list): [(行位置, 所属学生, 扩展记录ID), ...]，同一学生只出现一次。
+        df (pd.DataFrame): 本块上传数据，用于判断单元格是否为空。
+        student_records (list): 各行 Student 字段取值。
+        extension_records (list): 各行 StudentExtension 字段取值。
+        data_year (str): 数据年份。
+        chunk_size (int): 读取现值时每条 IN 查询的参数个数，默认 LOOKUP_CHUNK_SIZE。
+
+    返回:
+        int: 写入的字段个数。
+    """
+    if not changed_rows:
+        return 0
+    positions = [pos for pos, _, _ in changed_rows]
+    targets = (
+        (Student.__table__, FILL_EMPTY_STUDENT_COLUMNS, student_records,
+         [student.id for _, student, _ in changed_rows]),
+        (StudentExtension.__table__, FILL_EMPTY_EXTENSION_COLUMNS, extension_records,
+         [extension_id for _, _, extension_id in changed_rows]),
+    )
+    written = 0
+    recalculate = []
+    for table, columns, records, row_ids in targets:
+        labels = {field: label for field, label, _ in columns if label in df.columns}
+        fields = list(labels)
+        current = _current_values(table, row_ids, fields, chunk_size)
+        changed = np.zeros((len(row_ids), len(fields)), dtype=bool)
+        for j, field in enumerate(fields):
+            provided = df[labels[field]].notna().to_numpy()[positions]
+            new = _object_array([records[pos][field] for pos in positions])
+            old = _object_array([current[row_id][field] for row_id in row_ids])
+            changed[:, j] = provided & (new != None) & (new != old)  # noqa: E711
+
+        groups = {}
+        for i, mask in enumerate(changed):
+            if mask.any():
+                groups.setdefault(mask.tobytes(), (mask, []))[1].append(i)
+        for mask, members in groups.values():
+            names = [fields[j] for j in np.flatnonzero(mask)]
+            params = []
+            for i in members:
+                row = {f"new_{name}": records[positions[i]][name] for name in names}
+                row["row_id"] = row_ids[i]
+                params.append(row)
+            execute_many(
+                update(table).where(table.c.id == bindparam("row_id", type_=Integer)).values({
+                    name: bindparam(f"new_{name}", type_=table.c[name].type) for name in names}),
+                params)
+            written += len(names) * len(members)
+        if table is StudentExtension.__table__:
+            recalculate = [changed_rows[i][1].id for i in np.flatnonzero(changed.any(axis=1))]
+    recalculate_extensions(recalculate, data_year, chunk_size)
+    return written
+
+
+def _object_array(values):
+    """构造一维 object 数组（取值为日期、列表等对象时也不会被展开）。"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _current_values(table, row_ids, fields, chunk_size=None):
+    """按主键分块读取指定字段的现值：{主键: {字段: 取值}}。"""
+    chunk_size = chunk_size or LOOKUP_CHUNK_SIZE
+    values = {}
+    for start in range(0, len(row_ids), chunk_size):
+        chunk = row_ids[start:start + chunk_size]
+        query = select(table.c.id, *(table.c[name] for name in fields)).where(table.c.id.in_(chunk))
+        for row in db.session.execute(query):
+            values[row[0]] = dict(zip(fields, row[1:]))
+    return values
+
+
+def prefetch_fingerprints(education_ids, data_year, chunk_size=None):
+    """
+    批量查询已记录的行指纹。只返回该学生在 data_year 的扩展记录仍然存在的指纹，
+    记录被删除后同一行会重新导入。
+
+    返回:
+        dict: {education_id: 行指纹}
+    """
+    chunk_size = chunk_size or LOOKUP_CHUNK_SIZE
+    education_ids = list(education_ids)
+    fingerprints = {}
+    for start in range(0, len(education_ids), chunk_size):
+        chunk = education_ids[start:start + chunk_size]
+        query = (select(ImportFingerprint.education_id, ImportFingerprint.fingerprint)
+                 .join(Student, Student.education_id == ImportFingerprint.education_id)
+                 .join(StudentExtension, and_(StudentExtension.student_id == Student.id,
+                                              StudentExtension.data_year == ImportFingerprint.data_year))
+                 .where(ImportFingerprint.data_year == data_year,
+                        ImportFingerprint.education_id.in_(chunk)))
+        fingerprints.update(db.session.execute(query).all())
+    return fingerprints
+
+
+def store_fingerprints(keys, fingerprints, duplicated, row_errors, data_year, chunk_size=None):
+    """
+    记录本块成功导入的行的指纹（INSERT ... ON CONFLICT DO UPDATE）。
+    块内重复出现的教育ID号由多行合并写入，不对应单独一行的内容，删除其已记录的指纹，下次导入时不会被跳过。
+
+    参数:
+        keys (pd.Series): 各行的教育ID号（_education_ids）。
+        fingerprints (np.ndarray): 各行的指纹（row_fingerprints）。
+        duplicated (np.ndarray): 各行的教育ID号是否在块内重复出现。
+        row_errors (dict): 失败行 {行索引: [错误信息, ...]}，这些行不记录指纹。
+        data_year (str): 数据年份。
+        chunk_size (int): 删除指纹时每条 IN 条件的参数个数，默认 LOOKUP_CHUNK_SIZE。
+    """
+    now = datetime.now()
+    records = [
+        {"education_id": key, "data_year": data_year, "fingerprint": fingerprint, "updated_at": now}
+        for index, key, fingerprint, repeated in zip(keys.index, keys, fingerprints, duplicated)
+        if isinstance(key, str) and not repeated and index not in row_errors
+    ]
+    if records:
+        table = ImportFingerprint.__table__
+        statement = sqlite_insert(table)
+        execute_many(statement.on_conflict_do_update(
+            index_elements=[table.c.education_id, table.c.data_year],
+            set_={"fingerprint": statement.excluded.fingerprint,
+                  "updated_at": statement.excluded.updated_at}), records)
+
+    forget_fingerprints(keys[duplicated].unique(), data_year, chunk_size)
+
+
+def forget_fingerprints(education_ids, data_year, chunk_size=None):
+    """
+    删除已记录的行指纹（记录的内容不再与数据库中的取值一致时），这些行下次增量导入时不会被跳过。
+
+    参数:
+        education_ids (iterable): 教育ID号。
+        data_year (str): 数据年份。
+        chunk_size (int): 每条 IN 条件的参数个数，默认 LOOKUP_CHUNK_SIZE。
+    """
+    chunk_size = chunk_size or LOOKUP_CHUNK_SIZE
+    education_ids = [key for key in education_ids if isinstance(key, str)]
+    for start in range(0, len(education_ids), chunk_size):
+        db.session.execute(delete(ImportFingerprint).where(
+            ImportFingerprint.data_year == data_year,
+            ImportFingerprint.education_id.in_(education_ids[start:start + chunk_size])))
+
+
+def insert_records(pending_students, new_extensions, rows, data_year):
+    """
+    在保存点内写入新增记录：先整批写入；违反约束时回滚保存点，改为每行一个保存点逐行写入，
+    只有违反约束的行被回滚并计入失败，会话在此之后仍可继续使用并提交。
+
+    参数:
+        pending_students (dict): 待新增的学生 {education_id: 学生}。
+        new_extensions (list): 待新增的扩展记录 [(所属学生, 扩展记录), ...]。
+        rows (list): 与 new_extensions 对应的行索引。
+        data_year (str): 数据年份。
+
+    返回:
+        dict: 写入失败的行 {行索引: 错误信息}。
+    """
+    if not pending_students and not new_extensions:
+        return {}
+    begin_transaction()
+    try:
+        with db.session.begin_nested():
+            bulk_insert_records(pending_students, new_extensions, data_year)
+        return {}
+    except IntegrityError:
+        _forget_student_ids(pending_students.values())
+
+    errors = {}
+    attempted = set()
+    for index, (student, extension) in zip(rows, new_extensions):
+        pending = {} if hasattr(student, "id") else {student.education_id: student}
+        attempted.update(pending)
+        try:
+            with db.session.begin_nested():
+                bulk_insert_records(pending, [(student, extension)], data_year)
+        except IntegrityError as e:
+            _forget_student_ids(pending.values())
+            errors[index] = f"第{index+2}行: 数据写入错误: {e.orig}"
+
+    # 扩展数据转换失败的行仍写入学生基本信息（与逐行导入一致），这些行已计入失败
+    for edu_id, student in pending_students.items():
+        if edu_id in attempted:
+            continue
+        try:
+            with db.session.begin_nested():
+                bulk_insert_records({edu_id: student}, [], data_year)
+        except IntegrityError:
+            _forget_student_ids([student])
+    return errors
+
+
+def _forget_student_ids(students):
+    """保存点回滚后，清除写回到待新增学生对象上的主键。"""
+    for student in students:
+        vars(student).pop("id", None)
+
+
+def begin_transaction():
+    """
+    确保当前会话处于数据库事务中。
+    pysqlite 驱动在第一条写语句前才开始事务，此前发出的 SAVEPOINT 会成为最外层事务，
+    RELEASE SAVEPOINT 即等同于提交，块内后续失败时无法整体回滚；因此在保存点之前显式开始事务。
+    """
+    connection = db.session.connection()
+    # SQLAlchemy 1.4 的连接池代理对象以 connection 属性提供 DBAPI 连接（2.0 为 dbapi_connection）
+    fairy = connection.connection
+    dbapi_connection = getattr(fairy, "dbapi_connection", None) or fairy.connection
+    if isinstance(dbapi_connection, sqlite3.Connection) and not dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+
+
+def write_failures_workbook(df, row_errors, failures_file_path):
+    """
+    生成上传失败记录表：仅包含失败行，并在末尾追加 "错误信息" 列（红色字体）。
+    错误信息直接按行索引从 row_errors 取出，不再在全部错误信息中按 "第N行" 逐条匹配；
+    工作簿以 constant_memory 模式逐行写出，内存占用不随失败行数增长。
+
+    参数:
+        df (pd.DataFrame): 原始上传数据（至少包含全部失败行），行索引为原始数据行号。
+        row_errors (dict): 失败行错误索引 {行索引: [错误信息, ...]}，写出顺序与其一致。
+        failures_file_path (str): 失败记录文件保存路径（.xlsx）。
+    """
+    columns = list(df.columns)
+    workbook = xlsxwriter.Workbook(failures_file_path, {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet("Failures")
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+        red_format = workbook.add_format({"font_color": "red"})
+        worksheet.write_row(0, 0, columns + ["错误信息"], header_format)
+        error_col = len(columns)
+        failed = df.loc[list(row_errors)]
+        for row_num, (index, values) in enumerate(
+                zip(failed.index, failed.itertuples(index=False, name=None)), start=1):
+            worksheet.write_row(row_num, 0, [None if pd.isna(v) else v for v in values])
+            if row_errors[index]:
+                worksheet.write_string(row_num, error_col, "; ".join(row_errors[index]), red_format)
+    finally:
+        workbook.close()
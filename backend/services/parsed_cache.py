@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: parsed_cache.py
+完整存储路径: backend/services/parsed_cache.py
+功能说明:
+    上传文件解析结果的内容寻址缓存。XLSX 解析（openpyxl 逐行读取）是导入中最慢的阶段，
+    而操作人员经常先试运行预览再正式导入、或修改后重新提交同一文件，因此：
+      - 解析得到的 DataFrame 块按文件内容哈希（SHA-256）缓存到磁盘：缓存目录下每个文件一个子目录
+        （目录名即哈希），每块保存为一个 pickle 文件（part_00000.pkl ...），写入与读取均按块流式进行，
+        内存占用与不使用缓存时相同；
+      - 同一内容再次读取时直接从缓存按块读出（按请求的块行数重新切分，行索引与直接解析一致），跳过解析；
+      - 缓存总大小超过上限时按最近使用时间（子目录修改时间，命中时更新）淘汰最久未使用的条目（LRU）；
+      - 缓存的解析结果也用于同一文件前后两个版本的逐行比较（diff_parsed_frames）。
+    缓存内容为解析后的字符串表（与 upload_reader.iter_upload_chunks 的输出一致），
+    类型转换仍在导入时按列完成，因此解析规则或字段注册表变化后缓存依然有效。
+使用说明:
+    for chunk in iter_cached_chunks(filepath, "xlsx", 5000, cache_dir, file_hash):
+        ...
+    previous = load_parsed_frame(cache_dir, old_hash)
+    changes = diff_parsed_frames(previous, load_parsed_frame(cache_dir, new_hash))
+"""
+
+import os
+import shutil
+import uuid
+
+import pandas as pd
+
+from backend.services.upload_reader import iter_upload_chunks
+
+# 解析结果缓存的总大小上限（字节），超出时淘汰最久未使用的条目
+PARSED_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# 比较两个版本时用于匹配行的键列
+DIFF_KEY = "教育ID号"
+
+
+def cache_entry_path(cache_dir, file_hash):
+    """文件内容哈希对应的缓存条目目录。"""
+    return os.path.join(cache_dir, file_hash)
+
+
+def is_cached(cache_dir, file_hash):
+    """是否已缓存该文件内容的解析结果。"""
+    return bool(cache_dir and file_hash) and os.path.isdir(cache_entry_path(cache_dir, file_hash))
+
+
+def iter_cached_chunks(filepath, ext, chunk_size, cache_dir=None, file_hash=None, max_bytes=None):
+    """
+    按块读取上传文件，优先使用解析结果缓存；未命中时解析文件并写入缓存。
+
+    参数:
+        filepath (str): 文件路径。
+        ext (str): 文件扩展名（"xlsx" 或 "csv"）。
+        chunk_size (int): 每块的最大行数。
+        cache_dir (str): 缓存目录；为空时不使用缓存，等同于 iter_upload_chunks。
+        file_hash (str): 文件内容哈希（SHA-256）；为空时不使用缓存。
+        max_bytes (int): 缓存总大小上限，默认 PARSED_CACHE_MAX_BYTES。
+
+    返回:
+        生成器，逐块产出 DataFrame，结果与 iter_upload_chunks 相同。
+
+    说明:
+        未读取到文件末尾（调用方中途停止或解析出错）时不写入缓存。
+    """
+    if not cache_dir or not file_hash:
+        yield from iter_upload_chunks(filepath, ext, chunk_size)
+        return
+
+    entry = cache_entry_path(cache_dir, file_hash)
+    if os.path.isdir(entry):
+        # 更新修改时间，作为 LRU 淘汰依据
+        os.utime(entry)
+        yield from _iter_entry(entry, chunk_size)
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # 先写入临时目录，读完整个文件后再重命名，避免留下不完整的缓存条目
+    staging = os.path.join(cache_dir, f".{file_hash}.{uuid.uuid4().hex}")
+    os.makedirs(staging)
+    try:
+        for number, chunk in enumerate(iter_upload_chunks(filepath, ext, chunk_size)):
+            chunk.to_pickle(os.path.join(staging, f"part_{number:05d}.pkl"))
+            yield chunk
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    try:
+        os.replace(staging, entry)
+    except OSError:
+        # 并发读取同一文件时其他任务已写入缓存
+        shutil.rmtree(staging, ignore_errors=True)
+    evict_parsed_cache(cache_dir, max_bytes)
+
+
+def _iter_entry(entry, chunk_size):
+    """从缓存条目按块读出，并按 chunk_size 重新切分。"""
+    buffer = None
+    for name in sorted(os.listdir(entry)):
+        part = pd.read_pickle(os.path.join(entry, name))
+        buffer = part if buffer is None else pd.concat([buffer, part])
+        while buffer is not None and len(buffer) >= chunk_size:
+            yield buffer.iloc[:chunk_size]
+            buffer = buffer.iloc[chunk_size:] if len(buffer) > chunk_size else None
+    if buffer is not None:
+        yield buffer
+
+
+def load_parsed_frame(cache_dir, file_hash):
+    """
+    读取缓存的完整解析结果。
+
+    返回:
+        pd.DataFrame | None: 未缓存时返回 None。
+    """
+    if not is_cached(cache_dir, file_hash):
+        return None
+    entry = cache_entry_path(cache_dir, file_hash)
+    parts = [pd.read_pickle(os.path.join(entry, name)) for name in sorted(os.listdir(entry))]
+    return pd.concat(parts) if parts else pd.DataFrame()
+
+
+def evict_parsed_cache(cache_dir, max_bytes=None):
+    """
+    缓存总大小超过上限时，按最近使用时间从旧到新删除条目，直至不超过上限。
+
+    返回:
+        list: 被淘汰的文件内容哈希。
+    """
+    max_bytes = PARSED_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        size = sum(item.stat().st_size for item in os.scandir(path))
+        entries.append((os.stat(path).st_mtime, name, size))
+
+    total = sum(size for _, _, size in entries)
+    evicted = []
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
+        evicted.append(name)
+    return evicted
+
+
+def _normalized(frame):
+    """比较前统一取值：去除首尾空白，空值与空字符串视为相同。"""
+    frame = frame.fillna("").astype(str)
+    return frame.apply(lambda column: column.str.strip())
+
+
+def diff_parsed_frames(previous, current, key=None):
+    """
+    按键列（默认教育ID号）逐行比较同一文件的前后两个版本。
+    同一键在文件中出现多次时按出现顺序一一对应（第 1 次对第 1 次，第 2 次对第 2 次……）。
+
+    参数:
+        previous (pd.DataFrame): 先前版本的解析结果。
+        current (pd.DataFrame): 当前版本的解析结果。
+        key (str): 匹配行的键列，默认 DIFF_KEY。
+
+    返回:
+        dict: {
+            "added": 当前版本中新出现的行索引列表（键为空或缺少键列的行也计入）,
+            "changed": 键相同但取值不同的行索引列表（比较两个版本共有的列）,
+            "unchanged": 取值完全相同的行索引列表,
+            "removed": 先前版本中有、当前版本中没有的键列表
+        }
+    """
+    key = key or DIFF_KEY
+    if key not in previous.columns or key not in current.columns:
+        return {"added": list(current.index), "changed": [], "unchanged": [], "removed": []}
+
+    columns = [column for column in current.columns if column in previous.columns]
+    old = _keyed(_normalized(previous[columns]), key)
+    new = _keyed(_normalized(current[columns]), key)
+
+    known = new.index.isin(old.index) & (new.index.get_level_values(0) != "")
+    matched = new[known]
+    same = (old.loc[matched.index].to_numpy() == matched.to_numpy()).all(axis=1)
+    positions = current.index
+    return {
+        "added": list(positions[~known]),
+        "changed": list(positions[known][~same]),
+        "unchanged": list(positions[known][same]),
+        "removed": [value for value, _ in old.index[~old.index.isin(new.index)] if value != ""],
+    }
+
+
+def _keyed(frame, key):
+    """以 (键, 该键的第几次出现) 为行索引，行顺序不变。"""
+    occurrence = frame.groupby(key, sort=False).cumcount()
+    return frame.set_index([frame[key], occurrence]).drop(columns=key)
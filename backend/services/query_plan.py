@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: query_plan.py
+完整存储路径: backend/services/query_plan.py
+功能说明:
+    查询执行计划检查。按应用实际构造查询的方式（查询接口的 build_query / 分页 / 计数，
+    统计报表与图表的 aggregate_query_data）生成 PLAN_SHAPES 中列出的各类查询，
+    对每条语句执行 EXPLAIN QUERY PLAN，标记其中对 students / student_extensions 的全表扫描
+    （"SCAN 表名" 且未使用索引）。新增查询形态或修改索引后运行检查，确认常用查询仍然走索引。
+    仅支持 SQLite。
+使用说明:
+    from backend.services.query_plan import check_query_plans
+    results = check_query_plans(app)
+    flagged = [r for r in results if r["full_scans"]]
+    命令行工具见 scripts/check_query_plans.py。
+"""
+
+import re
+
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+
+# 检查全表扫描的数据表
+CHECKED_TABLES = (Student.__tablename__, StudentExtension.__tablename__)
+
+# 统计报表示例条件：按干预方式组合分组、统计视力等级
+_INTERVENTION_REPORT = (
+    '[{"field":"intervention_methods","operator":"=","value":["guasha","aigiu"],"role":"group"},'
+    '{"field":"vision_level","operator":"=","value":["轻度近视","中度近视"],"role":"metric"}]'
+)
+
+# 应用实际构造的查询形态：
+#   name: 名称；kind: "query"（查询接口，检查分页与计数语句）或 "report"（统计报表聚合语句）；
+#   args: 请求参数；allow_scan: 允许全表扫描的表（如无过滤条件的列表按主键顺序扫描、LIMIT 提前结束）
+PLAN_SHAPES = [
+    {"name": "查询：无过滤条件", "kind": "query", "args": {}, "allow_scan": ("students",)},
+    {"name": "查询：数据年份", "kind": "query", "args": {"data_year": "2024"}, "allow_scan": ()},
+    {"name": "查询：数据年份 + 年级", "kind": "query",
+     "args": {"data_year": "2024", "grade": "三年级"}, "allow_scan": ()},
+    {"name": "查询：姓名（全文索引）", "kind": "query", "args": {"name": "张三丰"}, "allow_scan": ()},
+    {"name": "查询：学校前缀", "kind": "query", "args": {"school": "华兴*"}, "allow_scan": ()},
+    {"name": "查询：教育ID号精确", "kind": "query", "args": {"education_id": "=E0001"}, "allow_scan": ()},
+    {"name": "查询：数据年份 + 视力等级（组合条件）", "kind": "query",
+     "args": {"data_year": "2024",
+              "advanced_conditions": '[{"field":"vision_level","operator":"=","value":"轻度近视"}]'},
+     "allow_scan": ()},
+    {"name": "报表：按年龄段统计视力等级", "kind": "report",
+     "args": {"stat_time": "2024", "query_mode": "template", "template": "template1"}, "allow_scan": ()},
+    {"name": "报表：按性别统计视力等级", "kind": "report",
+     "args": {"stat_time": "2024", "query_mode": "template", "template": "template2"}, "allow_scan": ()},
+    {"name": "报表：按干预方式统计视力等级", "kind": "report",
+     "args": {"stat_time": "2024", "query_mode": "custom", "advanced_conditions": _INTERVENTION_REPORT},
+     "allow_scan": ()},
+]
+
+# EXPLAIN QUERY PLAN 中的表扫描："SCAN 表名" 或 "SCAN 表名 AS 别名"，后面没有 USING ... INDEX
+_TABLE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def explain(statement):
+    """
+    对语句执行 EXPLAIN QUERY PLAN。
+
+    参数:
+        statement: SQLAlchemy 语句（Select）。
+
+    返回:
+        list: 执行计划各步骤的说明文字。
+    """
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled.string}", params)
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan, allow_scan=()):
+    """执行计划中对 CHECKED_TABLES 的全表扫描步骤（allow_scan 中的表除外）。"""
+    scans = []
+    for detail in plan:
+        match = _TABLE_SCAN.match(detail)
+        if match and match.group(1) in CHECKED_TABLES and match.group(1) not in allow_scan:
+            scans.append(detail)
+    return scans
+
+
+def shape_statements(shape):
+    """
+    按应用代码构造查询形态对应的语句（需在请求上下文中调用）。
+
+    返回:
+        list: [(语句说明, 语句), ...]。
+    """
+    # 延迟导入：接口模块在导入时注册蓝图并读取字段注册表
+    from backend.api.analysis_api import aggregate_query_data
+    from backend.api.query_api import build_query
+    from backend.services.query_service import ordered
+
+    args = shape["args"]
+    if shape["kind"] == "query":
+        query = build_query()
+        count_query = db.session.query(db.func.count()).select_from(
+            query.order_by(None).with_entities(Student.id).subquery())
+        return [("分页", ordered(query).limit(10).statement), ("计数", count_query.statement)]
+
+    query = db.session.query(StudentExtension, Student).join(
+        Student, StudentExtension.student_id == Student.id)
+    query = query.filter(StudentExtension.data_year == args["stat_time"])
+    aggregated = aggregate_query_data(
+        query, args["query_mode"], args.get("template", ""), args.get("advanced_conditions", ""))
+    return [("聚合", aggregated["query"].statement)]
+
+
+def check_query_plans(app, shapes=None):
+    """
+    检查各查询形态的执行计划。
+
+    参数:
+        app: Flask 应用（已初始化数据库，且在其应用上下文中调用）。
+        shapes (list): 查询形态，默认 PLAN_SHAPES。
+
+    返回:
+        list: 每条语句一项 {"name", "statement", "plan", "full_scans"}。
+    """
+    results = []
+    for shape in shapes or PLAN_SHAPES:
+        with app.test_request_context(query_string=shape["args"]):
+            for label, statement in shape_statements(shape):
+                plan = explain(statement)
+                results.append({
+                    "name": f"{shape['name']}（{label}）",
+                    "statement": str(statement),
+                    "plan": plan,
+                    "full_scans": full_scans(plan, shape["allow_scan"]),
+                })
+    return results
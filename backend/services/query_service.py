@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: query_service.py
+完整存储路径: backend/services/query_service.py
+功能说明:
+    学生数据查询的分页与计数。查询接口（backend/api/query_api.py）构造的 (Student, StudentExtension)
+    外连接查询不再整体取出后在 Python 中切片，而是由数据库完成分页，每页只取出并构造当页的记录：
+      - 页码分页：按 (学生ID, 扩展记录ID) 排序后 LIMIT / OFFSET；
+      - 游标分页（keyset）：以上一页最后一条记录的 (学生ID, 扩展记录ID) 为游标，
+        WHERE (学生ID, 扩展记录ID) > 游标 ORDER BY ... LIMIT，翻到很深的页也不需要扫描并丢弃前面的行；
+      - 总记录数由单独的 COUNT(*) 查询得到（与分页查询相同的连接与过滤条件，不取出记录）；
+      - 列投影：只查询调用方需要的字段（with_entities），结果为元组，不构造 ORM 对象，
+        前两列固定为 (学生ID, 扩展记录ID)，供排序与游标使用；
+      - 关系加载：行查询禁止按需加载 student.extensions（without_lazy_extensions），
+        以学生为单位的列表用 with_extensions 预加载（selectinload），每页语句数与记录数无关；
+      - 查询结果缓存：总记录数与分页结果按调用方给出的规范化查询条件缓存（TTL + LRU），
+        每个条目记录写入时的数据版本。任何提交了 students / student_extensions 写操作的事务
+        （ORM 会话、导入的批量语句均经过引擎）都会使数据版本加一，旧版本的条目随即失效。
+使用说明:
+    from backend.services.query_service import paginate_offset, paginate_keyset, count_rows
+    columns = projection_columns("name,grade,age")           # 可选：列投影
+    query = project(query, columns)
+    rows = paginate_offset(query, page, per_page)
+    rows, next_cursor = paginate_keyset(query, cursor, per_page)   # cursor 为空字符串时取第一页
+    total = count_rows(query)       # 查询接口的精确 / 估算计数与缓存见 backend/services/count_service.py
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import and_, event, func, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import raiseload, selectinload
+
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+
+# 每页记录数上限
+MAX_PER_PAGE = 1000
+
+# 查询结果缓存的有效期（秒）与最多缓存的条目数
+QUERY_CACHE_SECONDS = 30
+QUERY_CACHE_SIZE = 256
+
+# 结果缓存：{键: (数据版本, 过期时间, 结果)}，按最近使用顺序排列
+_result_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# 学生数据版本：每提交一次写入 students / student_extensions 的事务加一
+_data_version = 0
+
+# 写入学生数据的语句（INSERT / UPDATE / DELETE，表名可带引号）
+_STUDENT_WRITE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+[\"`]?"
+    r"(?:students|student_extensions)[\"`]?[\s(]",
+    re.IGNORECASE)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _mark_student_write(conn, cursor, statement, parameters, context, executemany):
+    """语句写入学生数据时在连接上做标记，事务提交时据此更新数据版本。"""
+    if _STUDENT_WRITE.match(statement):
+        conn.info["student_data_written"] = True
+
+
+@event.listens_for(Engine, "commit")
+def _bump_on_commit(conn):
+    if conn.info.pop("student_data_written", False):
+        bump_data_version()
+
+
+@event.listens_for(Engine, "rollback")
+def _discard_on_rollback(conn):
+    conn.info.pop("student_data_written", None)
+
+
+def data_version():
+    """当前学生数据版本。"""
+    return _data_version
+
+
+def bump_data_version():
+    """学生数据版本加一，此前缓存的查询结果全部失效。"""
+    global _data_version
+    with _cache_lock:
+        _data_version += 1
+
+
+def cached_result(key, compute, cache_seconds=None):
+    """
+    带缓存的查询结果：同一数据版本内、有效期内的相同键直接返回缓存，否则调用 compute 计算并缓存。
+
+    参数:
+        key (tuple): 缓存键，由调用方以规范化的查询条件构造（可哈希）。
+        compute (callable): 无参数，返回查询结果。
+        cache_seconds (float): 缓存有效期，默认 QUERY_CACHE_SECONDS；0 表示不使用缓存。
+
+    返回:
+        查询结果（缓存命中时为缓存的同一对象，调用方不应修改）。
+    """
+    cache_seconds = QUERY_CACHE_SECONDS if cache_seconds is None else cache_seconds
+    if cache_seconds <= 0:
+        return compute()
+    now = time.monotonic()
+    with _cache_lock:
+        version = _data_version
+        cached = _result_cache.get(key)
+        if cached is not None and cached[0] == version and cached[1] > now:
+            _result_cache.move_to_end(key)
+            return cached[2]
+
+    value = compute()
+    with _cache_lock:
+        # 计算期间数据已变化时不写入，避免以新版本号缓存旧结果
+        if version == _data_version:
+            _result_cache[key] = (version, now + cache_seconds, value)
+            _result_cache.move_to_end(key)
+            while len(_result_cache) > QUERY_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+    return value
+
+
+def cached_value(key):
+    """缓存中键对应的当前数据版本、未过期的结果；没有时返回 None（不计算）。"""
+    with _cache_lock:
+        cached = _result_cache.get(key)
+        if cached is not None and cached[0] == _data_version and cached[1] > time.monotonic():
+            return cached[2]
+    return None
+
+
+def clear_query_cache():
+    """清空查询结果缓存。"""
+    with _cache_lock:
+        _result_cache.clear()
+
+
+def with_extensions(query):
+    """
+    学生列表预加载各年份扩展记录（selectinload）：取出一页学生后以一条 IN 查询加载这些学生的
+    全部 student.extensions，遍历时不再逐个学生查询（N+1）。
+
+    参数:
+        query: 以 Student 为实体的查询。
+    """
+    return query.options(selectinload(Student.extensions))
+
+
+def without_lazy_extensions(query):
+    """
+    (Student, StudentExtension) 行查询禁止按需加载 student.extensions：每行已带有对应年份的扩展记录，
+    在逐行处理中访问该集合会为每名学生各发一条查询，改为直接抛出异常以便在测试中发现。
+    """
+    return query.options(raiseload(Student.extensions))
+
+
+def ordered(query):
+    """分页的稳定排序：学生ID、扩展记录ID（没有扩展记录的学生只有一行，扩展记录ID为空）。"""
+    return query.order_by(Student.id, StudentExtension.id)
+
+
+def projection_columns(fields):
+    """
+    解析逗号分隔的字段列表。字段名与记录字典的键一致，先在 Student 中查找，再在 StudentExtension 中查找
+    （与组合查询条件的字段解析顺序相同，因此 id 指学生ID）。
+
+    参数:
+        fields (str): 如 "name,grade,age"。
+
+    返回:
+        list: [(字段名, 列), ...]，按请求顺序，重复的字段只保留一次。
+
+    异常:
+        ValueError: 字段不存在。
+    """
+    columns = []
+    seen = set()
+    for name in (part.strip() for part in fields.split(",")):
+        if not name or name in seen:
+            continue
+        for model in (Student, StudentExtension):
+            if name in model.__table__.columns:
+                columns.append((name, getattr(model, name)))
+                break
+        else:
+            raise ValueError(f"未知字段: {name}")
+        seen.add(name)
+    return columns
+
+
+def project(query, columns):
+    """
+    列投影：查询只选取 (学生ID, 扩展记录ID) 与指定列，连接与过滤条件不变。
+
+    参数:
+        query: (Student, StudentExtension) 查询。
+        columns (list): projection_columns 的返回值。
+
+    返回:
+        查询对象，结果行为 (学生ID, 扩展记录ID, 列值...) 元组。
+    """
+    return query.with_entities(Student.id, StudentExtension.id, *(column for _, column in columns))
+
+
+def row_position(row):
+    """记录在分页排序中的位置 (学生ID, 扩展记录ID)；row 为 ORM 对象对或投影元组。"""
+    first, second = row[0], row[1]
+    if isinstance(first, Student):
+        return first.id, second.id if second is not None else None
+    return first, second
+
+
+def paginate_offset(query, page, per_page):
+    """
+    页码分页：LIMIT / OFFSET。
+
+    参数:
+        query: (Student, StudentExtension) 查询。
+        page (int): 页码（从 1 开始）。
+        per_page (int): 每页记录数。
+
+    返回:
+        list: 当页记录。
+    """
+    return ordered(query).limit(per_page).offset((page - 1) * per_page).all()
+
+
+def encode_cursor(student_id, extension_id):
+    """游标字符串："学生ID:扩展记录ID"（没有扩展记录时扩展记录ID部分为空）。"""
+    return f"{student_id}:{'' if extension_id is None else extension_id}"
+
+
+def decode_cursor(cursor):
+    """
+    解析游标字符串。
+
+    返回:
+        tuple | None: (学生ID, 扩展记录ID 或 None)；空字符串（第一页）返回 None。
+
+    异常:
+        ValueError: 游标格式错误。
+    """
+    if not cursor:
+        return None
+    student_part, separator, extension_part = cursor.partition(":")
+    if not separator or not student_part.isdigit() or (extension_part and not extension_part.isdigit()):
+        raise ValueError(f"游标格式错误: {cursor}")
+    return int(student_part), int(extension_part) if extension_part else None
+
+
+def paginate_keyset(query, cursor, per_page):
+    """
+    游标分页（keyset）：取排在游标之后的 per_page 条记录。
+
+    参数:
+        query: (Student, StudentExtension) 查询或 project 之后的投影查询。
+        cursor (str): 上一页返回的 next_cursor；空字符串表示第一页。
+        per_page (int): 每页记录数。
+
+    返回:
+        (rows, next_cursor): 当页记录与下一页的游标（没有下一页时为 None）。
+
+    异常:
+        ValueError: 游标格式错误。
+    """
+    position = decode_cursor(cursor)
+    if position is not None:
+        student_id, extension_id = position
+        if extension_id is None:
+            query = query.filter(Student.id > student_id)
+        else:
+            query = query.filter(or_(
+                Student.id > student_id,
+                and_(Student.id == student_id, StudentExtension.id > extension_id)))
+    # 多取一条用于判断是否还有下一页
+    rows = ordered(query).limit(per_page + 1).all()
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, encode_cursor(*row_position(rows[-1]))
+
+
+def count_rows(query):
+    """
+    总记录数：与 query 相同的连接与过滤条件上的 COUNT(*)。
+
+    参数:
+        query: (Student, StudentExtension) 查询。
+
+    返回:
+        int: 总记录数。
+    """
+    # 子查询只选取学生ID，外层 COUNT(*)；不取出、不构造任何记录
+    return db.session.query(func.count()).select_from(
+        query.order_by(None).with_entities(Student.id).subquery()).scalar()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: student_search.py
+完整存储路径: backend/services/student_search.py
+功能说明:
+    学生查询中教育ID号、学校、班级、姓名的文本检索。原先一律使用 ILIKE '%值%'，前导通配符使
+    每次查询都全表扫描 students。现按输入自动选择可走索引的方式：
+      - "=值"：精确匹配，走 B-tree 索引；
+      - 教育ID号、班级的普通输入恰好是已有的完整取值时（按索引精确查找一次确认），自动改为精确匹配：
+        完整的教育ID号只对应一名学生，"1班" 也不应匹配 "11班"；输入不完整时按下述规则匹配；
+      - "值*"：前缀匹配，输入不含大小写字母时（数字、中文等）改写为范围条件
+        列 >= '值' AND 列 < '值的后继'，走 B-tree 索引；含字母时（需不区分大小写）在全文索引上
+        以 LIKE '值%' 检索，索引不可用时为 ILIKE '值%'；
+      - 其余输入为包含匹配：SQLite 中存在 FTS5 全文索引且输入不少于 3 个字符时，
+        通过 trigram 分词的 students_fts 虚拟表检索（trigram 只能索引 3 个字符及以上的子串）；
+        否则退回 ILIKE '%值%'。
+    students_fts 为外部内容（content='students'）的 FTS5 表，由触发器与 students 保持同步；
+    数据库不是 SQLite 或 SQLite 未编译 FTS5 时不创建，包含匹配自动退回 ILIKE。
+    迁移 a4c1e7f9b352 中保存了创建时 FTS_DDL 的冻结副本；修改全文索引表或触发器时需新增迁移。
+使用说明:
+    from backend.services.student_search import text_filter, ensure_search_index
+    ensure_search_index(db.engine)                        # 应用启动时（db.create_all 之后）
+    query = query.filter(text_filter(Student.name, "张*"))
+"""
+
+import weakref
+
+import sqlalchemy as sa
+from sqlalchemy import and_
+from sqlalchemy.exc import OperationalError
+
+from backend.infrastructure.database import db
+from backend.models.student import Student
+
+# 全文索引虚拟表名称与索引的字段
+FTS_TABLE = "students_fts"
+SEARCH_COLUMNS = ("education_id", "school", "class_name", "name")
+
+# trigram 分词能够使用索引的最短输入长度
+FTS_MIN_LENGTH = 3
+
+# 输入为已有的完整取值时自动精确匹配的字段
+EXACT_MATCH_COLUMNS = ("education_id", "class_name")
+
+# 全文索引表与同步触发器（外部内容表：只保存索引，不重复保存字段值）
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(SEARCH_COLUMNS)}, content='students', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} "
+    f"ON students BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)}); END",
+]
+
+# 按现有 students 数据重建全文索引
+FTS_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+_fts = sa.table(FTS_TABLE, sa.column("rowid"), sa.column(FTS_TABLE),
+               *(sa.column(name) for name in SEARCH_COLUMNS))
+
+# 各数据库引擎是否存在全文索引表：{engine: bool}
+_fts_available = weakref.WeakKeyDictionary()
+
+
+def ensure_search_index(engine):
+    """
+    创建全文索引表与同步触发器（已存在时跳过），新建时按现有数据重建索引。
+
+    参数:
+        engine: SQLAlchemy 引擎。
+
+    返回:
+        bool: 全文索引是否可用（非 SQLite 或 SQLite 不支持 FTS5 trigram 时为 False）。
+    """
+    if engine.dialect.name != "sqlite":
+        _fts_available[engine] = False
+        return False
+    try:
+        with engine.begin() as connection:
+            created = not connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).first()
+            for statement in FTS_DDL:
+                connection.exec_driver_sql(statement)
+            if created:
+                connection.exec_driver_sql(FTS_REBUILD)
+    except OperationalError:
+        _fts_available[engine] = False
+        return False
+    _fts_available[engine] = True
+    return True
+
+
+def search_index_available(engine):
+    """数据库中是否存在全文索引表（按引擎缓存检查结果）。"""
+    available = _fts_available.get(engine)
+    if available is None:
+        with engine.connect() as connection:
+            available = engine.dialect.name == "sqlite" and connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (FTS_TABLE,)).first() is not None
+        _fts_available[engine] = available
+    return available
+
+
+def prefix_upper_bound(prefix):
+    """前缀范围的上界：最后一个字符的码位加一（"张" -> "弡"）。"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def fts_phrase(column_name, value):
+    """FTS5 查询串：限定字段的短语匹配，短语中的双引号按 FTS5 规则转义。"""
+    return f'{column_name} : "{value.replace(chr(34), chr(34) * 2)}"'
+
+
+def use_search_index(column, value, engine):
+    """是否可以用全文索引检索该输入：字段已建索引、输入不少于 3 个字符且索引表存在。"""
+    return (engine is not None and column.key in SEARCH_COLUMNS and len(value) >= FTS_MIN_LENGTH
+            and search_index_available(engine))
+
+
+def is_complete_value(column, value, engine):
+    """输入是否为该字段已有的完整取值（EXACT_MATCH_COLUMNS 中的字段，按 B-tree 索引精确查找一条）。"""
+    if engine is None or column.key not in EXACT_MATCH_COLUMNS:
+        return False
+    return db.session.execute(sa.select(column).where(column == value).limit(1)).first() is not None
+
+
+def text_filter(column, value, engine=None):
+    """
+    students 文本字段的检索条件（规则见模块说明）。
+
+    参数:
+        column: Student 的文本列（education_id / school / class_name / name）。
+        value (str): 查询输入（已去除首尾空白）。
+        engine: 用于判断全文索引是否可用的引擎；为 None 时不使用全文索引，也不自动改为精确匹配。
+
+    返回:
+        SQLAlchemy 过滤条件。
+    """
+    if len(value) > 1 and value.startswith("="):
+        return column == value[1:]
+    if len(value) > 1 and value.endswith("*"):
+        prefix = value[:-1]
+        if prefix.lower() == prefix.upper():
+            return and_(column >= prefix, column < prefix_upper_bound(prefix))
+        if use_search_index(column, prefix, engine):
+            # trigram 索引同样支持 FTS 表字段上的 LIKE（不区分大小写）
+            return Student.id.in_(sa.select(_fts.c.rowid).where(
+                _fts.c[column.key].like(f"{prefix}%")))
+        return column.ilike(f"{prefix}%")
+    if is_complete_value(column, value, engine):
+        return column == value
+    if use_search_index(column, value, engine):
+        return Student.id.in_(sa.select(_fts.c.rowid).where(
+            _fts.c[FTS_TABLE].op("MATCH")(fts_phrase(column.key, value))))
+    return column.ilike(f"%{value}%")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: upload_reader.py
+完整存储路径: backend/services/upload_reader.py
+功能说明:
+    上传文件的流式分块读取。按固定行数逐块产出 DataFrame，内存占用只与块大小有关，与文件总行数无关：
+      - CSV 使用 pd.read_csv(dtype=str, chunksize=...) 分块读取；
+      - XLSX 使用 openpyxl 只读模式（read_only=True）逐行迭代，单元格取值规则与
+        pd.read_excel(dtype=str) 一致（整数值的数字去掉 ".0"、错误单元格与默认空值标记视为空值、
+        中间的空行保留、末尾的空行去除），每块再交由 pandas 的 TextParser 完成字符串化与空值识别。
+    每块的行索引为该行在整个文件中的序号（从 0 开始），导入时的 "第N行" 标注与整表读取保持一致；
+    列名去除首尾空白。
+    多年份数据：XLSX 包含多个工作表且工作表名称均为 4 位年份时，依次读取全部工作表（每个工作表有各自的表头），
+    每行的数据年份列（YEAR_COLUMN）填入所在工作表的名称，导入时据此按年份分组；
+    此时行索引在各工作表之间连续编号（第二个工作表的第一行接在第一个工作表的最后一行之后），
+    一块只包含同一工作表的行。
+使用说明:
+    from backend.services.upload_reader import iter_upload_chunks
+    for chunk in iter_upload_chunks(filepath, "xlsx", 5000):
+        ...
+    total = estimate_row_count(filepath, "xlsx")   # 预估数据行数，用于进度与剩余时间估算
+    注意: XLSX 中超出表头宽度的单元格会被忽略（整表读取时 pandas 会为其生成 "Unnamed: N" 列，导入时同样不会使用）。
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+
+from backend.field_registry import FIELDS_BY_NAME
+
+# 按行给出数据年份的列（字段注册表中 data_year 的中文标签）
+YEAR_COLUMN = FIELDS_BY_NAME["data_year"]["label"]
+
+# 数据年份的格式：4 位数字
+YEAR_PATTERN = re.compile(r"^\d{4}$")
+
+
+def iter_upload_chunks(filepath, ext, chunk_size):
+    """
+    按块读取上传文件。
+
+    参数:
+        filepath (str): 文件路径。
+        ext (str): 文件扩展名（"xlsx" 或 "csv"）。
+        chunk_size (int): 每块的最大行数。
+
+    返回:
+        生成器，逐块产出 DataFrame（全部列为字符串或空值，行索引为文件内行序号）。
+    """
+    if ext == "csv":
+        chunks = pd.read_csv(filepath, dtype=str, chunksize=chunk_size)
+    elif ext == "xlsx":
+        chunks = _iter_xlsx_chunks(filepath, chunk_size)
+    else:
+        raise ValueError(f"不支持的文件格式: .{ext}")
+
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+
+def estimate_row_count(filepath, ext):
+    """
+    不解析单元格，快速预估数据行数（不含表头），用于导入进度与剩余时间估算。
+
+    CSV 统计换行符个数（含换行的引号字段会使结果偏大）；XLSX 读取工作表声明的尺寸（dimension），
+    文件未声明尺寸时返回 None。
+    """
+    if ext == "csv":
+        newlines = 0
+        last = b"\n"
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                newlines += block.count(b"\n")
+                last = block[-1:]
+        if last != b"\n":
+            newlines += 1
+        return max(newlines - 1, 0)
+
+    workbook = load_workbook(filepath, read_only=True)
+    try:
+        sheets = workbook.worksheets if year_sheet_titles(workbook) else workbook.worksheets[:1]
+        max_rows = [sheet.max_row for sheet in sheets]
+    finally:
+        workbook.close()
+    if not all(max_rows):
+        return None
+    return sum(max(max_row - 1, 0) for max_row in max_rows)
+
+
+def year_sheet_titles(workbook):
+    """工作簿包含多个工作表且名称（去除首尾空白后）均为 4 位年份时返回各工作表名称，否则返回 None。"""
+    titles = [sheet.title.strip() for sheet in workbook.worksheets]
+    if len(titles) > 1 and all(YEAR_PATTERN.match(title) for title in titles):
+        return titles
+    return None
+
+
+def _convert_cell(cell):
+    """单元格取值转换，规则与 pandas 的 openpyxl 读取器一致。"""
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        if value == cell.value:
+            return value
+        return float(cell.value)
+    return cell.value
+
+
+def _iter_xlsx_chunks(filepath, chunk_size):
+    """
+    以只读模式逐行读取第一个工作表，每累计 chunk_size 行产出一块；
+    工作表按年份命名（year_sheet_titles）时依次读取全部工作表，并填入数据年份列。
+    """
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        titles = year_sheet_titles(workbook)
+        if titles is None:
+            yield from _iter_sheet_chunks(workbook.worksheets[0], chunk_size, 0)
+            return
+        offset = 0
+        for sheet, title in zip(workbook.worksheets, titles):
+            for chunk in _iter_sheet_chunks(sheet, chunk_size, offset):
+                chunk[YEAR_COLUMN] = title
+                offset = chunk.index[-1] + 1
+                yield chunk
+    finally:
+        workbook.close()
+
+
+def _iter_sheet_chunks(sheet, chunk_size, offset):
+    """逐行读取一个工作表，行索引从 offset 开始编号。"""
+    sheet.reset_dimensions()
+    rows = sheet.iter_rows()
+
+    header = None
+    for row in rows:
+        header = _trim_row([_convert_cell(cell) for cell in row])
+        break
+    if not header:
+        return
+
+    width = len(header)
+    buffer = []
+    # 尚未确定是否位于工作表末尾的连续空行，遇到后续非空行时才计入
+    pending_blank = []
+    for row in rows:
+        values = _trim_row([_convert_cell(cell) for cell in row[:width]])
+        if not values:
+            pending_blank.append(values)
+            continue
+        buffer.extend(pending_blank)
+        pending_blank = []
+        buffer.append(values)
+        while len(buffer) >= chunk_size:
+            yield _build_chunk(header, buffer[:chunk_size], offset)
+            offset += chunk_size
+            buffer = buffer[chunk_size:]
+    if buffer:
+        yield _build_chunk(header, buffer, offset)
+
+
+def _trim_row(values):
+    """去除行尾的空单元格。"""
+    while values and values[-1] == "":
+        values.pop()
+    return values
+
+
+def _build_chunk(header, rows, offset):
+    """将原始单元格值交由 TextParser 解析为 DataFrame，并将行索引平移到文件内行序号。"""
+    width = len(header)
+    data = [header] + [row + [""] * (width - len(row)) for row in rows]
+    chunk = TextParser(data, header=0, dtype=str, skip_blank_lines=False).read()
+    chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+    return chunk
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: upload_sessions.py
+完整存储路径: backend/services/upload_sessions.py
+功能说明:
+    分块（可续传）上传与重复文件识别。
+    上传过程分三步：创建会话（init）→ 按偏移量追加分块（append）→ 完成上传（complete）：
+      - 分块依次追加到临时文件 upload_{会话ID}.part，已接收字节数以该文件的实际大小为准；
+        连接中断后客户端查询会话（或以相同哈希重新创建会话）取得已接收字节数，从该偏移量继续上传；
+      - 重复发送已接收的分块不会重复写入（幂等），偏移量与已接收字节数不衔接时拒绝该分块；
+        同一会话的分块写入按会话加锁串行执行，持锁后重新读取已接收字节数，并在偏移量处截断后写入，
+        客户端重发的分块与原请求同时到达时不会重复追加；
+      - 超过 UPLOAD_SESSION_EXPIRE_SECONDS 未收到分块的未完成会话及其临时分块文件在创建新会话时清理；
+      - 完成上传时校验文件大小与 SHA-256 哈希，再创建后台导入任务。
+    同一文件内容（SHA-256）与数据年份已有未失败的导入任务时，视为重复提交，直接返回已有任务，不再导入。
+使用说明:
+    由 backend/api/import_api.py 的上传接口调用：
+        session, received = create_upload_session(upload_dir, "学生数据.xlsx", "xlsx", "2024", size, sha256)
+        result = append_upload_chunk(upload_dir, session, offset, data)
+        filepath, file_hash = complete_upload(upload_dir, session)
+        job = find_imported_job(file_hash, "2024")
+        expire_upload_sessions(upload_dir)        # 创建会话时自动调用，也可单独调用
+        previous = find_previous_job("学生数据.xlsx", "2024", file_hash)   # 同名文件的上一版本
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from backend.infrastructure.database import db
+from backend.models.import_job import ImportJob
+from backend.models.upload_session import UploadSession
+
+# 计算文件哈希时每次读取的字节数
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# 未完成的上传会话超过该时长（秒）未收到分块时过期，删除会话及临时分块文件
+UPLOAD_SESSION_EXPIRE_SECONDS = 24 * 3600
+
+# 各上传会话的写入锁：{会话ID: threading.Lock}
+_session_locks = {}
+_session_locks_guard = threading.Lock()
+
+
+def session_lock(session_id):
+    """上传会话的写入锁（同一会话的分块写入与完成上传串行执行）。"""
+    with _session_locks_guard:
+        return _session_locks.setdefault(session_id, threading.Lock())
+
+
+def release_session_lock(session_id):
+    """会话结束（完成、丢弃或过期）后移除其写入锁。"""
+    with _session_locks_guard:
+        _session_locks.pop(session_id, None)
+
+
+def file_sha256(filepath):
+    """按块读取文件并计算 SHA-256 哈希（十六进制字符串）。"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_imported_job(file_hash, data_year):
+    """
+    查找同一文件内容与数据年份的已有导入任务（排除失败的任务）。
+
+    参数:
+        file_hash (str): 文件内容哈希（SHA-256）。
+        data_year (str): 数据年份。
+
+    返回:
+        ImportJob | None: 最近创建的匹配任务。
+    """
+    if not file_hash:
+        return None
+    return (ImportJob.query
+            .filter(ImportJob.file_hash == file_hash,
+                    ImportJob.data_year == data_year,
+                    ImportJob.status != "failed")
+            .order_by(ImportJob.created_at.desc())
+            .first())
+
+
+def find_previous_job(filename, data_year, file_hash):
+    """
+    查找同一文件名与数据年份、但内容不同的最近一次导入任务（即该文件的上一版本），用于逐行比较。
+
+    参数:
+        filename (str): 上传文件名。
+        data_year (str): 数据年份。
+        file_hash (str): 当前版本的文件内容哈希。
+
+    返回:
+        ImportJob | None
+    """
+    if not filename:
+        return None
+    return (ImportJob.query
+            .filter(ImportJob.filename == filename,
+                    ImportJob.data_year == data_year,
+                    ImportJob.file_hash.isnot(None),
+                    ImportJob.file_hash != file_hash,
+                    ImportJob.status != "failed")
+            .order_by(ImportJob.created_at.desc())
+            .first())
+
+
+def part_path(upload_dir, session):
+    """上传会话的临时分块文件路径。"""
+    return os.path.join(upload_dir, f"upload_{session.id}.part")
+
+
+def received_bytes(upload_dir, session):
+    """上传会话已接收的字节数（临时分块文件的实际大小）。"""
+    path = part_path(upload_dir, session)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def create_upload_session(upload_dir, filename, ext, data_year, total_size, file_hash=None):
+    """
+    创建上传会话；提供文件哈希且存在同一文件（哈希、大小、年份均相同）未完成的会话时，返回该会话以便续传。
+
+    参数:
+        upload_dir (str): 临时分块文件保存目录。
+        filename (str): 上传文件名。
+        ext (str): 文件扩展名（"xlsx" 或 "csv"）。
+        data_year (str): 数据年份。
+        total_size (int): 文件总字节数。
+        file_hash (str): 客户端计算的文件 SHA-256 哈希（可选，完成上传时据此校验）。
+
+    返回:
+        (UploadSession, int): 上传会话及其已接收字节数。
+    """
+    expire_upload_sessions(upload_dir)
+    if file_hash:
+        session = (UploadSession.query
+                   .filter_by(file_hash=file_hash, data_year=data_year,
+                              total_size=total_size, status="uploading")
+                   .order_by(UploadSession.created_at.desc())
+                   .first())
+        if session is not None:
+            return session, received_bytes(upload_dir, session)
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        filename=filename,
+        ext=ext,
+        data_year=data_year,
+        total_size=total_size,
+        file_hash=file_hash,
+        status="uploading",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+    db.session.add(session)
+    db.session.commit()
+    open(part_path(upload_dir, session), "wb").close()
+    return session, 0
+
+
+def append_upload_chunk(upload_dir, session, offset, data):
+    """
+    在指定偏移量追加一个分块。
+
+    参数:
+        upload_dir (str): 临时分块文件保存目录。
+        session (UploadSession): 上传会话（状态须为 uploading）。
+        offset (int): 分块在文件中的起始字节偏移量。
+        data (bytes): 分块内容。
+
+    返回:
+        dict: {"accepted": 是否接受该分块, "received_bytes": 已接收字节数}
+              分块已全部接收过（重复发送）时 accepted 为 True 且不重复写入；
+              偏移量与已接收字节数不衔接时 accepted 为 False，客户端应从 received_bytes 继续上传。
+
+    异常:
+        ValueError: 追加后超出文件总字节数，或临时分块文件已不存在（上传已完成或会话已过期）。
+    """
+    end = offset + len(data)
+    if end > session.total_size:
+        raise ValueError(f"分块超出文件大小（{end} > {session.total_size}）")
+    path = part_path(upload_dir, session)
+    with session_lock(session.id):
+        # 持锁后重新读取已接收字节数：同时到达的重发分块在此排队，不会按同一偏移量各追加一次
+        if not os.path.exists(path):
+            raise ValueError("上传会话已结束，请重新创建会话上传")
+        received = os.path.getsize(path)
+        if end <= received <= session.total_size:
+            return {"accepted": True, "received_bytes": received}
+        if offset > received:
+            return {"accepted": False, "received_bytes": received}
+        # 截断到偏移量后写入（覆盖与已接收内容重叠的部分），而不是直接追加
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(data)
+    return {"accepted": True, "received_bytes": end}
+
+
+def complete_upload(upload_dir, session):
+    """
+    完成上传：校验文件大小与哈希，将临时分块文件重命名为待导入文件。
+
+    参数:
+        upload_dir (str): 临时分块文件保存目录。
+        session (UploadSession): 上传会话（状态须为 uploading）。
+
+    返回:
+        (str, str): 待导入文件路径与文件 SHA-256 哈希。
+
+    异常:
+        ValueError: 文件尚未上传完整，或内容哈希与创建会话时声明的不一致。
+    """
+    with session_lock(session.id):
+        received = received_bytes(upload_dir, session)
+        if received != session.total_size:
+            raise ValueError(f"文件尚未上传完整（已接收 {received} / {session.total_size} 字节）")
+        path = part_path(upload_dir, session)
+        file_hash = file_sha256(path)
+        if session.file_hash and session.file_hash.lower() != file_hash:
+            raise ValueError("文件校验失败：内容哈希与声明的不一致，请重新上传")
+        filepath = os.path.join(upload_dir, f"upload_{session.id}.{session.ext}")
+        os.replace(path, filepath)
+    release_session_lock(session.id)
+    return filepath, file_hash
+
+
+def discard_upload(upload_dir, session, commit=True):
+    """删除上传会话及其临时分块文件。"""
+    with session_lock(session.id):
+        path = part_path(upload_dir, session)
+        if os.path.exists(path):
+            os.remove(path)
+    release_session_lock(session.id)
+    db.session.delete(session)
+    if commit:
+        db.session.commit()
+
+
+def expire_upload_sessions(upload_dir, max_age_seconds=UPLOAD_SESSION_EXPIRE_SECONDS):
+    """
+    清理过期的上传：超过 max_age_seconds 未收到分块的未完成会话（连同临时分块文件），
+    以及没有对应未完成会话、且同样久未修改的临时分块文件。
+
+    参数:
+        upload_dir (str): 临时分块文件保存目录。
+        max_age_seconds (float): 过期时长（秒）。
+
+    返回:
+        int: 删除的会话个数。
+    """
+    cutoff = datetime.now() - timedelta(seconds=max_age_seconds)
+    expired = UploadSession.query.filter(UploadSession.status == "uploading",
+                                         UploadSession.updated_at < cutoff).all()
+    for session in expired:
+        discard_upload(upload_dir, session, commit=False)
+    db.session.commit()
+
+    if os.path.isdir(upload_dir):
+        active = {session_id for session_id, in db.session.query(UploadSession.id).filter(
+            UploadSession.status == "uploading")}
+        for name in os.listdir(upload_dir):
+            if not (name.startswith("upload_") and name.endswith(".part")):
+                continue
+            path = os.path.join(upload_dir, name)
+            if name[len("upload_"):-len(".part")] not in active and \
+                    os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+    return len(expired)
@@ -51,6 +51,8 @@
            cross_right_cylinder_change, cross_right_cylinder_effect,
            cross_left_axis_change, cross_left_axis_effect,
            cross_right_axis_change, cross_right_axis_effect.
+      3. 单记录内计算的列式版本（calculate_within_year_change_frame）：
+         供批量导入使用，对整张 DataFrame 一次性完成上述单记录内计算，结果与逐条计算一致。
 使用说明:
     其他模块（如数据导入、查询、统计分析、手动重新计算）可直接调用本模块函数实现统一的视力数据计算逻辑。
 备注:
@@ -59,6 +61,7 @@
 """
 
 import datetime
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import aliased
 from backend.infrastructure.database import db
@@ -439,3 +442,110 @@ def calculate_cross_year_change(student_id, from_year, to_year):
         print(f"Error in cross-year calculation: {e}")
         results = {}
     return results
+
+
+# 单记录内变化计算的字段配置：(变化值字段, 效果标签字段, 干预前字段, 干预后字段, 指标类型)
+WITHIN_YEAR_CHANGE_SPECS = [
+    ("left_naked_change", "left_interv_effect",
+     "left_eye_naked", "left_eye_naked_interv", "naked"),
+    ("right_naked_change", "right_interv_effect",
+     "right_eye_naked", "right_eye_naked_interv", "naked"),
+    ("left_sphere_change", "left_sphere_effect",
+     "left_sphere", "left_sphere_interv", "spherical"),
+    ("right_sphere_change", "right_sphere_effect",
+     "right_sphere", "right_sphere_interv", "spherical"),
+    ("left_cylinder_change", "left_cylinder_effect",
+     "left_cylinder", "left_cylinder_interv", "cylindrical"),
+    ("right_cylinder_change", "right_cylinder_effect",
+     "right_cylinder", "right_cylinder_interv", "cylindrical"),
+    ("left_axis_change", "left_axis_effect",
+     "left_axis", "left_axis_interv", "axis"),
+    ("right_axis_change", "right_axis_effect",
+     "right_axis", "right_axis_interv", "axis"),
+]
+
+EFFECT_THRESHOLDS = {
+    "naked": 0.1,
+    "spherical": 0.01,
+    "cylindrical": 0.01,
+    "axis": 1,
+}
+
+
+def _numeric_column(frame, field):
+    """取出数值列（缺失列视为全部为空），统一转换为 float 以便向量化比较。"""
+    if field not in frame.columns:
+        return pd.Series(np.nan, index=frame.index, dtype="float64")
+    return pd.to_numeric(frame[field], errors="coerce").astype("float64")
+
+
+def _vision_level_series(right_sphere, left_sphere, age, right_dilated_sphere):
+    """
+    向量化的视力等级判断，规则与 calculate_within_year_change 中的逐条判断完全一致。
+    任一必需数据缺失时返回 None。
+    """
+    valid = right_sphere.notna() & left_sphere.notna() & age.notna()
+    conditions = [
+        right_dilated_sphere.notna() & (right_dilated_sphere == 0),
+        (left_sphere >= -3.00) & (left_sphere < -0.50) &
+        (right_sphere >= -3.00) & (right_sphere < -0.50),
+        (right_sphere >= -6.00) & (right_sphere < -3.00),
+        (age >= 6) & (age <= 9) & (right_sphere <= 1.25),
+        (age >= 10) & (age <= 12) & (right_sphere <= 0.75),
+    ]
+    choices = ["假性近视", "轻度近视", "中度近视", "临床前期近视", "临床前期近视"]
+    levels = np.select(conditions, choices, default="正常").astype(object)
+    levels[~valid.to_numpy()] = None
+    return pd.Series(levels, index=right_sphere.index, dtype=object)
+
+
+def calculate_within_year_change_frame(frame):
+    """
+    calculate_within_year_change 的列式版本：对整张 DataFrame 一次性完成单记录内计算。
+
+    参数:
+        frame (pd.DataFrame): 列名为 StudentExtension 字段名的数据表（如 left_eye_naked、age 等），
+                              缺失的列按全部为空处理。
+
+    返回:
+        pd.DataFrame: 与 frame 行索引一致，列为计算字段（与 calculate_within_year_change 返回的键相同），
+                      缺失结果为 None。
+
+    说明:
+        差值按列向量化计算；为保证与逐条计算结果逐位一致，保留两位小数时仍使用 Python 内置 round()。
+        效果标签依据未取整的差值判断，与 determine_effect 相同。
+    """
+    results = {}
+    for change_field, effect_field, before_field, after_field, type_ in WITHIN_YEAR_CHANGE_SPECS:
+        before = _numeric_column(frame, before_field)
+        after = _numeric_column(frame, after_field)
+        change = after - before
+        valid = change.notna()
+        threshold = EFFECT_THRESHOLDS[type_]
+
+        change_values = np.full(len(frame), None, dtype=object)
+        change_values[valid.to_numpy()] = [
+            round(float(v), 2) for v in change[valid]]
+        effect_values = np.select(
+            [change > threshold, change < -threshold], ["上升", "下降"], default="维持"
+        ).astype(object)
+        effect_values[~valid.to_numpy()] = None
+
+        results[change_field] = change_values
+        results[effect_field] = effect_values
+
+    age = _numeric_column(frame, "age")
+    results["vision_level"] = _vision_level_series(
+        _numeric_column(frame, "right_sphere"),
+        _numeric_column(frame, "left_sphere"),
+        age,
+        _numeric_column(frame, "right_dilated_sphere"),
+    ).to_numpy()
+    results["interv_vision_level"] = _vision_level_series(
+        _numeric_column(frame, "right_sphere_interv"),
+        _numeric_column(frame, "left_sphere_interv"),
+        age,
+        _numeric_column(frame, "right_dilated_sphere_interv"),
+    ).to_numpy()
+
+    return pd.DataFrame(results, index=frame.index, dtype=object)
@@ -0,0 +1,48 @@
+# 文件名称：conftest.py
+# 完整路径：backend/tests/conftest.py
+# 功能说明：测试公共夹具，提供基于 SQLite 内存库的 Flask 应用与数据库会话、导入接口测试客户端，以及执行的 SQL 语句记录
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from backend.api import import_api as import_api_module
+from backend.infrastructure.database import db
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["TESTING"] = True
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app, tmp_path, tmp_path_factory, monkeypatch):
+    """导入接口测试客户端：临时上传、失败记录与解析缓存目录均指向测试临时目录，每块 5 行。"""
+    monkeypatch.setattr(import_api_module, "TEMP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(import_api_module, "PARSED_CACHE_DIR", str(tmp_path_factory.mktemp("parsed_cache")))
+    monkeypatch.setattr(import_api_module, "FAILURE_UPLOAD_DIR", str(tmp_path))
+    app.config["IMPORT_CHUNK_SIZE"] = 5
+    app.register_blueprint(import_api_module.import_api)
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(app):
+    """记录测试期间数据库执行的 SQL 语句。"""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield captured
+    event.remove(db.engine, "before_cursor_execute", record)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: import_rowwise.py
+完整存储路径: backend/tests/import_rowwise.py
+功能说明:
+    保留原 import_students 中基于 df.iterrows() 的逐行导入实现（逐行校验、逐行查询、逐字段转换、
+    逐条计算并逐条写入 Session）。
+    线上导入已改用 backend/services/import_service.py 中的列式引擎，本模块不属于服务代码，仅作为参照实现，
+    用于列式引擎的一致性测试（test_import_service.py）与性能基准对比（scripts/benchmark_import.py）。
+使用说明:
+    from backend.tests.import_rowwise import import_dataframe_rowwise
+    result = import_dataframe_rowwise(df, data_year)
+    返回结构与 import_service.import_dataframe 相同，不提交事务。
+"""
+
+import pandas as pd
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services.import_service import (
+    REQUIRED_FIELDS,
+    partial_update_student,
+    validate_row,
+)
+from backend.services.vision_calculation import calculate_within_year_change
+
+
+def import_dataframe_rowwise(df, data_year):
+    """
+    原逐行导入逻辑（参照实现）。
+
+    参数:
+        df (pd.DataFrame): 解析后的上传数据。
+        data_year (str): 数据年份。
+
+    返回:
+        dict: {"imported_count": ..., "error_messages": [...], "failed_rows": set(...)}
+    """
+    required_fields = REQUIRED_FIELDS
+    imported_count = 0
+    error_messages = []
+    failed_rows = set()
+
+    for index, row in df.iterrows():
+        is_valid, errors_req = validate_row(row, required_fields, index)
+        if not is_valid:
+            error_messages.extend(errors_req)
+            failed_rows.add(index)
+            continue
+
+        edu_id = row["教育ID号"].strip()
+        existing_student = Student.query.filter_by(
+            education_id=edu_id).first()
+        existing_extension = None
+        if existing_student:
+            existing_extension = StudentExtension.query.filter_by(
+                student_id=existing_student.id, data_year=data_year).first()
+
+        if existing_student and existing_extension:
+            local_errors = []
+            success_update = partial_update_student(
+                existing_student, existing_extension, row, index, local_errors)
+            if not success_update:
+                error_messages.extend(local_errors)
+                failed_rows.add(index)
+            else:
+                # 调用单记录计算函数更新计算字段
+                calc_result = calculate_within_year_change(
+                    existing_extension)
+                for key, value in calc_result.items():
+                    setattr(existing_extension, key, value)
+                imported_count += 1
+        else:
+            if not existing_student:
+                try:
+                    student = Student(**student_kwargs_rowwise(row))
+                    db.session.add(student)
+                    db.session.flush()  # 获取 student.id
+                except (ValueError, SQLAlchemyError) as e:
+                    error_messages.append(
+                        f"第{index+2}行: 基本信息数据写入错误: {str(e)}")
+                    failed_rows.add(index)
+                    continue
+            else:
+                student = existing_student
+
+            # 新建扩展信息记录（StudentExtension）
+
+            try:
+                extension = StudentExtension(
+                    student_id=student.id,
+                    data_year=data_year,
+                    **extension_kwargs_rowwise(row)
+                )
+                # 调用单记录内计算函数对新建的扩展记录进行计算，更新计算字段
+                calc_result = calculate_within_year_change(extension)
+                for key, value in calc_result.items():
+                    setattr(extension, key, value)
+                db.session.add(extension)
+                imported_count += 1
+            except (ValueError, SQLAlchemyError) as e:
+                error_messages.append(f"第{index+2}行: 扩展数据写入错误: {str(e)}")
+                failed_rows.add(index)
+
+
+    return {
+        "imported_count": imported_count,
+        "error_messages": error_messages,
+        "failed_rows": failed_rows,
+    }
+
+
+def student_kwargs_rowwise(row):
+    """原逐行导入中构造 Student 的逐字段转换表达式（保持原样，供一致性测试与转换基准使用）。"""
+    return dict(
+        education_id=row["教育ID号"].strip(),
+        school=row["学校"].strip(),
+        class_name=row["班级"].strip(),
+        name=row["姓名"].strip(),
+        gender=row["性别"].strip(),
+        id_card=row["身份证号码"].strip() if (
+            "身份证号码" in row and not pd.isna(row["身份证号码"])) else None,
+        birthday=pd.to_datetime(row["出生日期"]).date() if (
+            "出生日期" in row and not pd.isna(row["出生日期"])) else None,
+        phone=row["联系电话"].strip() if (
+            "联系电话" in row and not pd.isna(row["联系电话"])) else None,
+        region=row["区域"].strip() if (
+            "区域" in row and not pd.isna(row["区域"])) else None,
+        contact_address=row["联系地址"].strip() if (
+            "联系地址" in row and not pd.isna(row["联系地址"])) else None,
+        parent_name=row["家长姓名"].strip() if (
+            "家长姓名" in row and not pd.isna(row["家长姓名"])) else None,
+        parent_phone=row["家长电话"].strip() if (
+            "家长电话" in row and not pd.isna(row["家长电话"])) else None
+    )
+
+
+def extension_kwargs_rowwise(row):
+    """原逐行导入中构造 StudentExtension 的逐字段转换表达式（不含 student_id 与 data_year）。"""
+    return dict(
+        grade=row["年级"].strip() if (
+            "年级" in row and not pd.isna(row["年级"])) else None,
+        age=int(row["年龄"]) if (
+            "年龄" in row and not pd.isna(row["年龄"])) else None,
+        height=float(row["身高"]) if not pd.isna(
+            row.get("身高")) else None,
+        weight=float(row["体重"]) if not pd.isna(
+            row.get("体重")) else None,
+        diet_preference=row["饮食偏好"].strip() if (
+            "饮食偏好" in row and not pd.isna(row["饮食偏好"])) else None,
+        exercise_preference=row["运动偏好"].strip() if (
+            "运动偏好" in row and not pd.isna(row["运动偏好"])) else None,
+        health_education=row["健康教育"].strip() if (
+            "健康教育" in row and not pd.isna(row["健康教育"])) else None,
+        past_history=row["既往史"].strip() if (
+            "既往史" in row and not pd.isna(row["既往史"])) else None,
+        family_history=row["家族史"].strip() if (
+            "家族史" in row and not pd.isna(row["家族史"])) else None,
+        premature=row["是否早产"].strip() if (
+            "是否早产" in row and not pd.isna(row["是否早产"])) else None,
+        allergy=row["过敏史"].strip() if (
+            "过敏史" in row and not pd.isna(row["过敏史"])) else None,
+        frame_glasses=True if str(
+            row.get("框架眼镜", "")).strip() == "是" else False,
+        contact_lenses=True if str(
+            row.get("隐形眼镜", "")).strip() == "是" else False,
+        night_orthokeratology=True if str(
+            row.get("夜戴角膜塑型镜", "")).strip() == "是" else False,
+        guasha=True if str(
+            row.get("刮痧", "")).strip() == "是" else False,
+        aigiu=True if str(
+            row.get("艾灸", "")).strip() == "是" else False,
+        zhongyao_xunzheng=True if str(
+            row.get("中药熏蒸", "")).strip() == "是" else False,
+        rejiu_training=True if str(
+            row.get("热灸训练", "")).strip() == "是" else False,
+        xuewei_tiefu=True if str(
+            row.get("穴位贴敷", "")).strip() == "是" else False,
+        reci_pulse=True if str(
+            row.get("热磁脉冲", "")).strip() == "是" else False,
+        baoguan=True if str(
+            row.get("拔罐", "")).strip() == "是" else False,
+        vision_level=row.get(
+            "视力等级", None) and float(row["视力等级"]),
+        right_eye_naked=row.get(
+            "右眼-裸眼视力", None) and float(row["右眼-裸眼视力"]),
+        left_eye_naked=row.get(
+            "左眼-裸眼视力", None) and float(row["左眼-裸眼视力"]),
+        right_eye_corrected=row.get(
+            "右眼-矫正视力", None) and float(row["右眼-矫正视力"]),
+        left_eye_corrected=row.get(
+            "左眼-矫正视力", None) and float(row["左眼-矫正视力"]),
+        right_keratometry_K1=row.get(
+            "右眼-角膜曲率K1", None) and float(row["右眼-角膜曲率K1"]),
+        left_keratometry_K1=row.get(
+            "左眼-角膜曲率K1", None) and float(row["左眼-角膜曲率K1"]),
+        right_keratometry_K2=row.get(
+            "右眼-角膜曲率K2", None) and float(row["右眼-角膜曲率K2"]),
+        left_keratometry_K2=row.get(
+            "左眼-角膜曲率K2", None) and float(row["左眼-角膜曲率K2"]),
+        right_axial_length=row.get(
+            "右眼-眼轴", None) and float(row["右眼-眼轴"]),
+        left_axial_length=row.get(
+            "左眼-眼轴", None) and float(row["左眼-眼轴"]),
+        right_sphere=row.get(
+            "右眼屈光-球镜", None) and float(row["右眼屈光-球镜"]),
+        right_cylinder=row.get(
+            "右眼屈光-柱镜", None) and float(row["右眼屈光-柱镜"]),
+        right_axis=row.get(
+            "右眼屈光-轴位", None) and float(row["右眼屈光-轴位"]),
+        left_sphere=row.get(
+            "左眼屈光-球镜", None) and float(row["左眼屈光-球镜"]),
+        left_cylinder=row.get(
+            "左眼屈光-柱镜", None) and float(row["左眼屈光-柱镜"]),
+        left_axis=row.get(
+            "左眼屈光-轴位", None) and float(row["左眼屈光-轴位"]),
+        right_dilated_sphere=row.get(
+            "右眼散瞳-球镜", None) and float(row["右眼散瞳-球镜"]),
+        right_dilated_cylinder=row.get(
+            "右眼散瞳-柱镜", None) and float(row["右眼散瞳-柱镜"]),
+        right_dilated_axis=row.get(
+            "右眼散瞳-轴位", None) and float(row["右眼散瞳-轴位"]),
+        left_dilated_sphere=row.get(
+            "左眼散瞳-球镜", None) and float(row["左眼散瞳-球镜"]),
+        left_dilated_cylinder=row.get(
+            "左眼散瞳-柱镜", None) and float(row["左眼散瞳-柱镜"]),
+        left_dilated_axis=row.get(
+            "左眼散瞳-轴位", None) and float(row["左眼散瞳-轴位"]),
+        right_anterior_depth=row.get(
+            "右眼-前房深度", None) and float(row["右眼-前房深度"]),
+        left_anterior_depth=row.get(
+            "左眼-前房深度", None) and float(row["左眼-前房深度"]),
+        other_info=str(row["其他情况"]).strip() if (
+            "其他情况" in row and not pd.isna(row["其他情况"])) else None,
+        eye_fatigue=str(row["眼疲劳状况"]).strip() if (
+            "眼疲劳状况" in row and not pd.isna(row["眼疲劳状况"])) else None,
+        right_eye_naked_interv=row.get(
+            "右眼-干预-裸眼视力", None) and float(row["右眼-干预-裸眼视力"]),
+        left_eye_naked_interv=row.get(
+            "左眼-干预-裸眼视力", None) and float(row["左眼-干预-裸眼视力"]),
+        right_sphere_interv=row.get(
+            "右眼屈光-干预-球镜", None) and float(row["右眼屈光-干预-球镜"]),
+        right_cylinder_interv=row.get(
+            "右眼屈光-干预-柱镜", None) and float(row["右眼屈光-干预-柱镜"]),
+        right_axis_interv=row.get(
+            "右眼屈光-干预-轴位", None) and float(row["右眼屈光-干预-轴位"]),
+        left_sphere_interv=row.get(
+            "左眼屈光-干预-球镜", None) and float(row["左眼屈光-干预-球镜"]),
+        left_cylinder_interv=row.get(
+            "左眼屈光-干预-柱镜", None) and float(row["左眼屈光-干预-柱镜"]),
+        left_axis_interv=row.get(
+            "左眼屈光-干预-轴位", None) and float(row["左眼屈光-干预-轴位"]),
+        right_dilated_sphere_interv=row.get(
+            "右眼散瞳-干预-球镜", None) and float(row["右眼散瞳-干预-球镜"]),
+        right_dilated_cylinder_interv=row.get(
+            "右眼散瞳-干预-柱镜", None) and float(row["右眼散瞳-干预-柱镜"]),
+        right_dilated_axis_interv=row.get(
+            "右眼散瞳-干预-轴位", None) and float(row["右眼散瞳-干预-轴位"]),
+        left_dilated_sphere_interv=row.get(
+            "左眼散瞳-干预-球镜", None) and float(row["左眼散瞳-干预-球镜"]),
+        left_dilated_cylinder_interv=row.get(
+            "左眼散瞳-干预-柱镜", None) and float(row["左眼散瞳-干预-柱镜"]),
+        left_dilated_axis_interv=row.get(
+            "左眼散瞳-干预-轴位", None) and float(row["左眼散瞳-干预-轴位"]),
+        interv_vision_level=str(row["干预后视力等级"]).strip() if (
+            "干预后视力等级" in row and not pd.isna(row["干预后视力等级"])) else None,
+        left_naked_change=row.get(
+            "左眼裸眼视力变化", None) and float(row["左眼裸眼视力变化"]),
+        right_naked_change=row.get(
+            "右眼裸眼视力变化", None) and float(row["右眼裸眼视力变化"]),
+        left_sphere_change=row.get(
+            "左眼屈光-球镜变化", None) and float(row["左眼屈光-球镜变化"]),
+        right_sphere_change=row.get(
+            "右眼屈光-球镜变化", None) and float(row["右眼屈光-球镜变化"]),
+        left_cylinder_change=row.get(
+            "左眼屈光-柱镜变化", None) and float(row["左眼屈光-柱镜变化"]),
+        right_cylinder_change=row.get(
+            "右眼屈光-柱镜变化", None) and float(row["右眼屈光-柱镜变化"]),
+        left_axis_change=row.get(
+            "左眼屈光-轴位变化", None) and float(row["左眼屈光-轴位变化"]),
+        right_axis_change=row.get(
+            "右眼屈光-轴位变化", None) and float(row["右眼屈光-轴位变化"]),
+        left_interv_effect=str(row["左眼视力干预效果"]).strip() if (
+            "左眼视力干预效果" in row and not pd.isna(row["左眼视力干预效果"])) else None,
+        right_interv_effect=str(row["右眼视力干预效果"]).strip() if (
+            "右眼视力干预效果" in row and not pd.isna(row["右眼视力干预效果"])) else None,
+        left_sphere_effect=str(row["左眼球镜干预效果"]).strip() if (
+            "左眼球镜干预效果" in row and not pd.isna(row["左眼球镜干预效果"])) else None,
+        right_sphere_effect=str(row["右眼球镜干预效果"]).strip() if (
+            "右眼球镜干预效果" in row and not pd.isna(row["右眼球镜干预效果"])) else None,
+        left_cylinder_effect=str(row["左眼柱镜干预效果"]).strip() if (
+            "左眼柱镜干预效果" in row and not pd.isna(row["左眼柱镜干预效果"])) else None,
+        right_cylinder_effect=str(row["右眼柱镜干预效果"]).strip() if (
+            "右眼柱镜干预效果" in row and not pd.isna(row["右眼柱镜干预效果"])) else None,
+        # 干预时间记录
+        interv1=pd.to_datetime(row["第1次干预"]) if (
+            "第1次干预" in row and not pd.isna(row["第1次干预"])) else None,
+        interv2=pd.to_datetime(row["第2次干预"]) if (
+            "第2次干预" in row and not pd.isna(row["第2次干预"])) else None,
+        interv3=pd.to_datetime(row["第3次干预"]) if (
+            "第3次干预" in row and not pd.isna(row["第3次干预"])) else None,
+        interv4=pd.to_datetime(row["第4次干预"]) if (
+            "第4次干预" in row and not pd.isna(row["第4次干预"])) else None,
+        interv5=pd.to_datetime(row["第5次干预"]) if (
+            "第5次干预" in row and not pd.isna(row["第5次干预"])) else None,
+        interv6=pd.to_datetime(row["第6次干预"]) if (
+            "第6次干预" in row and not pd.isna(row["第6次干预"])) else None,
+        interv7=pd.to_datetime(row["第7次干预"]) if (
+            "第7次干预" in row and not pd.isna(row["第7次干预"])) else None,
+        interv8=pd.to_datetime(row["第8次干预"]) if (
+            "第8次干预" in row and not pd.isna(row["第8次干预"])) else None,
+        interv9=pd.to_datetime(row["第9次干预"]) if (
+            "第9次干预" in row and not pd.isna(row["第9次干预"])) else None,
+        interv10=pd.to_datetime(row["第10次干预"]) if (
+            "第10次干预" in row and not pd.isna(row["第10次干预"])) else None,
+        interv11=pd.to_datetime(row["第11次干预"]) if (
+            "第11次干预" in row and not pd.isna(row["第11次干预"])) else None,
+        interv12=pd.to_datetime(row["第12次干预"]) if (
+            "第12次干预" in row and not pd.isna(row["第12次干预"])) else None,
+        interv13=pd.to_datetime(row["第13次干预"]) if (
+            "第13次干预" in row and not pd.isna(row["第13次干预"])) else None,
+        interv14=pd.to_datetime(row["第14次干预"]) if (
+            "第14次干预" in row and not pd.isna(row["第14次干预"])) else None,
+        interv15=pd.to_datetime(row["第15次干预"]) if (
+            "第15次干预" in row and not pd.isna(row["第15次干预"])) else None,
+        interv16=pd.to_datetime(row["第16次干预"]) if (
+            "第16次干预" in row and not pd.isna(row["第16次干预"])) else None
+    )
@@ -0,0 +1,128 @@
+# 文件名称：test_condition_compiler.py
+# 完整路径：backend/tests/test_condition_compiler.py
+# 功能说明：组合查询条件编译器测试（运算符与条件组、字段校验、编译缓存，查询与统计分析共用）
+
+import json
+
+import pytest
+
+from backend.api.analysis_api import aggregate_query_data
+from backend.api.query_api import query_api
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services.condition_compiler import compile_conditions, normalize_conditions
+from backend.services.query_service import clear_query_cache
+
+# (教育ID号, 性别, 年龄, 视力等级, 左眼裸眼视力, 刮痧)
+ROWS = [
+    ("C001", "男", 6, "正常", 5.0, True),
+    ("C002", "女", 7, "轻度近视", 4.8, False),
+    ("C003", "男", 9, "中度近视", 4.5, True),
+    ("C004", "女", 11, "轻度近视", None, None),
+    ("C005", "男", 12, "正常", 4.9, False),
+]
+
+
+@pytest.fixture
+def seeded(app):
+    clear_query_cache()
+    for education_id, gender, age, vision_level, left_eye_naked, guasha in ROWS:
+        student = Student(education_id=education_id, gender=gender, name=education_id)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(StudentExtension(student_id=student.id, data_year="2024", age=age,
+                                        vision_level=vision_level, left_eye_naked=left_eye_naked,
+                                        guasha=guasha))
+    db.session.commit()
+    yield app
+    clear_query_cache()
+
+
+def matching(conditions):
+    query = db.session.query(Student.education_id).join(
+        StudentExtension, Student.id == StudentExtension.student_id)
+    return sorted(row[0] for row in query.filter(compile_conditions(conditions)))
+
+
+def test_operators_and_groups(seeded):
+    assert matching([{"field": "age", "operator": ">=", "value": "9"}]) == ["C003", "C004", "C005"]
+    assert matching([{"field": "age", "operator": "between", "value": [7, 9]}]) == ["C002", "C003"]
+    assert matching([{"field": "age", "operator": "=", "value": {"min": "7", "max": "11"}}]) == [
+        "C002", "C003", "C004"]
+    assert matching([{"field": "age", "operator": "<", "value": {"min": "", "max": "9"}}]) == ["C001", "C002"]
+    assert matching([{"field": "vision_level", "operator": "in", "value": ["正常", "中度近视"]}]) == [
+        "C001", "C003", "C005"]
+    assert matching([{"field": "vision_level", "operator": "!=", "value": ["正常"]}]) == [
+        "C002", "C003", "C004"]
+    assert matching([{"field": "left_eye_naked", "operator": "is_null"}]) == ["C004"]
+    assert matching([{"field": "guasha", "operator": "=", "value": True}]) == ["C001", "C003"]
+    assert matching([{"field": "vision_level", "operator": "like", "value": "近视"},
+                     {"field": "gender", "operator": "=", "value": "女"}]) == ["C002", "C004"]
+    assert matching({"or": [
+        {"field": "age", "operator": "<", "value": 7},
+        {"and": [{"field": "gender", "operator": "=", "value": "女"},
+                 {"field": "left_eye_naked", "operator": "not_null"}]},
+    ]}) == ["C001", "C002"]
+
+
+@pytest.mark.parametrize("conditions, message", [
+    ([{"field": "no_such_field", "operator": "=", "value": 1}], "不存在"),
+    ([{"field": "age", "operator": "~", "value": 1}], "不支持的运算符"),
+    ([{"field": "age", "operator": ">", "value": "abc"}], "数值转换错误"),
+    ([{"field": "age", "operator": "between", "value": [1]}], "区间条件"),
+    ([{"field": "name", "operator": "=", "value": ""}], "未填写查询值"),
+    ({"or": []}, "至少一个条件"),
+    ("[{", "参数格式错误"),
+])
+def test_invalid_conditions_raise(conditions, message):
+    with pytest.raises(ValueError, match=message):
+        compile_conditions(conditions)
+
+
+def test_compiled_expression_is_cached_by_normalized_json():
+    first = [{"field": "age", "operator": ">", "value": 7}, {"field": "gender", "operator": "=", "value": "男"}]
+    second = json.dumps(list(reversed(first)), indent=2)
+
+    assert normalize_conditions(first) == normalize_conditions(second)
+    assert compile_conditions(first) is compile_conditions(second)
+    assert compile_conditions("") is None
+
+
+def test_query_endpoint_uses_compiler(seeded):
+    seeded.register_blueprint(query_api)
+    client = seeded.test_client()
+    conditions = json.dumps([{"field": "age", "operator": ">", "value": {"min": "8", "max": ""}},
+                             {"field": "vision_level", "operator": "=", "value": ["正常", "轻度近视"]}])
+    body = client.get(f"/api/students/query?fields=education_id&advanced_conditions={conditions}").get_json()
+    assert [row["education_id"] for row in body["students"]] == ["C004", "C005"]
+
+    bad = json.dumps([{"field": "no_such_field", "operator": "=", "value": 1}])
+    response = client.get(f"/api/students/query?advanced_conditions={bad}")
+    assert response.status_code == 400
+    assert "no_such_field" in response.get_json()["error"]
+
+
+def test_analysis_filters_use_compiler(seeded):
+    conditions = json.dumps([
+        {"field": "gender", "operator": "=", "value": ["男", "女"], "role": "group"},
+        {"field": "vision_level", "operator": "=", "value": ["正常", "轻度近视"], "role": "metric"},
+        {"field": "age", "operator": ">=", "value": "9", "role": "filter"},
+        {"or": [{"field": "guasha", "operator": "=", "value": False},
+                {"field": "guasha", "operator": "is_null"}]},
+    ])
+    query = db.session.query(StudentExtension, Student).join(
+        Student, StudentExtension.student_id == Student.id)
+    with seeded.test_request_context():
+        data = aggregate_query_data(query, "custom", "", conditions)
+
+    totals = {row[0]: row[-1] for row in data["data_rows"]}
+    assert totals == {"女": 1, "男": 1, "合计": 2}
+
+    bad = json.dumps([
+        {"field": "gender", "operator": "=", "value": ["男"], "role": "group"},
+        {"field": "vision_level", "operator": "=", "value": ["正常"], "role": "metric"},
+        {"field": "no_such_field", "operator": "=", "value": "x", "role": "filter"},
+    ])
+    with seeded.test_request_context(), pytest.raises(ValueError, match="不存在"):
+        aggregate_query_data(query, "custom", "", bad)
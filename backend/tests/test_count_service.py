@@ -0,0 +1,82 @@
+# 文件名称：test_count_service.py
+# 完整路径：backend/tests/test_count_service.py
+# 功能说明：查询总记录数测试（精确计数缓存与失效、按行数统计计数、全ID区间抽样估算、is_estimate 标记）
+
+import pytest
+
+from backend.api.query_api import query_api
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services import count_service
+from backend.services.query_service import clear_query_cache
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    clear_query_cache()
+    monkeypatch.setattr(count_service, "ESTIMATE_SAMPLE_SIZE", 6)
+    app.register_blueprint(query_api)
+    # 20 名学生：学校甲 / 乙交替，每 4 名中后 2 名为女生，年龄随导入顺序增大，
+    # 各有 2023、2024 两年的记录，共 40 行
+    for index in range(20):
+        student = Student(education_id=f"K{index:03d}", school="甲小学" if index % 2 else "乙小学",
+                          name=f"学生{index}", gender="女" if index % 4 >= 2 else "男")
+        db.session.add(student)
+        db.session.flush()
+        for year in ("2023", "2024"):
+            db.session.add(StudentExtension(student_id=student.id, data_year=year, age=6 + index // 2))
+    db.session.commit()
+    yield app.test_client()
+    clear_query_cache()
+
+
+def total(client, query):
+    body = client.get(f"/api/students/query?per_page=5&{query}").get_json()
+    return body["total"], body["is_estimate"]
+
+
+def test_exact_count_is_default(client):
+    assert total(client, "data_year=2024&gender=女") == (10, False)
+    assert total(client, "school=甲") == (20, False)
+
+
+def test_scope_count_from_row_stats(client, statements):
+    assert total(client, "count_mode=estimate") == (40, False)
+    assert total(client, "count_mode=estimate&data_year=2024&school=甲*") == (10, False)
+    assert total(client, "count_mode=estimate&data_year=2023&school=乙") == (10, False)
+    # 范围行数由按数据版本缓存的统计得出，不对查询本身执行 COUNT
+    statements.clear()
+    assert total(client, "count_mode=estimate&school=甲") == (20, False)
+    assert not any("count(" in s.lower() and "group by" not in s.lower() for s in statements)
+    # 范围不超过样本大小时直接精确计数
+    assert total(client, "count_mode=estimate&school=丙&name=学生") == (0, False)
+
+
+def test_row_stats_follow_data_version(client):
+    assert total(client, "count_mode=estimate&data_year=2023") == (20, False)
+
+    student = Student(education_id="K100", school="甲小学", name="新生", gender="男")
+    db.session.add(student)
+    db.session.flush()
+    db.session.add(StudentExtension(student_id=student.id, data_year="2023"))
+    db.session.commit()
+
+    assert total(client, "count_mode=estimate&data_year=2023") == (21, False)
+    assert total(client, "count_mode=estimate&school=甲*") == (21, False)
+
+
+def test_sampled_estimate_for_other_filters(client):
+    estimate, is_estimate = total(client, "count_mode=estimate&data_year=2024&gender=女")
+    assert is_estimate and 5 <= estimate <= 15
+    # 样本取自整个学生ID区间：与导入顺序相关的条件（年龄）不会因只取最早导入的学生而偏差
+    conditions = '[{"field":"age","operator":">=","value":11}]'
+    assert total(client, f"count_mode=estimate&data_year=2024&advanced_conditions={conditions}") == (10, True)
+    # 已有精确计数缓存时估算模式直接返回精确值
+    assert total(client, "data_year=2024&gender=女") == (10, False)
+    assert total(client, "count_mode=estimate&data_year=2024&gender=女") == (10, False)
+
+
+def test_unknown_count_mode_rejected(client):
+    response = client.get("/api/students/query?count_mode=fast")
+    assert response.status_code == 400
@@ -0,0 +1,41 @@
+# 文件名称：test_field_registry.py
+# 完整路径：backend/tests/test_field_registry.py
+# 功能说明：字段注册表与数据模型、导入转换类型及统计配置的一致性测试
+
+from backend import field_registry
+from backend.constants import BOOLEAN_FIELDS, COMPLETE_FIELDS, METRIC_CONFIG
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services.import_service import CONVERTERS, EXTENSION_COLUMNS, STUDENT_COLUMNS
+
+MODELS = {"student": Student, "extension": StudentExtension}
+
+
+def test_every_field_maps_to_a_model_column():
+    names = [spec["name"] for spec in field_registry.FIELDS]
+    labels = [spec["label"] for spec in field_registry.FIELDS]
+    assert len(set(names)) == len(names)
+    assert len(set(labels)) == len(labels)
+    for spec in field_registry.FIELDS:
+        assert spec["name"] in MODELS[spec["model"]].__table__.columns, spec["name"]
+        assert spec["type"] in CONVERTERS, spec["name"]
+
+
+def test_registry_covers_all_data_columns():
+    registered = set(field_registry.FIELDS_BY_NAME)
+    for model in MODELS.values():
+        columns = set(model.__table__.columns.keys()) - {"id", "student_id"}
+        assert columns <= registered
+
+
+def test_generated_configuration():
+    assert [c[1] for c in STUDENT_COLUMNS[:5]] == ["教育ID号", "学校", "班级", "姓名", "性别"]
+    assert EXTENSION_COLUMNS[0] == ("grade", "年级", "text")
+    assert ("interv16", "第16次干预", "datetime") in EXTENSION_COLUMNS
+    assert "data_year" not in [c[0] for c in EXTENSION_COLUMNS]
+    assert METRIC_CONFIG["vision_level"]["options"][0] == "临床前期近视"
+    assert METRIC_CONFIG["data_year"] == {
+        "label": "数据年份", "type": "dropdown",
+        "options": ["2023", "2024", "2025", "2026", "2027", "2028"]}
+    assert set(BOOLEAN_FIELDS) <= COMPLETE_FIELDS
+    assert field_registry.export_label_mapping()["right_axis_interv"] == "右眼屈光-干预-轴位"
@@ -0,0 +1,140 @@
+# 文件名称：test_import_jobs.py
+# 完整路径：backend/tests/test_import_jobs.py
+# 功能说明：后台导入任务接口测试（提交任务、查询进度、下载失败记录）
+
+import io
+from datetime import datetime
+
+from backend.infrastructure.database import db
+from backend.models.import_job import ImportJob
+from backend.models.student_extension import StudentExtension
+from backend.services import import_jobs
+from backend.services.import_jobs import fail_interrupted_jobs, wait_import_job
+from backend.services.import_metrics import IMPORT_STAGES
+from backend.tests.test_import_service import make_frame, sample_rows
+
+
+def upload(client, content, filename="学生数据.xlsx"):
+    return client.post(
+        "/api/students/import",
+        data={"file": (io.BytesIO(content), filename), "data_year": "2024"},
+        content_type="multipart/form-data",
+    )
+
+
+def test_import_job_reports_progress_and_failures(client, tmp_path):
+    buffer = io.BytesIO()
+    make_frame(sample_rows()).to_excel(buffer, index=False)
+
+    response = upload(client, buffer.getvalue())
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    wait_import_job(job_id, timeout=30)
+
+    job = client.get(response.get_json()["status_url"]).get_json()
+    assert job["status"] == "succeeded"
+    assert job["total_rows"] == 12
+    assert job["processed_rows"] == 12
+    assert job["failed_rows"] == 5
+    assert job["imported_count"] == 7
+    assert job["eta_seconds"] is None
+    assert set(job["stage_timings"]) == set(IMPORT_STAGES)
+    assert job["stage_metrics"]["parse"]["rows"] == 12
+    assert job["stage_metrics"]["report"]["rows"] == 5
+    assert job["file_size"] == len(buffer.getvalue())
+    assert "导入成功 7 条记录。 失败 5 条记录。" in job["message"]
+    assert job["update_mode"] == "fill_empty" and "已有记录只补充为空的字段" in job["message"]
+    assert StudentExtension.query.count() == 6
+    # 临时上传文件在任务结束后删除，只留下失败记录文件
+    assert [p.suffix for p in tmp_path.iterdir()] == [".xlsx"]
+
+    failures = client.get(f"/api/students/import/jobs/{job_id}/failures")
+    assert failures.status_code == 200
+    assert failures.data[:2] == b"PK"
+
+
+def test_invalid_workbook_is_rejected_before_job(client, tmp_path):
+    response = upload(client, b"not a workbook")
+    assert response.status_code == 500
+    assert response.get_json()["error"].startswith("文件处理错误")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_import_job_records_parse_error(client, tmp_path):
+    response = upload(client, b"", filename="empty.csv")
+    job_id = response.get_json()["job_id"]
+    wait_import_job(job_id, timeout=30)
+
+    job = client.get(f"/api/students/import/jobs/{job_id}").get_json()
+    assert job["status"] == "failed"
+    assert job["error"].startswith("文件处理错误")
+    assert list(tmp_path.iterdir()) == []
+    assert client.get(f"/api/students/import/jobs/{job_id}/failures").status_code == 404
+
+
+def test_unknown_job_returns_404(client):
+    assert client.get("/api/students/import/jobs/missing").status_code == 404
+
+
+def test_import_metrics_summarize_history(client):
+    buffer = io.BytesIO()
+    make_frame(sample_rows()).to_excel(buffer, index=False)
+    wait_import_job(upload(client, buffer.getvalue()).get_json()["job_id"], timeout=30)
+
+    metrics = client.get("/api/students/import/metrics").get_json()
+    assert metrics["imports"] == 1
+    assert set(metrics["stages"]) == set(IMPORT_STAGES)
+    assert metrics["recent"][0]["total_rows"] == 12
+    assert sum(school["rows"] for school in metrics["schools"]) == 12
+    assert client.get("/api/students/import/metrics?limit=0").status_code == 400
+
+
+def test_finished_job_records_actual_row_count(client):
+    rows = sample_rows()
+    rows[0]["家长姓名"] = "李\n四"             # 引号内换行使按换行符预估的行数偏大
+    content = make_frame(rows).to_csv(index=False).encode("utf-8")
+    response = upload(client, content, filename="学生数据.csv")
+    job_id = response.get_json()["job_id"]
+    wait_import_job(job_id, timeout=30)
+
+    job = client.get(f"/api/students/import/jobs/{job_id}").get_json()
+    assert job["total_rows"] == job["processed_rows"] == 12
+    recent = client.get("/api/students/import/metrics").get_json()["recent"][0]
+    assert recent["total_rows"] == 12
+    assert recent["rows_per_second"] > 0
+
+
+def test_finished_jobs_are_not_retained_and_interrupted_jobs_fail(client):
+    buffer = io.BytesIO()
+    make_frame(sample_rows()).to_excel(buffer, index=False)
+    job_id = upload(client, buffer.getvalue()).get_json()["job_id"]
+    wait_import_job(job_id, timeout=30)
+    assert job_id not in import_jobs._futures
+
+    for status in ("pending", "running"):
+        db.session.add(ImportJob(id=f"stale-{status}", status=status, data_year="2024",
+                                 processed_rows=0, failed_rows=0, imported_count=0,
+                                 created_at=datetime.now()))
+    db.session.commit()
+
+    assert fail_interrupted_jobs() == 2
+    job = client.get("/api/students/import/jobs/stale-running").get_json()
+    assert job["status"] == "failed"
+    assert job["error"] == "服务重启，任务中断"
+    assert client.get(f"/api/students/import/jobs/{job_id}").get_json()["status"] == "succeeded"
+
+
+
+def test_incremental_job_reports_overwrite_mode(client):
+    content = make_frame(sample_rows()).to_csv(index=False).encode("utf-8")
+    response = client.post(
+        "/api/students/import",
+        data={"file": (io.BytesIO(content), "学生数据.csv"), "data_year": "2024", "incremental": "1"},
+        content_type="multipart/form-data",
+    )
+    job_id = response.get_json()["job_id"]
+    wait_import_job(job_id, timeout=30)
+
+    job = client.get(f"/api/students/import/jobs/{job_id}").get_json()
+    assert job["update_mode"] == "overwrite"
+    assert "已有记录中有变化的字段已按表格中的非空取值覆盖原值" in job["message"]
@@ -0,0 +1,103 @@
+# 文件名称：test_import_preview.py
+# 完整路径：backend/tests/test_import_preview.py
+# 功能说明：导入试运行预览测试（汇总统计、抽样、接口不写库、解析结果缓存与版本比较）
+
+import io
+
+from backend.api import import_api as import_api_module
+from backend.infrastructure.database import db
+from backend.models.import_job import ImportJob
+from backend.models.student import Student
+from backend.services import parsed_cache
+from backend.services.import_jobs import wait_import_job
+from backend.services.import_preview import preview_file
+from backend.tests.test_import_service import make_frame, sample_rows
+
+
+def write_csv(tmp_path, df):
+    path = tmp_path / "preview.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_preview_matches_import_failures(app, tmp_path):
+    path = write_csv(tmp_path, make_frame(sample_rows()))
+
+    summary = preview_file(path, "csv", chunk_size=5)
+    assert summary["dry_run"] is True
+    assert summary["total_rows"] == 12
+    assert summary["analyzed_rows"] == 12
+    assert summary["sampled"] is False
+    assert summary["estimated_failed_rows"] == 5
+    assert summary["error_rate_margin"] == 0.0
+    assert summary["duplicates"]["examples"] == {"E0001": 2}
+    assert summary["columns"]["missing_required"] == []
+    assert summary["columns"]["coverage"]["教育ID号"] == 1.0
+    assert sum(summary["error_counts"].values()) >= 5
+    # 试运行不写入数据库
+    assert Student.query.count() == 0
+
+
+def test_sampled_preview_analyzes_sample_only(app, tmp_path):
+    path = write_csv(tmp_path, make_frame(sample_rows() * 10))
+
+    summary = preview_file(path, "csv", sample_size=30, chunk_size=7, seed=1)
+    assert summary["total_rows"] == 120
+    assert summary["analyzed_rows"] == 30
+    assert summary["sampled"] is True
+    assert 0 < summary["error_rate_margin"] < 1
+    assert summary["estimated_failed_rows"] == round(summary["error_rate"] * 120)
+
+
+def test_dry_run_endpoint_returns_summary_without_job(client, tmp_path):
+    buffer = io.BytesIO()
+    make_frame(sample_rows()).to_excel(buffer, index=False)
+
+    response = client.post(
+        "/api/students/import",
+        data={"file": (io.BytesIO(buffer.getvalue()), "学生数据.xlsx"), "data_year": "2024", "dry_run": "true"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    assert response.get_json()["estimated_failed_rows"] == 5
+    assert ImportJob.query.count() == 0
+    assert Student.query.count() == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_dry_run_caches_parse_for_import_and_diffs_versions(client, monkeypatch):
+    def workbook(df):
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False)
+        return buffer.getvalue()
+
+    def post(content, **extra):
+        return client.post(
+            "/api/students/import",
+            data={"file": (io.BytesIO(content), "students.xlsx"), "data_year": "2024", **extra},
+            content_type="multipart/form-data",
+        )
+
+    first = make_frame(sample_rows())
+    content = workbook(first)
+    preview = post(content, dry_run="1").get_json()
+    assert preview["changes"] is None
+    assert parsed_cache.is_cached(import_api_module.PARSED_CACHE_DIR, preview["file_hash"])
+
+    # 试运行已缓存解析结果，正式导入同一文件不再解析
+    parse = parsed_cache.iter_upload_chunks
+    monkeypatch.setattr(parsed_cache, "iter_upload_chunks", None)
+    job_id = post(content).get_json()["job_id"]
+    wait_import_job(job_id, timeout=30)
+    db.session.expire_all()
+    assert db.session.get(ImportJob, job_id).imported_count == 7
+    monkeypatch.setattr(parsed_cache, "iter_upload_chunks", parse)
+
+    # 修改一个单元格后重新试运行：与上一版本逐行比较
+    second = first.copy()
+    second.loc[3, "身高"] = "150"
+    changes = post(workbook(second), dry_run="1").get_json()["changes"]
+    assert changes["previous_job_id"] == job_id
+    assert changes["changed"] == 1
+    assert changes["changed_rows"] == [5]
+    assert changes["added"] + changes["unchanged"] == 11
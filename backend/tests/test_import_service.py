@@ -0,0 +1,411 @@
+# 文件名称：test_import_service.py
+# 完整路径：backend/tests/test_import_service.py
+# 功能说明：列式导入引擎与原逐行导入实现的一致性测试
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backend.infrastructure.database import db
+from backend.models.import_fingerprint import ImportFingerprint
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services import import_service
+from backend.services.import_service import (
+    import_dataframe,
+    import_file,
+    prepare_frame,
+    prepare_frame_parallel,
+    write_failures_workbook,
+)
+from backend.services.vision_calculation import (
+    calculate_within_year_change,
+    calculate_within_year_change_frame,
+)
+from backend.tests.import_rowwise import import_dataframe_rowwise
+
+
+def make_frame(rows):
+    """构造与 pd.read_excel(dtype=str) 一致的数据表：全部为字符串，空单元格为 NaN。"""
+    df = pd.DataFrame(rows, dtype=object)
+    return df.where(df.notna(), np.nan)
+
+
+def sample_rows():
+    base = {
+        "教育ID号": "E0001", "学校": "华兴小学", "班级": "1班", "姓名": "张三", "性别": "男",
+        "出生日期": "2015-03-01", "年级": "三年级", "年龄": "9", "身高": "130.5",
+        "右眼-裸眼视力": "4.8", "左眼-裸眼视力": "4.9",
+        "右眼屈光-球镜": "-1.25", "左眼屈光-球镜": "-1.00",
+        "右眼屈光-柱镜": "-0.5", "左眼屈光-柱镜": "-0.25",
+        "右眼屈光-轴位": "90", "左眼屈光-轴位": "85",
+        "右眼-干预-裸眼视力": "5.0", "左眼-干预-裸眼视力": "4.9",
+        "右眼屈光-干预-球镜": "-1.0", "左眼屈光-干预-球镜": "-1.10",
+        "右眼屈光-干预-柱镜": "-0.5", "左眼屈光-干预-柱镜": "-0.5",
+        "右眼屈光-干预-轴位": "92", "左眼屈光-干预-轴位": "80",
+        "刮痧": "是", "艾灸": "否", "第1次干预": "2024-03-01",
+    }
+    rows = []
+    for i in range(12):
+        row = dict(base)
+        row["教育ID号"] = f" E{i:04d} "
+        row["姓名"] = f"学生{i}"
+        row["年龄"] = str(6 + i % 7)
+        row["右眼屈光-球镜"] = str(-0.25 * i)
+        rows.append(row)
+    rows[2]["姓名"] = None                      # 缺失必填字段
+    rows[3]["右眼-裸眼视力"] = "5.3"              # 超出范围
+    rows[4]["左眼-裸眼视力"] = "abc"              # 格式错误
+    rows[5]["身高"] = "一百三"                    # 扩展数据转换失败
+    rows[6]["出生日期"] = "not-a-date"            # 基本信息转换失败
+    rows[7]["右眼散瞳-球镜"] = "0"                # 假性近视
+    rows[8] = dict(rows[1], 身高=None, 家长姓名="李四")   # 文件内重复 education_id
+    rows[9]["第2次干预"] = "2024/05/06 10:00"
+    rows[10]["年龄"] = None                      # 无法判断视力等级
+    return rows
+
+
+def snapshot():
+    students = {s.education_id: {k: v for k, v in s.to_dict().items() if k != "id"}
+                for s in Student.query.all()}
+    extensions = {}
+    for ext in StudentExtension.query.all():
+        data = ext.to_dict()
+        edu_id = db.session.get(Student, ext.student_id).education_id
+        data.pop("id")
+        data.pop("student_id")
+        extensions[(edu_id, ext.data_year)] = data
+    return students, extensions
+
+
+def run_import(engine, frames):
+    results = []
+    for df, year in frames:
+        result = engine(df, year)
+        db.session.commit()
+        results.append(result)
+    return results, snapshot()
+
+
+def reset_tables():
+    ImportFingerprint.query.delete()
+    StudentExtension.query.delete()
+    Student.query.delete()
+    db.session.commit()
+
+
+def test_columnar_import_matches_rowwise(app):
+    existing = make_frame(sample_rows()[:4])
+    frames = [
+        (existing, "2023"),                 # 先导入部分学生的往年数据
+        (make_frame(sample_rows()), "2024"),  # 新年份：已有学生新增扩展记录
+        (make_frame(sample_rows()), "2024"),  # 重复上传：部分更新路径
+    ]
+
+    rowwise_results, rowwise_state = run_import(import_dataframe_rowwise, frames)
+    reset_tables()
+    columnar_results, columnar_state = run_import(import_dataframe, frames)
+
+    for result in columnar_results:
+        assert set(result.pop("timings")) == {"validate", "convert", "calculate", "lookup", "apply", "flush"}
+        assert set(result.pop("stage_rows")) == {"validate", "convert", "calculate", "lookup", "apply", "flush"}
+        assert result.pop("skipped_count") == 0
+        row_errors = result.pop("row_errors")
+        assert set(row_errors) == result["failed_rows"]
+    assert columnar_results == rowwise_results
+    assert columnar_state == rowwise_state
+    assert rowwise_results[1]["failed_rows"] == {2, 3, 4, 5, 6}
+
+
+def test_within_year_change_frame_matches_scalar():
+    rng = np.random.default_rng(7)
+    fields = ["left_eye_naked", "left_eye_naked_interv", "right_eye_naked",
+              "right_eye_naked_interv", "left_sphere", "left_sphere_interv",
+              "right_sphere", "right_sphere_interv", "left_cylinder",
+              "left_cylinder_interv", "right_cylinder", "right_cylinder_interv",
+              "left_axis", "left_axis_interv", "right_axis", "right_axis_interv",
+              "right_dilated_sphere", "right_dilated_sphere_interv"]
+    records = []
+    for _ in range(300):
+        record = {f: (None if rng.random() < 0.15 else
+                      float(rng.choice([-6.5, -3.0, -0.5, -0.25, 0, 0.75, 1.25, 4.8, 5.0, 90])) +
+                      float(rng.integers(-3, 4)) * 0.05)
+                  for f in fields}
+        record["age"] = None if rng.random() < 0.1 else int(rng.integers(5, 14))
+        records.append(record)
+
+    frame = pd.DataFrame(records, dtype=object)
+    calc = calculate_within_year_change_frame(frame)
+    for i, record in enumerate(records):
+        expected = calculate_within_year_change(type("R", (), record)())
+        assert calc.iloc[i].to_dict() == expected
+
+
+def test_fill_empty_update_covers_all_columns(app):
+    rows = sample_rows()
+    # 先导入只有必填字段与年级的表格，再上传完整表格：已有记录的全部空字段均被补充
+    required = ["教育ID号", "学校", "班级", "姓名", "性别", "年级"]
+    sparse = make_frame([{label: row[label] for label in required} for row in rows])
+    full = make_frame(rows)
+    full["体重"] = "30.5"
+    full.loc[0, "体重"] = "三十"                   # 扩展字段格式错误：该行失败，此前的字段已补充
+    full.loc[1, "年级"] = "四年级"                 # 已有数据不覆盖
+    frames = [(sparse, "2024"), (full, "2024")]
+
+    rowwise_results, rowwise_state = run_import(import_dataframe_rowwise, frames)
+    reset_tables()
+    columnar_results, columnar_state = run_import(import_dataframe, frames)
+
+    for result in columnar_results:
+        for key in ("timings", "stage_rows", "skipped_count", "row_errors"):
+            result.pop(key)
+    assert columnar_results == rowwise_results
+    assert columnar_state == rowwise_state
+    assert "第2行: '体重' 数据格式错误" in columnar_results[1]["error_messages"]
+
+    students, extensions = columnar_state
+    assert students["E0000"]["birthday"] == "2015-03-01"
+    assert extensions[("E0000", "2024")]["height"] == 130.5
+    assert extensions[("E0000", "2024")]["weight"] is None
+    assert extensions[("E0000", "2024")]["right_naked_change"] is None
+    updated = extensions[("E0001", "2024")]
+    assert updated["grade"] == "三年级"
+    assert updated["weight"] == 30.5
+    assert updated["right_sphere"] == -0.25
+    # 布尔字段的空单元格导入时按 "否" 写入，已有取值，不再补充
+    assert updated["guasha"] is False
+    assert updated["interv1"] is not None
+    assert updated["right_naked_change"] == 0.2
+
+
+def test_reupload_uses_batched_lookups(app, statements):
+    df = make_frame(sample_rows())
+    import_dataframe(df, "2024")
+    db.session.commit()
+    db.session.expunge_all()
+
+    statements.clear()
+    result = import_dataframe(df, "2024", lookup_chunk_size=4)
+
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    # 7 个已有学生：按每块 4 个分 2 次查学生、2 次查扩展记录，部分更新后再分 2 次读回扩展记录重新计算
+    assert len(selects) == 6
+    writes = [s for s in statements if not s.lstrip().upper().startswith(("SELECT", "SAVEPOINT", "RELEASE"))]
+    # 部分更新不再逐行执行：学生、扩展记录、计算字段各一条批量语句；
+    # 另有一条语句记录行指纹、一条语句删除文件内重复教育ID号的指纹
+    assert len(writes) == 5
+    assert result["imported_count"] == 7
+
+
+def test_chunked_file_import_matches_single_chunk(app, tmp_path):
+    path = tmp_path / "upload.csv"
+    make_frame(sample_rows()).to_csv(path, index=False)
+
+    whole = import_file(str(path), "csv", "2024", chunk_size=100)
+    whole_state = snapshot()
+    reset_tables()
+    progress = []
+    chunked = import_file(str(path), "csv", "2024", chunk_size=5,
+                          on_chunk=lambda done, failed: progress.append((done, failed)))
+
+    assert snapshot() == whole_state
+    for key in ("imported_count", "row_errors", "error_messages", "failed_rows", "total_rows"):
+        assert chunked[key] == whole[key]
+    pd.testing.assert_frame_equal(chunked["failed_df"], whole["failed_df"])
+    assert list(chunked["failed_df"].index) == [2, 3, 4, 5, 6]
+    assert progress == [(5, 3), (10, 5), (12, 5)]
+
+
+def test_parallel_prepare_matches_serial():
+    df = make_frame(sample_rows() * 3)
+    df.index = df.index + 100
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = prepare_frame_parallel(df, executor, 4)
+    serial = prepare_frame(df)
+
+    assert parallel == serial
+    assert list(parallel["validation_errors"]) == sorted(parallel["validation_errors"])
+    assert parallel["validation_errors"][102] == ["第104行: 缺失必填字段 '姓名'"]
+
+
+def test_parallel_file_import_matches_serial(app, tmp_path, monkeypatch):
+    path = tmp_path / "upload.csv"
+    make_frame(sample_rows()).to_csv(path, index=False)
+
+    serial = import_file(str(path), "csv", "2024")
+    serial_state = snapshot()
+    reset_tables()
+    monkeypatch.setattr(import_service, "PARALLEL_MIN_ROWS", 1)
+    parallel = import_file(str(path), "csv", "2024", workers=2)
+
+    assert snapshot() == serial_state
+    for key in ("imported_count", "error_messages", "failed_rows", "total_rows"):
+        assert parallel[key] == serial[key]
+    assert set(parallel["timings"]) == set(import_service.STAGE_NAMES)
+
+
+def test_failures_workbook_uses_row_index(tmp_path):
+    df = make_frame(sample_rows() * 2)
+    # "第2行" 是 "第20行" 的子串，按行索引取错误信息时不应混淆
+    row_errors = {0: ["第2行: 缺失必填字段 '姓名'"], 18: ["第20行: 格式错误"], 19: []}
+    path = tmp_path / "failures.xlsx"
+    write_failures_workbook(df, row_errors, str(path))
+
+    written = pd.read_excel(path, dtype=str)
+    assert list(written.columns) == list(df.columns) + ["错误信息"]
+    assert list(written["教育ID号"]) == [df.loc[i, "教育ID号"] for i in (0, 18, 19)]
+    assert list(written["错误信息"].fillna("")) == [
+        "第2行: 缺失必填字段 '姓名'", "第20行: 格式错误", ""]
+
+
+def test_constraint_violation_rolls_back_only_failing_rows(app, monkeypatch):
+    import_dataframe(make_frame(sample_rows()[:2]), "2023")
+    db.session.commit()
+    db.session.expunge_all()
+
+    # 模拟并发导入：预取时未看到已有学生，批量写入学生时违反 education_id 唯一约束
+    monkeypatch.setattr(import_service, "prefetch_existing_records",
+                        lambda education_ids, data_year, chunk_size=None: ({}, {}))
+    result = import_dataframe(make_frame(sample_rows()), "2024")
+    db.session.commit()
+
+    assert sorted(result["row_errors"]) == [0, 1, 2, 3, 4, 5, 6, 8]
+    assert "UNIQUE constraint failed" in result["row_errors"][0][0]
+    assert result["row_errors"][0][0].startswith("第2行: 数据写入错误")
+    assert list(result["row_errors"]) == sorted(result["row_errors"])
+    assert result["imported_count"] == 4
+    assert StudentExtension.query.filter_by(data_year="2024").count() == 4
+    # 扩展数据转换失败的第 5 行仍写入学生基本信息
+    assert Student.query.count() == 2 + 5
+
+
+def test_file_import_reports_batch_throughput(app, tmp_path):
+    path = tmp_path / "upload.csv"
+    make_frame(sample_rows()).to_csv(path, index=False)
+
+    result = import_file(str(path), "csv", "2024", chunk_size=5)
+    assert [batch["rows"] for batch in result["batches"]] == [5, 5, 2]
+    assert [batch["failed"] for batch in result["batches"]] == [3, 2, 0]
+    assert sum(batch["imported"] for batch in result["batches"]) == result["imported_count"]
+    assert all(batch["rows_per_second"] > 0 for batch in result["batches"])
+
+
+def test_incremental_import_writes_only_changed_rows(app, statements):
+    df = make_frame(sample_rows())
+    import_dataframe(df, "2024", incremental=True)
+    db.session.commit()
+    # 成功导入且教育ID号不重复的行记录了指纹
+    assert ImportFingerprint.query.count() == 5
+
+    corrected = df.copy()
+    corrected.loc[0, "姓名"] = "学生零"
+    corrected.loc[0, "右眼-裸眼视力"] = "4.6"
+    corrected.loc[7, "身高"] = None               # 清空的单元格不清除已有数据
+
+    statements.clear()
+    result = import_dataframe(corrected, "2024", incremental=True)
+    db.session.commit()
+
+    # 第 9-11 行内容未变化，直接跳过；其余行照常处理，失败行仍然失败
+    assert result["skipped_count"] == 3
+    assert result["failed_rows"] == {2, 3, 4, 5, 6}
+    assert result["imported_count"] == 4
+    student = Student.query.filter_by(education_id="E0000").one()
+    assert student.name == "学生零"
+    extension = StudentExtension.query.filter_by(student_id=student.id).one()
+    assert extension.right_eye_naked == 4.6
+    assert extension.right_naked_change == 0.4
+    e7 = Student.query.filter_by(education_id="E0007").one()
+    assert StudentExtension.query.filter_by(student_id=e7.id).one().height == 130.5
+    # 只写入变化的字段
+    assert any(s.startswith("UPDATE students SET name=?") for s in statements)
+    assert any(s.startswith("UPDATE student_extensions SET right_eye_naked=?") for s in statements)
+
+    # 再次增量导入同一内容：全部成功行均被跳过
+    again = import_dataframe(corrected, "2024", incremental=True)
+    assert again["skipped_count"] == 5
+
+
+def test_incremental_import_fails_rows_with_conversion_errors(app):
+    df = make_frame(sample_rows())
+    df["右眼裸眼视力变化"] = "0.2"
+    import_dataframe(df, "2024", incremental=True)
+    db.session.commit()
+
+    corrected = df.copy()
+    corrected.loc[0, "姓名"] = "学生零"
+    corrected.loc[0, "右眼裸眼视力变化"] = "abc"      # 计算字段列转换失败
+    corrected.loc[9, "姓名"] = "学生九"
+    result = import_dataframe(corrected, "2024", incremental=True)
+    db.session.commit()
+
+    # 转换失败的行计入失败，不覆盖任何已有取值，也不记录指纹
+    assert result["row_errors"][0] == [
+        "第2行: 扩展数据写入错误: could not convert string to float: 'abc'"]
+    assert Student.query.filter_by(education_id="E0000").one().name == "学生0"
+    student = Student.query.filter_by(education_id="E0009").one()
+    assert student.name == "学生九"
+    assert StudentExtension.query.filter_by(student_id=student.id).one().right_naked_change == 0.2
+    again = import_dataframe(corrected, "2024", incremental=True)
+    assert 0 in again["row_errors"] and again["skipped_count"] == 4
+
+
+def test_multi_year_file_routes_rows_by_year(app, tmp_path, monkeypatch):
+    rows = []
+    for row in sample_rows():
+        rows.append(dict(row, 数据年份="2023"))
+        rows.append(dict(row, 数据年份=None, 身高="140"))     # 空的数据年份使用上传时选择的年份
+    rows.append(dict(sample_rows()[0], 数据年份="23"))         # 格式错误
+    df = make_frame(rows)
+    path = tmp_path / "years.csv"
+    df.to_csv(path, index=False)
+
+    # 期望结果：按年份拆分后分别导入
+    for year in ("2023", "2024"):
+        part = df[df["数据年份"].fillna("2024") == year]
+        import_dataframe(part, year)
+        db.session.commit()
+    expected = snapshot()
+
+    for workers in (1, 2):
+        reset_tables()
+        monkeypatch.setattr(import_service, "PARALLEL_MIN_ROWS", 1)
+        result = import_file(str(path), "csv", "2024", chunk_size=100, workers=workers)
+        assert snapshot() == expected
+        assert result["years"] == {"2023": 12, "2024": 13}
+        assert [(batch["data_year"], batch["rows"]) for batch in result["batches"]] == [("2023", 12), ("2024", 13)]
+        assert result["row_errors"][24] == ["第26行: '数据年份' 格式错误"]
+        assert list(result["row_errors"]) == sorted(result["row_errors"])
+        # 2023 年新建的学生在 2024 年直接新增扩展记录（第 6 行的身高在 2024 年的行中已修正）
+        assert Student.query.count() == 7
+        assert StudentExtension.query.filter_by(data_year="2023").count() == 6
+        assert StudentExtension.query.filter_by(data_year="2024").count() == 7
+
+
+def test_fill_empty_reimport_does_not_record_fingerprints(app):
+    df = make_frame(sample_rows())
+    import_dataframe(df, "2024")
+    db.session.commit()
+    # 非增量导入不记录指纹
+    assert ImportFingerprint.query.count() == 0
+
+    import_dataframe(df, "2024", incremental=True)
+    db.session.commit()
+    assert ImportFingerprint.query.count() == 5
+
+    # 普通导入更正后的表格：仅补充空字段，姓名不会被覆盖，已记录的指纹随之删除
+    corrected = df.copy()
+    corrected.loc[0, "姓名"] = "学生零"
+    import_dataframe(corrected, "2024")
+    db.session.commit()
+    assert Student.query.filter_by(education_id="E0000").one().name == "学生0"
+    assert ImportFingerprint.query.count() == 0
+
+    # 增量导入更正后的表格：该行不会被跳过，更正写入数据库
+    result = import_dataframe(corrected, "2024", incremental=True)
+    db.session.commit()
+    assert result["skipped_count"] == 0
+    assert Student.query.filter_by(education_id="E0000").one().name == "学生零"
+    assert ImportFingerprint.query.count() == 5
+
@@ -0,0 +1,83 @@
+# 文件名称：test_parsed_cache.py
+# 完整路径：backend/tests/test_parsed_cache.py
+# 功能说明：上传文件解析结果缓存测试（命中跳过解析、按块重新切分、LRU 淘汰、版本逐行比较）
+
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from backend.services import parsed_cache
+from backend.services.parsed_cache import (
+    diff_parsed_frames,
+    evict_parsed_cache,
+    is_cached,
+    iter_cached_chunks,
+    load_parsed_frame,
+)
+from backend.services.upload_reader import iter_upload_chunks
+from backend.tests.test_upload_reader import write_workbook
+
+
+def test_cached_chunks_skip_parse(tmp_path, monkeypatch):
+    path = str(tmp_path / "upload.xlsx")
+    write_workbook(path)
+    cache_dir = str(tmp_path / "cache")
+    expected = pd.concat(iter_upload_chunks(path, "xlsx", 100))
+
+    first = list(iter_cached_chunks(path, "xlsx", 4, cache_dir, "a" * 64))
+    pd.testing.assert_frame_equal(pd.concat(first), expected)
+    assert is_cached(cache_dir, "a" * 64)
+
+    def fail(*args):
+        raise AssertionError("缓存命中时不应重新解析文件")
+
+    monkeypatch.setattr(parsed_cache, "iter_upload_chunks", fail)
+    for chunk_size in (1, 3, 100):
+        chunks = list(iter_cached_chunks(path, "xlsx", chunk_size, cache_dir, "a" * 64))
+        assert all(len(chunk) <= chunk_size for chunk in chunks)
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+    pd.testing.assert_frame_equal(load_parsed_frame(cache_dir, "a" * 64), expected)
+
+
+def test_incomplete_read_is_not_cached(tmp_path):
+    path = str(tmp_path / "upload.xlsx")
+    write_workbook(path)
+    cache_dir = str(tmp_path / "cache")
+
+    chunks = iter_cached_chunks(path, "xlsx", 2, cache_dir, "b" * 64)
+    next(chunks)
+    chunks.close()
+    assert os.listdir(cache_dir) == []
+
+    with pytest.raises(Exception):
+        list(iter_cached_chunks(str(tmp_path / "missing.csv"), "csv", 2, cache_dir, "c" * 64))
+    assert os.listdir(cache_dir) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache_dir = tmp_path / "cache"
+    for number, name in enumerate(["old", "used", "new"]):
+        entry = cache_dir / name
+        entry.mkdir(parents=True)
+        (entry / "part_00000.pkl").write_bytes(b"x" * 100)
+        os.utime(entry, (time.time() - 100 + number, time.time() - 100 + number))
+    # 最早写入的条目最近被读取过
+    os.utime(cache_dir / "old")
+
+    assert evict_parsed_cache(str(cache_dir), max_bytes=200) == ["used"]
+    assert sorted(os.listdir(cache_dir)) == ["new", "old"]
+
+
+def test_diff_reports_changed_rows():
+    previous = pd.DataFrame({"教育ID号": ["E1", "E2", "E3", "E4"],
+                             "姓名": ["张三", "李四", None, "赵六"],
+                             "身高": ["120", "130", "140", "150"]})
+    current = pd.DataFrame({"教育ID号": ["E1", "E2 ", "E3", "E5", None],
+                            "姓名": ["张三", "李四", "", "钱七", "孙八"],
+                            "身高": ["120", "131", "140", "160", "170"],
+                            "备注": ["新增列", None, None, None, None]})
+
+    diff = diff_parsed_frames(previous, current)
+    assert diff == {"added": [3, 4], "changed": [1], "unchanged": [0, 2], "removed": ["E4"]}
@@ -0,0 +1,221 @@
+# 文件名称：test_query_api.py
+# 完整路径：backend/tests/test_query_api.py
+# 功能说明：学生数据查询与导出接口测试（数据库分页、游标分页、列投影、流式导出、查询结果缓存、每页语句数）
+
+import io
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from backend.api.query_api import query_api
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.models.student_extension import StudentExtension
+from backend.services.query_service import clear_query_cache, data_version, with_extensions
+
+
+@pytest.fixture
+def client(app):
+    clear_query_cache()
+    app.register_blueprint(query_api)
+    # 11 名学生：前 8 名各有 2023、2024 两年的扩展记录，后 3 名没有扩展记录，共 19 行
+    for index in range(11):
+        student = Student(education_id=f"E{index:03d}", school="测试小学",
+                          class_name="一班", name=f"学生{index}", gender="男")
+        db.session.add(student)
+        db.session.flush()
+        if index < 8:
+            for year in ("2023", "2024"):
+                db.session.add(StudentExtension(student_id=student.id, data_year=year, grade="一年级"))
+    db.session.commit()
+    yield app.test_client()
+    clear_query_cache()
+
+
+def row_keys(students):
+    return [(row["education_id"], row.get("data_year", "")) for row in students]
+
+
+def all_offset_rows(client, per_page):
+    rows = []
+    page = 1
+    while True:
+        body = client.get(f"/api/students/query?page={page}&per_page={per_page}").get_json()
+        if not body["students"]:
+            return rows
+        rows.extend(row_keys(body["students"]))
+        page += 1
+
+
+def test_offset_pagination_runs_in_sql(client, statements):
+    body = client.get("/api/students/query?page=2&per_page=5").get_json()
+
+    assert body["total"] == 19
+    assert body["page"] == 2 and body["per_page"] == 5
+    assert row_keys(body["students"]) == [
+        ("E002", "2024"), ("E003", "2023"), ("E003", "2024"), ("E004", "2023"), ("E004", "2024")]
+    page_query = next(s for s in statements if "student_extensions.data_year" in s)
+    assert "LIMIT" in page_query and "OFFSET" in page_query
+
+
+def test_keyset_pagination_matches_offset_pages(client):
+    expected = all_offset_rows(client, 4)
+    assert len(expected) == 19
+    assert expected[-3:] == [("E008", ""), ("E009", ""), ("E010", "")]
+
+    rows = []
+    cursor = ""
+    pages = 0
+    while cursor is not None:
+        body = client.get(f"/api/students/query?cursor={cursor}&per_page=4").get_json()
+        rows.extend(row_keys(body["students"]))
+        cursor = body["next_cursor"]
+        pages += 1
+    assert rows == expected
+    assert pages == 5
+
+
+def test_total_count_is_cached_between_pages(client, statements):
+    client.get("/api/students/query?page=1&per_page=5&school=测试")
+    client.get("/api/students/query?page=2&per_page=5&school=测试")
+    counts = [s for s in statements if "count(" in s.lower()]
+    assert len(counts) == 1
+
+    body = client.get("/api/students/query?page=1&per_page=5&data_year=2024").get_json()
+    assert body["total"] == 8
+    assert len([s for s in statements if "count(" in s.lower()]) == 2
+
+
+def test_per_page_is_capped_and_bad_cursor_rejected(client):
+    body = client.get("/api/students/query?per_page=100000&page=0").get_json()
+    assert body["per_page"] == 1000 and body["page"] == 1
+    assert len(body["students"]) == 19
+
+    response = client.get("/api/students/query?cursor=abc")
+    assert response.status_code == 400
+
+
+def test_fields_projection_selects_only_requested_columns(client, statements):
+    full = client.get("/api/students/query?page=1&per_page=4").get_json()["students"]
+    body = client.get("/api/students/query?page=1&per_page=4&fields=education_id,grade,interv1").get_json()
+
+    assert body["total"] == 19
+    assert body["students"] == [
+        {"education_id": row["education_id"], "grade": row["grade"], "interv1": row["interv1"]}
+        for row in full]
+    # 总记录数已由第一次请求缓存，最后一条语句即为投影分页查询
+    page_query = statements[-1]
+    assert "student_extensions.grade" in page_query
+    assert "student_extensions.vision_level" not in page_query
+    assert "students.phone" not in page_query
+
+
+def test_fields_projection_with_keyset_and_unknown_field(client):
+    rows = []
+    cursor = ""
+    while cursor is not None:
+        body = client.get(f"/api/students/query?cursor={cursor}&per_page=6&fields=education_id,data_year").get_json()
+        rows.extend(row_keys(body["students"]))
+        cursor = body["next_cursor"]
+    assert rows == all_offset_rows(client, 6)
+
+    response = client.get("/api/students/query?fields=name,no_such_field")
+    assert response.status_code == 400
+    assert "no_such_field" in response.get_json()["error"]
+
+
+def test_csv_export_streams_selected_columns(client, statements):
+    response = client.get("/api/students/export?format=csv&columns=education_id,data_year,interv1")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).lstrip("\ufeff").splitlines()
+    assert lines[0] == "教育ID号,数据年份,第1次干预"
+    assert lines[1:3] == ["E000,2023,", "E000,2024,"]
+    assert lines[-1] == "E010,,"
+    assert len(lines) == 20
+    export_query = statements[-1]
+    assert "student_extensions.grade" not in export_query
+    assert "students.phone" not in export_query
+
+
+def test_xlsx_export_writes_all_rows(client):
+    response = client.get("/api/students/export?columns=education_id,name,grade")
+
+    assert response.status_code == 200
+    frame = pd.read_excel(io.BytesIO(response.get_data()), dtype=str).fillna("")
+    response.close()
+    assert list(frame.columns) == ["教育ID号", "姓名", "年级"]
+    assert len(frame) == 19
+    assert frame.iloc[0].tolist() == ["E000", "学生0", "一年级"]
+    assert frame.iloc[-1].tolist() == ["E010", "学生10", ""]
+
+
+def test_export_rejects_unknown_column_and_empty_result(client):
+    assert client.get("/api/students/export?columns=name,no_such_field").status_code == 400
+    assert client.get("/api/students/export?school=不存在").status_code == 404
+
+
+def test_identical_filters_are_served_from_cache(client, statements):
+    conditions = '[{"field":"grade","operator":"like","value":"一"},{"field":"age","operator":"!=","value":99}]'
+    reordered = '[{"field":"age","operator":"!=","value":99},{"field":"grade","operator":"like","value":"一"}]'
+    first = client.get(f"/api/students/query?school=测试&per_page=5&advanced_conditions={conditions}").get_json()
+    executed = len(statements)
+
+    second = client.get(f"/api/students/query?per_page=5&school=%20测试%20&name=&advanced_conditions={reordered}")
+    assert second.get_json() == first
+    assert len(statements) == executed
+
+    client.get(f"/api/students/query?school=测试&per_page=5&page=2&advanced_conditions={conditions}")
+    assert not any("count(" in s.lower() for s in statements[executed:])
+
+
+def test_committed_student_writes_invalidate_cache(client):
+    url = "/api/students/query?per_page=1&fields=name"
+    assert client.get(url).get_json()["students"] == [{"name": "学生0"}]
+    version = data_version()
+
+    db.session.execute(text("UPDATE students SET name = '改名' WHERE education_id = 'E000'"))
+    db.session.rollback()
+    assert data_version() == version
+    assert client.get(url).get_json()["students"] == [{"name": "学生0"}]
+
+    db.session.execute(text("UPDATE students SET name = '改名' WHERE education_id = 'E000'"))
+    db.session.commit()
+    assert data_version() == version + 1
+    assert client.get(url).get_json()["students"] == [{"name": "改名"}]
+
+    db.session.add(Student(education_id="E999", name="新生"))
+    db.session.commit()
+    assert client.get(url).get_json()["total"] == 20
+
+
+@pytest.mark.parametrize("per_page", [3, 19])
+def test_statements_per_page_do_not_grow_with_rows(client, statements, per_page):
+    body = client.get(f"/api/students/query?per_page={per_page}").get_json()
+    assert len(body["students"]) == per_page
+    # 一条分页查询 + 一条计数查询，与每页记录数无关
+    assert len(statements) == 2
+
+    statements.clear()
+    body = client.get(f"/api/students/query?per_page={per_page}&fields=name,data_year").get_json()
+    assert len(body["students"]) == per_page
+    assert len(statements) == 1
+
+
+def test_extensions_keyed_by_year_and_selectin_loaded(client, statements):
+    students = with_extensions(Student.query.order_by(Student.id)).all()
+    years = [sorted(student.extensions) for student in students]
+    # 一条学生查询 + 一条 selectin 查询
+    assert len(statements) == 2
+    assert years == [["2023", "2024"]] * 8 + [[]] * 3
+    assert students[0].extensions["2024"].student is students[0]
+
+    db.session.expunge_all()
+    statements.clear()
+    for student in Student.query.order_by(Student.id).all():
+        student.extensions.get("2024")
+    # 未预加载时每名学生各一条查询（N+1）
+    assert len(statements) == 1 + 11
+
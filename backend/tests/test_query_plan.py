@@ -0,0 +1,39 @@
+# 文件名称：test_query_plan.py
+# 完整路径：backend/tests/test_query_plan.py
+# 功能说明：查询执行计划检查测试（常用查询与报表不出现全表扫描，缺少索引时能够检出）
+
+from backend.infrastructure.database import db
+from backend.services.query_plan import check_query_plans, full_scans
+from backend.services.student_search import ensure_search_index
+
+
+def test_app_query_shapes_use_indexes(app):
+    ensure_search_index(db.engine)
+
+    results = check_query_plans(app)
+
+    assert results
+    assert [r["name"] for r in results if r["full_scans"]] == []
+    report = next(r for r in results if r["name"].startswith("报表：按年龄段"))
+    assert any("COVERING INDEX ix_student_extensions_year_vision_age" in d for d in report["plan"])
+
+
+def test_unindexed_filter_is_flagged(app):
+    shape = {"name": "身高", "kind": "query", "allow_scan": (),
+             "args": {"advanced_conditions": '[{"field":"height","operator":">","value":150}]'}}
+
+    results = check_query_plans(app, [shape])
+
+    assert all(r["full_scans"] for r in results)
+
+
+def test_full_scans_ignores_index_scans_and_allowed_tables():
+    plan = [
+        "SCAN students",
+        "SCAN students USING COVERING INDEX ix_students_school",
+        "SCAN student_extensions AS e",
+        "SCAN students_fts VIRTUAL TABLE INDEX 0:M4",
+        "SEARCH student_extensions USING INDEX uq_student_year (student_id=?)",
+    ]
+    assert full_scans(plan) == ["SCAN students", "SCAN student_extensions AS e"]
+    assert full_scans(plan, allow_scan=("students",)) == ["SCAN student_extensions AS e"]
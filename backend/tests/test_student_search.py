@@ -0,0 +1,103 @@
+# 文件名称：test_student_search.py
+# 完整路径：backend/tests/test_student_search.py
+# 功能说明：学生文本检索测试（FTS5 全文索引同步、精确/前缀/包含匹配的索引选择、完整取值自动精确匹配）
+
+import pytest
+
+from backend.api.query_api import query_api
+from backend.infrastructure.database import db
+from backend.models.student import Student
+from backend.services.query_service import clear_query_cache
+from backend.services.student_search import ensure_search_index, text_filter
+
+STUDENTS = [
+    ("E1001", "华兴小学", "一班", "张三丰"),
+    ("E1002", "华兴小学", "二班", "张小明"),
+    ("E2001", "苏宁红军小学", "一班", "李张伟"),
+    ("X3001", "师大附小清华小学", "三班", "王五"),
+]
+
+
+@pytest.fixture
+def client(app):
+    clear_query_cache()
+    # 先写入部分数据再建索引，验证新建时按现有数据重建
+    db.session.add(Student(education_id=STUDENTS[0][0], school=STUDENTS[0][1],
+                           class_name=STUDENTS[0][2], name=STUDENTS[0][3]))
+    db.session.commit()
+    assert ensure_search_index(db.engine)
+    for education_id, school, class_name, name in STUDENTS[1:]:
+        db.session.add(Student(education_id=education_id, school=school, class_name=class_name, name=name))
+    db.session.commit()
+    app.register_blueprint(query_api)
+    yield app.test_client()
+    clear_query_cache()
+
+
+def names(client, query_string):
+    body = client.get(f"/api/students/query?per_page=100&fields=name&{query_string}").get_json()
+    return sorted(row["name"] for row in body["students"])
+
+
+def plan(clause):
+    statement = db.session.query(Student.id).filter(clause).statement
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    return " ".join(row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_contains_prefix_and_exact_matching(client):
+    assert names(client, "name=张三丰") == ["张三丰"]
+    assert names(client, "school=红军小") == ["李张伟"]
+    assert names(client, "name=张") == ["张三丰", "张小明", "李张伟"]
+    assert names(client, "name=张*") == ["张三丰", "张小明"]
+    assert names(client, "education_id=e10*") == ["张三丰", "张小明"]
+    assert names(client, "education_id=E100") == ["张三丰", "张小明"]
+    assert names(client, "education_id==E1001") == ["张三丰"]
+    assert names(client, "education_id==E100") == []
+    assert names(client, "school=华兴小学&class_name=二班") == ["张小明"]
+
+
+def test_search_index_follows_updates_and_deletes(client):
+    student = Student.query.filter_by(education_id="X3001").one()
+    student.name = "王五六"
+    db.session.commit()
+    assert names(client, "name=王五六") == ["王五六"]
+
+    db.session.delete(student)
+    db.session.commit()
+    assert names(client, "name=王五六") == []
+    assert names(client, "school=清华小学") == []
+
+
+def test_query_plans_use_indexes(client):
+    assert "students_fts" in plan(text_filter(Student.name, "张三丰", db.engine))
+    assert "ix_students_name" in plan(text_filter(Student.name, "张*", db.engine))
+    assert "students_fts" in plan(text_filter(Student.education_id, "e10*", db.engine))
+    assert "education_id" in plan(text_filter(Student.education_id, "=E1001", db.engine))
+    # 完整的教育ID号自动走唯一索引，不经过全文索引
+    assert "students_fts" not in plan(text_filter(Student.education_id, "E1001", db.engine))
+    assert "students_fts" in plan(text_filter(Student.education_id, "E100", db.engine))
+    # 少于 3 个字符的包含匹配无法使用 trigram 索引，退回 ILIKE
+    assert "SCAN students" in plan(text_filter(Student.name, "张", db.engine))
+
+
+def test_without_search_index_falls_back_to_ilike(app):
+    clause = text_filter(Student.name, "张三丰", db.engine)
+    assert "lower" in str(clause.compile(dialect=db.engine.dialect))
+
+
+def test_complete_values_switch_to_exact_match(client):
+    for education_id, class_name, name in (("1", "1班", "甲"), ("11", "11班", "乙"), ("21", "2班", "丙")):
+        db.session.add(Student(education_id=education_id, school="华兴小学", class_name=class_name, name=name))
+    db.session.commit()
+
+    assert names(client, "education_id=1") == ["甲"]
+    assert names(client, "education_id=E1001") == ["张三丰"]
+    assert names(client, "class_name=1班") == ["甲"]
+    # 不是已有的完整取值时仍按包含匹配
+    assert names(client, "education_id=2") == ["丙", "张小明", "李张伟"]
+    assert names(client, "class_name=班") == ["丙", "乙", "张三丰", "张小明", "李张伟", "王五", "甲"]
+    # 学校、姓名不自动精确匹配
+    assert names(client, "name=甲") == ["甲"]
+    assert names(client, "school=华兴小学") == ["丙", "乙", "张三丰", "张小明", "甲"]
+
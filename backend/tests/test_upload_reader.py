@@ -0,0 +1,77 @@
+# 文件名称：test_upload_reader.py
+# 完整路径：backend/tests/test_upload_reader.py
+# 功能说明：流式分块读取与 pd.read_excel / pd.read_csv(dtype=str) 整表读取结果的一致性测试
+
+from datetime import date, datetime
+
+import pandas as pd
+from openpyxl import Workbook
+
+from backend.services.upload_reader import estimate_row_count, iter_upload_chunks
+
+
+def write_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["教育ID号", " 姓名 ", "年龄", "右眼-裸眼视力", "出生日期", "备注", "备注"])
+    ws.append(["E0001", "张三", 9, 4.8, datetime(2015, 3, 1), "NA", 1])
+    ws.append([None] * 7)                                  # 中间空行保留
+    ws.append(["E0002", "", 10.0, 5, date(2016, 1, 2), True])
+    ws.append(["E0003", None, "11", None, "2015/1/1", "#DIV/0!"])
+    for i in range(4, 12):
+        ws.append([f"E{i:04d}", f"学生{i}", 6 + i % 7, 4.5 + i / 10])
+    ws.append([None])                                      # 末尾空行去除
+    ws.append([])
+    wb.save(path)
+
+
+def test_xlsx_chunks_match_read_excel(tmp_path):
+    path = tmp_path / "upload.xlsx"
+    write_workbook(path)
+    expected = pd.read_excel(path, dtype=str)
+    expected.columns = expected.columns.str.strip()
+
+    for chunk_size in (1, 4, 100):
+        chunks = list(iter_upload_chunks(str(path), "xlsx", chunk_size))
+        assert all(len(chunk) <= chunk_size for chunk in chunks)
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_csv_chunks_match_read_csv(tmp_path):
+    path = tmp_path / "upload.csv"
+    write_workbook(tmp_path / "upload.xlsx")
+    pd.read_excel(tmp_path / "upload.xlsx", dtype=str).to_csv(path, index=False)
+    expected = pd.read_csv(path, dtype=str)
+    expected.columns = expected.columns.str.strip()
+
+    chunks = list(iter_upload_chunks(str(path), "csv", 4))
+    assert len(chunks) == 3
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_empty_workbook_yields_nothing(tmp_path):
+    path = tmp_path / "empty.xlsx"
+    Workbook().save(path)
+    assert list(iter_upload_chunks(str(path), "xlsx", 10)) == []
+
+
+def test_year_sheets_are_read_in_one_pass(tmp_path):
+    path = tmp_path / "years.xlsx"
+    wb = Workbook()
+    first = wb.active
+    first.title = "2023"
+    first.append(["教育ID号", "姓名"])
+    for i in range(3):
+        first.append([f"E{i:04d}", f"学生{i}"])
+    second = wb.create_sheet(" 2024 ")
+    second.append(["姓名", "教育ID号", "身高"])
+    for i in range(2):
+        second.append([f"学生{i}", f"E{i:04d}", 130 + i])
+    wb.save(path)
+
+    chunks = list(iter_upload_chunks(str(path), "xlsx", 2))
+    # 一块只包含同一工作表的行，行索引在工作表之间连续编号
+    assert [list(chunk.index) for chunk in chunks] == [[0, 1], [2], [3, 4]]
+    assert [set(chunk["数据年份"]) for chunk in chunks] == [{"2023"}, {"2023"}, {"2024"}]
+    assert list(chunks[2]["身高"]) == ["130", "131"]
+    assert estimate_row_count(str(path), "xlsx") == 5
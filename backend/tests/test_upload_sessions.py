@@ -0,0 +1,146 @@
+# 文件名称：test_upload_sessions.py
+# 完整路径：backend/tests/test_upload_sessions.py
+# 功能说明：分块（可续传）上传与重复文件识别测试（含并发重发分块、过期会话清理）
+
+import hashlib
+import io
+import os
+import threading
+from datetime import datetime, timedelta
+
+from backend.infrastructure.database import db
+from backend.models.import_job import ImportJob
+from backend.models.upload_session import UploadSession
+from backend.services.import_jobs import wait_import_job
+from backend.services.upload_sessions import (
+    append_upload_chunk,
+    create_upload_session,
+    part_path,
+    received_bytes,
+)
+from backend.tests.test_import_jobs import upload
+from backend.tests.test_import_service import make_frame, sample_rows
+
+
+def workbook_bytes():
+    buffer = io.BytesIO()
+    make_frame(sample_rows()).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def init(client, content, **extra):
+    return client.post("/api/students/import/uploads", json={
+        "filename": "学生数据.xlsx", "data_year": "2024", "total_size": len(content),
+        "file_hash": hashlib.sha256(content).hexdigest(), **extra})
+
+
+def test_chunked_upload_resumes_and_imports(client, tmp_path):
+    content = workbook_bytes()
+    half = len(content) // 2
+
+    response = init(client, content)
+    assert response.status_code == 201
+    session = response.get_json()
+    assert session["received_bytes"] == 0
+    assert client.put(f"{session['chunk_url']}?offset=0", data=content[:half]).status_code == 200
+    # 重复发送已接收的分块：幂等，不重复写入
+    resent = client.put(f"{session['chunk_url']}?offset=0", data=content[:half])
+    assert resent.get_json()["received_bytes"] == half
+    # 未上传完整时不能完成
+    assert client.post(session["complete_url"]).status_code == 409
+
+    # 连接中断后以同一文件重新创建会话：返回原会话与已接收字节数
+    resumed = init(client, content)
+    assert resumed.status_code == 200
+    assert resumed.get_json()["upload_id"] == session["upload_id"]
+    assert resumed.get_json()["received_bytes"] == half
+
+    # 偏移量不衔接的分块被拒绝
+    gap = client.put(f"{session['chunk_url']}?offset={half + 1}", data=content[half + 1:])
+    assert gap.status_code == 409
+    assert gap.get_json()["received_bytes"] == half
+
+    assert client.put(f"{session['chunk_url']}?offset={half}", data=content[half:]).status_code == 200
+    completed = client.post(session["complete_url"])
+    assert completed.status_code == 202
+    job_id = completed.get_json()["job_id"]
+    wait_import_job(job_id, timeout=30)
+    assert client.get(completed.get_json()["status_url"]).get_json()["imported_count"] == 7
+    # 重复调用完成接口返回同一任务
+    assert client.post(session["complete_url"]).get_json()["job_id"] == job_id
+
+    # 同一文件再次提交：直接返回已有任务，不再导入
+    duplicate = init(client, content)
+    assert duplicate.status_code == 200
+    assert duplicate.get_json()["duplicate"] is True
+    assert duplicate.get_json()["job_id"] == job_id
+    again = upload(client, content)
+    assert again.status_code == 200
+    assert again.get_json()["job_id"] == job_id
+    assert ImportJob.query.count() == 1
+
+    # force 时重新导入
+    forced = client.post("/api/students/import", data={
+        "file": (io.BytesIO(content), "学生数据.xlsx"), "data_year": "2024", "force": "1"},
+        content_type="multipart/form-data")
+    assert forced.status_code == 202
+    wait_import_job(forced.get_json()["job_id"], timeout=30)
+    assert ImportJob.query.count() == 2
+
+
+def test_hash_mismatch_discards_upload(client, tmp_path):
+    content = workbook_bytes()
+    session = init(client, content).get_json()
+    corrupted = bytes([content[0] ^ 1]) + content[1:]
+    client.put(f"{session['chunk_url']}?offset=0", data=corrupted)
+
+    response = client.post(session["complete_url"])
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("文件校验失败")
+    assert client.get(f"/api/students/import/uploads/{session['upload_id']}").status_code == 404
+    assert list(tmp_path.iterdir()) == []
+    assert ImportJob.query.count() == 0
+
+
+def test_concurrent_resent_chunks_are_written_once(app, tmp_path):
+    content = workbook_bytes()
+    session, _ = create_upload_session(str(tmp_path), "学生数据.xlsx", "xlsx", "2024", len(content))
+    half = len(content) // 2
+    barrier = threading.Barrier(4)
+
+    def send():
+        barrier.wait()
+        append_upload_chunk(str(tmp_path), session, 0, content[:half])
+
+    threads = [threading.Thread(target=send) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert received_bytes(str(tmp_path), session) == half
+
+    # 分块文件超出文件大小（此前的并发写入造成）时，从偏移量处截断重写，会话仍可续传
+    with open(part_path(str(tmp_path), session), "ab") as f:
+        f.write(content)
+    result = append_upload_chunk(str(tmp_path), session, half, content[half:])
+    assert result == {"accepted": True, "received_bytes": len(content)}
+    with open(part_path(str(tmp_path), session), "rb") as f:
+        assert f.read() == content
+
+
+def test_abandoned_uploads_expire(app, tmp_path):
+    upload_dir = str(tmp_path)
+    stale, _ = create_upload_session(upload_dir, "旧.xlsx", "xlsx", "2024", 10)
+    stale.updated_at = datetime.now() - timedelta(days=2)
+    db.session.commit()
+    stale_id = stale.id
+    orphan = tmp_path / "upload_orphan.part"
+    orphan.write_bytes(b"x")
+    old = (datetime.now() - timedelta(days=2)).timestamp()
+    os.utime(orphan, (old, old))
+
+    fresh, _ = create_upload_session(upload_dir, "新.xlsx", "xlsx", "2024", 10)
+
+    assert db.session.get(UploadSession, stale_id) is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"upload_{fresh.id}.part"]
+
@@ -3,6 +3,7 @@
 完整存储路径: E:\DEV_CONTEXT\1_Projects\VISION_HEALTH_SYSTEM_VUE\frontend\static\js\data_import.js
 功能说明:
     该文件处理数据导入页面的所有交互，包括选择文件、拖拽文件、显示文件列表、上传文件、显示上传状态和处理文件删除等。
+    文件按 1MB 分块上传，网络中断后自动重试并从服务端已接收的位置续传；同一文件已导入过时不再重复导入。
 使用方法:
     加载页面时，页面元素会自动绑定相关的事件，包括文件选择、文件上传等交互功能。
 */
@@ -93,6 +94,99 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   });
 
+  // 轮询后台导入任务进度，任务结束后显示导入结果
+  function pollImportJob(statusUrl) {
+    fetch(statusUrl)
+      .then(response => response.json())
+      .then(job => {
+        if (job.error && job.status !== 'failed') {
+          uploadStatus.innerHTML = `<div class="alert alert-danger mt-2">${job.error}</div>`;
+        } else if (job.status === 'failed') {
+          uploadStatus.innerHTML = `<div class="alert alert-danger mt-2">导入失败：${job.error}</div>`;
+        } else if (job.status === 'succeeded') {
+          const link = job.failures_file
+            ? ` <a href="${job.failures_file}">下载失败记录</a>` : '';
+          uploadStatus.innerHTML = `<div class="alert alert-success mt-2">导入成功 ${job.imported_count} 条记录。`
+            + (job.failed_rows > 0 ? ` 失败 ${job.failed_rows} 条记录。${link}` : '') + '</div>';
+        } else {
+          const total = job.total_rows ? ` / 约 ${job.total_rows}` : '';
+          const speed = job.throughput ? `，${job.throughput} 行/秒` : '';
+          const eta = job.eta_seconds !== null && job.eta_seconds !== undefined
+            ? `，预计剩余 ${Math.ceil(job.eta_seconds)} 秒` : '';
+          uploadStatus.innerHTML = `<div class="alert alert-info mt-2">正在导入：已处理 ${job.processed_rows}${total} 行，`
+            + `失败 ${job.failed_rows} 行${speed}${eta}</div>`;
+          setTimeout(() => pollImportJob(statusUrl), 1000);
+        }
+      })
+      .catch(err => {
+        uploadStatus.innerHTML = `<div class="alert alert-danger mt-2">查询导入进度出错：${err}</div>`;
+        console.error('查询导入进度错误:', err);
+      });
+  }
+
+  // 分块上传的每块字节数
+  const CHUNK_SIZE = 1024 * 1024;
+  // 单个分块上传失败后的最大重试次数
+  const CHUNK_RETRIES = 5;
+
+  // 计算文件的 SHA-256 哈希（十六进制）；非安全上下文中浏览器不提供 crypto.subtle，此时返回 null，由服务端计算
+  async function sha256Hex(file) {
+    if (!window.crypto || !window.crypto.subtle) {
+      return null;
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+  }
+
+  async function postJson(url, data) {
+    const response = await fetch(url, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(data)
+    });
+    return response.json();
+  }
+
+  // 从 offset 开始上传一个分块，网络错误时等待后重试；返回服务端已接收的字节数
+  async function putChunk(chunkUrl, file, offset) {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        const response = await fetch(`${chunkUrl}?offset=${offset}`, {
+          method: 'PUT',
+          headers: { 'Content-Type': 'application/octet-stream' },
+          body: file.slice(offset, offset + CHUNK_SIZE)
+        });
+        const result = await response.json();
+        if (response.ok || response.status === 409 && result.received_bytes !== undefined) {
+          return result.received_bytes;
+        }
+        throw new Error(result.error);
+      } catch (err) {
+        if (attempt >= CHUNK_RETRIES) {
+          throw err;
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000 * (attempt + 1)));
+      }
+    }
+  }
+
+  // 分块上传文件：同一文件已导入时直接返回已有任务；存在未完成的上传会话时从已接收位置续传
+  async function chunkedUpload(file, dataYear) {
+    const fileHash = await sha256Hex(file);
+    const session = await postJson('/api/students/import/uploads', {
+      filename: file.name, data_year: dataYear, total_size: file.size, file_hash: fileHash
+    });
+    if (session.error || session.duplicate) {
+      return session;
+    }
+    let received = session.received_bytes;
+    while (received < file.size) {
+      uploadStatus.innerHTML = `<div class="alert alert-info mt-2">正在上传：${Math.floor(received * 100 / file.size)}%</div>`;
+      received = await putChunk(session.chunk_url, file, received);
+    }
+    return postJson(session.complete_url, {});
+  }
+
   // 上传文件按钮点击
   uploadBtn.addEventListener('click', () => {
     if (selectedFiles.length === 0) {
@@ -100,22 +194,14 @@ document.addEventListener('DOMContentLoaded', () => {
       return;
     }
     const dataYear = dataYearSelect.value;
-    const formData = new FormData();
-    formData.append('data_year', dataYear);
-    selectedFiles.forEach(file => {
-      formData.append('file', file);
-    });
     uploadStatus.innerHTML = '<div class="alert alert-info mt-2">正在上传，请稍候……</div>';
-    fetch("/api/students/import", {  // 修改：直接使用硬编码的 URL
-      method: 'POST',
-      body: formData
-    })
-      .then(response => response.json())
+    chunkedUpload(selectedFiles[0], dataYear)
       .then(result => {
         if (result.error) {
           uploadStatus.innerHTML = `<div class="alert alert-danger mt-2">${result.error}</div>`;
         } else {
-          uploadStatus.innerHTML = `<div class="alert alert-success mt-2">${result.message}</div>`;
+          uploadStatus.innerHTML = `<div class="alert alert-info mt-2">${result.message}</div>`;
+          pollImportJob(result.status_url);
         }
       })
       .catch(err => {
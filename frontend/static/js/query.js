@@ -117,6 +117,11 @@ document.addEventListener('DOMContentLoaded', function () {
     const params = getQueryParams();
     params.append('page', currentPage);
     params.append('per_page', perPage);
+    // 只查询表格中显示的列
+    const selectedColumns = getSelectedColumns();
+    if (selectedColumns.length > 0) {
+      params.append('fields', selectedColumns.join(','));
+    }
     fetch('/api/students/query?' + params.toString())
       .then(response => response.json())
       .then(result => {
@@ -168,12 +173,13 @@ window.fetchData = fetchData;
       columnCheckboxes.forEach(cb => {
         cb.checked = checkAll;
       });
-      renderTable(latestData);
+      // 查询结果只包含已选列，列配置变化后重新查询
+      fetchData();
     });
   }
   columnCheckboxes.forEach(cb => {
     cb.addEventListener('change', function () {
-      renderTable(latestData);
+      fetchData();
     });
   });
 
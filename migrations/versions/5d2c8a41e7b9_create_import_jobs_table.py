@@ -0,0 +1,39 @@
+"""Create import_jobs table
+
+Revision ID: 5d2c8a41e7b9
+Revises: 013cca489fe0
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2c8a41e7b9'
+down_revision = '013cca489fe0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_jobs',
+                    sa.Column('id', sa.String(length=32), nullable=False),
+                    sa.Column('status', sa.String(length=10), nullable=False),
+                    sa.Column('filename', sa.String(length=255), nullable=True),
+                    sa.Column('data_year', sa.String(length=4), nullable=False),
+                    sa.Column('total_rows', sa.Integer(), nullable=True),
+                    sa.Column('processed_rows', sa.Integer(), nullable=False),
+                    sa.Column('failed_rows', sa.Integer(), nullable=False),
+                    sa.Column('imported_count', sa.Integer(), nullable=False),
+                    sa.Column('failures_file', sa.String(length=255), nullable=True),
+                    sa.Column('error', sa.Text(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(), nullable=False),
+                    sa.Column('started_at', sa.DateTime(), nullable=True),
+                    sa.Column('finished_at', sa.DateTime(), nullable=True),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+
+
+def downgrade():
+    op.drop_table('import_jobs')
@@ -0,0 +1,26 @@
+"""Add stage_timings to import_jobs
+
+Revision ID: 8e1f4b7c2a90
+Revises: 5d2c8a41e7b9
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1f4b7c2a90'
+down_revision = '5d2c8a41e7b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stage_timings', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_column('stage_timings')
@@ -0,0 +1,71 @@
+"""Add students search indexes and students_fts full-text table
+
+Revision ID: a4c1e7f9b352
+Revises: f3a9d2c6b471
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.exc import OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c1e7f9b352'
+down_revision = 'f3a9d2c6b471'
+branch_labels = None
+depends_on = None
+
+
+# FTS5 trigram 外部内容表与同步触发器（仅 SQLite，且需 SQLite 3.34+ 编译了 FTS5）。
+# 这是本迁移创建时 backend/services/student_search.py 中 FTS_DDL 与 FTS_REBUILD 的冻结副本：
+# 迁移不导入应用代码，之后修改服务模块不会改变本迁移的行为；全文索引结构变化时需新增迁移。
+FTS_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5("
+    "education_id, school, class_name, name, content='students', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN "
+    "INSERT INTO students_fts(rowid, education_id, school, class_name, name) "
+    "VALUES (new.id, new.education_id, new.school, new.class_name, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN "
+    "INSERT INTO students_fts(students_fts, rowid, education_id, school, class_name, name) "
+    "VALUES ('delete', old.id, old.education_id, old.school, old.class_name, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF education_id, school, class_name, name "
+    "ON students BEGIN "
+    "INSERT INTO students_fts(students_fts, rowid, education_id, school, class_name, name) "
+    "VALUES ('delete', old.id, old.education_id, old.school, old.class_name, old.name); "
+    "INSERT INTO students_fts(rowid, education_id, school, class_name, name) "
+    "VALUES (new.id, new.education_id, new.school, new.class_name, new.name); END",
+    "INSERT INTO students_fts(students_fts) VALUES ('rebuild')",
+]
+
+FTS_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS students_fts_insert",
+    "DROP TRIGGER IF EXISTS students_fts_delete",
+    "DROP TRIGGER IF EXISTS students_fts_update",
+    "DROP TABLE IF EXISTS students_fts",
+]
+
+
+def upgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_students_school'), ['school'], unique=False)
+        batch_op.create_index(batch_op.f('ix_students_class_name'), ['class_name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_students_name'), ['name'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        try:
+            for statement in FTS_UPGRADE:
+                op.execute(statement)
+        except OperationalError:
+            # SQLite 未编译 FTS5 或不支持 trigram 分词：查询接口自动退回 ILIKE
+            pass
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in FTS_DOWNGRADE:
+            op.execute(statement)
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_students_name'))
+        batch_op.drop_index(batch_op.f('ix_students_class_name'))
+        batch_op.drop_index(batch_op.f('ix_students_school'))
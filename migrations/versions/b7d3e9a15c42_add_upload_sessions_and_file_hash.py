@@ -0,0 +1,49 @@
+"""Add upload_sessions table and import_jobs.file_hash
+
+Revision ID: b7d3e9a15c42
+Revises: 8e1f4b7c2a90
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3e9a15c42'
+down_revision = '8e1f4b7c2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_sessions',
+                    sa.Column('id', sa.String(length=32), nullable=False),
+                    sa.Column('filename', sa.String(length=255), nullable=True),
+                    sa.Column('ext', sa.String(length=10), nullable=False),
+                    sa.Column('data_year', sa.String(length=4), nullable=False),
+                    sa.Column('total_size', sa.Integer(), nullable=False),
+                    sa.Column('file_hash', sa.String(length=64), nullable=True),
+                    sa.Column('status', sa.String(length=10), nullable=False),
+                    sa.Column('job_id', sa.String(length=32), nullable=True),
+                    sa.Column('created_at', sa.DateTime(), nullable=False),
+                    sa.Column('updated_at', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_upload_sessions_file_hash'), ['file_hash'], unique=False)
+
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_import_jobs_file_hash'), ['file_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_jobs_file_hash'))
+        batch_op.drop_column('file_hash')
+
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_file_hash'))
+
+    op.drop_table('upload_sessions')
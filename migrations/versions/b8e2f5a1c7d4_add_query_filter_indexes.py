@@ -0,0 +1,51 @@
+"""Add student_extensions filter/group-by indexes and students.gender index
+
+Revision ID: b8e2f5a1c7d4
+Revises: a4c1e7f9b352
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2f5a1c7d4'
+down_revision = 'a4c1e7f9b352'
+branch_labels = None
+depends_on = None
+
+
+INTERVENTION_COLUMNS = [
+    'frame_glasses', 'contact_lenses', 'night_orthokeratology', 'guasha', 'aigiu',
+    'zhongyao_xunzheng', 'rejiu_training', 'xuewei_tiefu', 'reci_pulse', 'baoguan',
+]
+
+EXTENSION_INDEXES = [
+    ('ix_student_extensions_year_vision_age', ['data_year', 'vision_level', 'age', 'student_id']),
+    ('ix_student_extensions_year_grade', ['data_year', 'grade']),
+    ('ix_student_extensions_year_interv_vision', ['data_year', 'interv_vision_level']),
+    ('ix_student_extensions_year_interventions',
+     ['data_year'] + INTERVENTION_COLUMNS + ['vision_level', 'student_id']),
+]
+
+
+def upgrade():
+    with op.batch_alter_table('student_extensions', schema=None) as batch_op:
+        for name, columns in EXTENSION_INDEXES:
+            batch_op.create_index(name, columns, unique=False)
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_students_gender'), ['gender'], unique=False)
+
+    # 更新 SQLite 查询优化器的统计信息，使新索引按实际数据分布参与选择
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ANALYZE')
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_students_gender'))
+
+    with op.batch_alter_table('student_extensions', schema=None) as batch_op:
+        for name, _ in reversed(EXTENSION_INDEXES):
+            batch_op.drop_index(name)
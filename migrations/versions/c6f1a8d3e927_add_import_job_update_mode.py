@@ -0,0 +1,26 @@
+"""Add import_jobs.update_mode
+
+Revision ID: c6f1a8d3e927
+Revises: b8e2f5a1c7d4
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f1a8d3e927'
+down_revision = 'b8e2f5a1c7d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('update_mode', sa.String(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_column('update_mode')
@@ -0,0 +1,32 @@
+"""Add import metrics columns to import_jobs
+
+Revision ID: d5a8c3f61e27
+Revises: b7d3e9a15c42
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c3f61e27'
+down_revision = 'b7d3e9a15c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stage_metrics', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('file_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('peak_memory_mb', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('schools', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_column('schools')
+        batch_op.drop_column('peak_memory_mb')
+        batch_op.drop_column('file_size')
+        batch_op.drop_column('stage_metrics')
@@ -0,0 +1,38 @@
+"""Add import_fingerprints table and import_jobs.skipped_rows
+
+Revision ID: e2c7b4d9a318
+Revises: d5a8c3f61e27
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c7b4d9a318'
+down_revision = 'd5a8c3f61e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_fingerprints',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('education_id', sa.String(length=20), nullable=False),
+                    sa.Column('data_year', sa.String(length=4), nullable=False),
+                    sa.Column('fingerprint', sa.String(length=16), nullable=False),
+                    sa.Column('updated_at', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('education_id', 'data_year', name='uq_fingerprint_student_year')
+                    )
+
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('skipped_rows', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_column('skipped_rows')
+
+    op.drop_table('import_fingerprints')
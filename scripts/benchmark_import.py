@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: benchmark_import.py
+完整存储路径: scripts/benchmark_import.py
+功能说明:
+    学生数据导入性能基准。生成指定行数的模拟上传数据（与 pd.read_excel(dtype=str) 的结果结构一致），
+    分别使用原逐行导入实现（import_dataframe_rowwise）与列式导入引擎（import_dataframe）
+    导入到独立的临时 SQLite 数据库中，输出耗时与每秒处理行数（rows/sec）。
+    包含两个场景：新增年份（全部为新增记录）与重复上传（全部为部分更新）。
+    另外单独对比字段转换阶段的每行开销：原逐行转换表达式（student_kwargs_rowwise / extension_kwargs_rowwise）
+    与由字段注册表生成的列式转换计划（convert_frame + STUDENT_COLUMNS / EXTENSION_COLUMNS）。
+使用说明:
+    在项目根目录下运行：
+        python scripts/benchmark_import.py --rows 40000
+    可选参数:
+        --rows      模拟数据行数（默认 5000）
+        --seed      随机数种子（默认 42）
+        --skip-rowwise  只运行列式引擎（行数很大时逐行实现耗时较长）
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from flask import Flask  # noqa: E402
+
+from backend.infrastructure.database import db  # noqa: E402
+from backend.services.import_service import (  # noqa: E402
+    EXTENSION_COLUMNS,
+    STUDENT_COLUMNS,
+    convert_frame,
+    import_dataframe,
+)
+from backend.tests.import_rowwise import (  # noqa: E402
+    extension_kwargs_rowwise,
+    import_dataframe_rowwise,
+    student_kwargs_rowwise,
+)
+
+
+def generate_upload_frame(num_rows, seed=42):
+    """生成模拟上传数据：全部列为字符串，约 5% 的单元格为空。"""
+    rng = np.random.default_rng(seed)
+    vision = np.round(rng.uniform(4.0, 5.2, size=(num_rows, 4)), 1)
+    sphere = np.round(rng.uniform(-6.5, 1.5, size=(num_rows, 4)) * 4) / 4
+    cylinder = np.round(rng.uniform(-2.0, 0, size=(num_rows, 4)) * 4) / 4
+    axis = rng.integers(0, 180, size=(num_rows, 4))
+    data = {
+        "教育ID号": [f"E{i:08d}" for i in range(num_rows)],
+        "学校": rng.choice(["华兴小学", "苏宁红军小学", "师大附小清华小学"], num_rows),
+        "班级": [f"{i}班" for i in rng.integers(1, 16, num_rows)],
+        "姓名": [f"学生{i}" for i in range(num_rows)],
+        "性别": rng.choice(["男", "女"], num_rows),
+        "出生日期": pd.to_datetime("2012-01-01") + pd.to_timedelta(rng.integers(0, 2500, num_rows), unit="D"),
+        "年级": rng.choice(["一年级", "二年级", "三年级", "四年级", "五年级", "六年级"], num_rows),
+        "年龄": rng.integers(6, 13, num_rows),
+        "身高": np.round(rng.uniform(110, 160, num_rows), 1),
+        "体重": np.round(rng.uniform(18, 50, num_rows), 1),
+        "右眼-裸眼视力": vision[:, 0], "左眼-裸眼视力": vision[:, 1],
+        "右眼-干预-裸眼视力": vision[:, 2], "左眼-干预-裸眼视力": vision[:, 3],
+        "右眼屈光-球镜": sphere[:, 0], "左眼屈光-球镜": sphere[:, 1],
+        "右眼屈光-干预-球镜": sphere[:, 2], "左眼屈光-干预-球镜": sphere[:, 3],
+        "右眼屈光-柱镜": cylinder[:, 0], "左眼屈光-柱镜": cylinder[:, 1],
+        "右眼屈光-干预-柱镜": cylinder[:, 2], "左眼屈光-干预-柱镜": cylinder[:, 3],
+        "右眼屈光-轴位": axis[:, 0], "左眼屈光-轴位": axis[:, 1],
+        "右眼屈光-干预-轴位": axis[:, 2], "左眼屈光-干预-轴位": axis[:, 3],
+        "右眼-眼轴": np.round(rng.uniform(21, 26, num_rows), 2),
+        "左眼-眼轴": np.round(rng.uniform(21, 26, num_rows), 2),
+        "框架眼镜": rng.choice(["是", "否"], num_rows),
+        "刮痧": rng.choice(["是", "否"], num_rows),
+        "艾灸": rng.choice(["是", "否"], num_rows),
+        "第1次干预": pd.to_datetime("2024-03-01") + pd.to_timedelta(rng.integers(0, 60, num_rows), unit="D"),
+    }
+    df = pd.DataFrame(data)
+    df["出生日期"] = df["出生日期"].dt.strftime("%Y-%m-%d")
+    df["第1次干预"] = df["第1次干预"].dt.strftime("%Y-%m-%d")
+    df = df.astype(str)
+    optional = [c for c in df.columns if c not in ("教育ID号", "学校", "班级", "姓名", "性别")]
+    mask = rng.random((num_rows, len(optional))) < 0.05
+    df[optional] = df[optional].mask(mask)
+    return df
+
+
+def run_engine(engine, df, data_year, reupload=False):
+    """
+    在独立的临时 SQLite 数据库中运行一次导入，返回 (耗时秒数, 导入结果)。
+    reupload 为 True 时先（不计时）导入一遍同一文件，再计时重复上传，对应部分更新路径。
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            if reupload:
+                import_dataframe(df, data_year)
+                db.session.commit()
+                db.session.expunge_all()
+            start = time.perf_counter()
+            result = engine(df, data_year)
+            db.session.commit()
+            elapsed = time.perf_counter() - start
+            db.session.remove()
+            db.engine.dispose()
+    return elapsed, result
+
+
+def convert_rowwise(df):
+    """原逐行转换：对每行执行手写的逐字段转换表达式。"""
+    for _, row in df.iterrows():
+        student_kwargs_rowwise(row)
+        extension_kwargs_rowwise(row)
+
+
+def convert_registry(df):
+    """字段注册表生成的列式转换：每列只对去重后的取值转换一次。"""
+    convert_frame(df, STUDENT_COLUMNS)
+    convert_frame(df, EXTENSION_COLUMNS)
+
+
+def time_conversion(converter, df):
+    start = time.perf_counter()
+    converter(df)
+    return time.perf_counter() - start
+
+
+def report(name, rows, elapsed, result):
+    print(f"{name:<10} 行数={rows:<8} 耗时={elapsed:8.2f}s  "
+          f"吞吐={rows / elapsed:10.0f} rows/sec  成功={result['imported_count']}  "
+          f"失败={len(result['failed_rows'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="学生数据导入性能基准")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-rowwise", action="store_true")
+    args = parser.parse_args()
+
+    df = generate_upload_frame(args.rows, args.seed)
+    print(f"模拟数据: {len(df)} 行 x {len(df.columns)} 列")
+
+    print("--- 字段转换（每行开销） ---")
+    registry_elapsed = time_conversion(convert_registry, df)
+    if not args.skip_rowwise:
+        rowwise_elapsed = time_conversion(convert_rowwise, df)
+        print(f"逐行表达式   {rowwise_elapsed / len(df) * 1e6:10.1f} us/row")
+    print(f"注册表列式   {registry_elapsed / len(df) * 1e6:10.1f} us/row")
+    if not args.skip_rowwise:
+        print(f"加速比: {rowwise_elapsed / registry_elapsed:.1f}x")
+
+    for scenario, reupload in (("新增年份", False), ("重复上传", True)):
+        print(f"--- 场景: {scenario} ---")
+        rowwise_elapsed = None
+        if not args.skip_rowwise:
+            rowwise_elapsed, result = run_engine(
+                import_dataframe_rowwise, df, "2024", reupload)
+            report("逐行导入", len(df), rowwise_elapsed, result)
+
+        columnar_elapsed, result = run_engine(import_dataframe, df, "2024", reupload)
+        report("列式导入", len(df), columnar_elapsed, result)
+
+        if rowwise_elapsed:
+            print(f"加速比: {rowwise_elapsed / columnar_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
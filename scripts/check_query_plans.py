@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名称: check_query_plans.py
+完整存储路径: scripts/check_query_plans.py
+功能说明:
+    查询执行计划检查工具。对查询接口与统计报表实际构造的各类查询（backend/services/query_plan.py
+    中的 PLAN_SHAPES）执行 EXPLAIN QUERY PLAN，输出执行计划，并标记对 students / student_extensions
+    的全表扫描。存在未被允许的全表扫描时以退出码 1 结束，可用于修改索引或查询后的检查。
+使用说明:
+    在项目根目录下运行：
+        python scripts/check_query_plans.py                       # 按当前模型在内存库中建表后检查
+        python scripts/check_query_plans.py --database instance/app.db
+    可选参数:
+        --database  已有的 SQLite 数据库文件（使用其中的索引与 ANALYZE 统计信息）
+        --verbose   输出每条语句的 SQL
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from backend.infrastructure.database import db  # noqa: E402
+from backend.services.query_plan import check_query_plans  # noqa: E402
+from backend.services.student_search import ensure_search_index  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询执行计划检查")
+    parser.add_argument("--database", default="")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.logger.setLevel(logging.WARNING)
+    if args.database:
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.abspath(args.database)}"
+    else:
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        if not args.database:
+            db.create_all()
+            ensure_search_index(db.engine)
+        results = check_query_plans(app)
+        db.session.rollback()
+
+    flagged = 0
+    for result in results:
+        status = "全表扫描" if result["full_scans"] else "OK"
+        print(f"[{status}] {result['name']}")
+        if args.verbose:
+            print("    " + result["statement"].replace("\n", "\n    "))
+        for detail in result["plan"]:
+            marker = "!!" if detail in result["full_scans"] else "  "
+            print(f"    {marker} {detail}")
+        flagged += bool(result["full_scans"])
+
+    print(f"共 {len(results)} 条语句，{flagged} 条存在全表扫描")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()